@@ -0,0 +1,174 @@
+import asyncio
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, Request
+
+from app.gateway.services import SERVICES, get_service_config
+
+# Limite par client (adresse IP) : requêtes par seconde et rafale autorisée
+CLIENT_RATE = float(os.getenv("CLIENT_RATE_LIMIT", "50"))
+CLIENT_BURST = int(os.getenv("CLIENT_RATE_BURST", "100"))
+MAX_TRACKED_CLIENTS = 10000
+
+# Limites par route, tous clients confondus : (service, motif du chemin, débit, rafale)
+ROUTE_RATE_LIMITS = [
+    ("users", re.compile(r"^(login|login_admin|register)/?$"), 20.0, 40),
+    ("payments", re.compile(r"^paiements/?$"), 50.0, 100),
+    # Agrégation : chaque requête déclenche trois appels amont
+    ("aggregate", re.compile(r"^commandes/[^/]+/?$"), 30.0, 60),
+]
+
+
+class TokenBucket:
+    """Seau à jetons : `rate` jetons par seconde, au plus `burst` en réserve."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Consomme un jeton ; retourne 0, ou le délai d'attente en secondes si le seau est vide."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    Plafond de requêtes simultanées vers un service, avec une file d'attente
+    bornée (FIFO). File pleine ou attente trop longue : rejet immédiat en 503
+    plutôt que d'empiler des requêtes qui expireraient de toute façon.
+    """
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        self.stats = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_timeout": 0}
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.stats["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.stats["shed_queue_full"] += 1
+            raise HTTPException(status_code=503, detail="Service surchargé, réessayez plus tard",
+                                headers={"Retry-After": "1"})
+
+        self.stats["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except BaseException:
+            # Client parti pendant l'attente : rendre la place si elle a été attribuée
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self.stats["shed_timeout"] += 1
+            raise HTTPException(status_code=503, detail="Service surchargé, réessayez plus tard",
+                                headers={"Retry-After": "1"})
+        self.stats["admitted"] += 1
+
+    def _abandon(self, waiter):
+        if waiter.done():
+            self.release()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def release(self):
+        # La place est transmise directement au premier en attente
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+        else:
+            self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> dict:
+        return {"active": self.active, "waiting": len(self._waiters), "limit": self.limit, **self.stats}
+
+
+class AdmissionControl:
+    """Limites de débit (par client, par route) et plafonds de concurrence par service."""
+
+    def __init__(self):
+        self._clients = OrderedDict()
+        self._routes = {}
+        self._limiters = {}
+        self.rate_limited = 0
+
+    def _client_bucket(self, client: str) -> TokenBucket:
+        bucket = self._clients.get(client)
+        if bucket is None:
+            bucket = self._clients[client] = TokenBucket(CLIENT_RATE, CLIENT_BURST)
+            if len(self._clients) > MAX_TRACKED_CLIENTS:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return bucket
+
+    def _route_bucket(self, service: str, path: str):
+        path = path.strip("/")
+        for index, (rule_service, pattern, rate, burst) in enumerate(ROUTE_RATE_LIMITS):
+            if rule_service == service and pattern.match(path):
+                bucket = self._routes.get(index)
+                if bucket is None:
+                    bucket = self._routes[index] = TokenBucket(rate, burst)
+                return bucket
+        return None
+
+    def check_rate(self, service: str, path: str, request: Request):
+        """Lève une 429 (avec Retry-After) si le client ou la route dépasse sa limite."""
+        client = request.client.host if request.client else "inconnu"
+        wait = self._client_bucket(client).try_acquire()
+        if not wait:
+            route = self._route_bucket(service, path)
+            wait = route.try_acquire() if route is not None else 0.0
+        if wait:
+            self.rate_limited += 1
+            raise HTTPException(status_code=429, detail="Trop de requêtes",
+                                headers={"Retry-After": str(math.ceil(wait))})
+
+    def limiter(self, service: str) -> ConcurrencyLimiter:
+        limiter = self._limiters.get(service)
+        if limiter is None:
+            config = get_service_config(service)
+            limiter = self._limiters[service] = ConcurrencyLimiter(
+                config["max_concurrency"], config["max_queue"], config["queue_timeout"]
+            )
+        return limiter
+
+    def snapshot(self) -> dict:
+        return {
+            "rate_limited": self.rate_limited,
+            "tracked_clients": len(self._clients),
+            "upstreams": {service: self.limiter(service).snapshot() for service in SERVICES},
+        }
+
+
+admission = AdmissionControl()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, HTTPException, Request
+from httpx import ConnectError, HTTPError, TimeoutException
+
+from app.gateway.admission import admission
+from app.gateway.clients import upstream_clients
+from app.gateway.discovery import service_registry
+from app.gateway.metrics import upstream_extensions
+from app.gateway.proxy import filter_request_headers
+from app.gateway.resilience import resilience
+
+router = APIRouter(prefix="/api/aggregate", tags=["Agrégation"])
+
+# Délai max par appel amont (file d'attente et retries compris)
+AGGREGATE_CALL_TIMEOUT = float(os.getenv("AGGREGATE_CALL_TIMEOUT", "2.0"))
+
+
+async def fetch_json(service: str, path: str, request: Request):
+    """
+    GET vers un service via le même chemin que la gateway (répartiteur,
+    plafond de concurrence, disjoncteur) ; lève une HTTPException en cas d'échec.
+    """
+    client = upstream_clients.get(service)
+    headers = filter_request_headers(request)
+
+    async def attempt(stream: bool):
+        endpoint = service_registry.pick(service)
+        with endpoint.track():
+            try:
+                return await client.get(f"{endpoint.url}{path}", headers=headers,
+                                        extensions=upstream_extensions(service))
+            except (ConnectError, TimeoutException) as e:
+                raise HTTPException(status_code=503, detail=f"Service indisponible : {str(e)}")
+            except HTTPError as e:
+                # Corps tronqué, connexion coupée pendant la lecture...
+                raise HTTPException(status_code=502, detail=f"Réponse invalide : {str(e)}")
+
+    async def call():
+        async with admission.limiter(service).slot():
+            return await resilience.call(service, request, attempt, stream=False)
+
+    try:
+        response = await asyncio.wait_for(call(), AGGREGATE_CALL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Délai dépassé pour le service '{service}'")
+    if response.status_code >= 400:
+        raise HTTPException(status_code=response.status_code, detail=f"Erreur du service '{service}'")
+    try:
+        return response.json()
+    except ValueError:
+        # Corps non JSON : traité comme une erreur amont (réponse partielle)
+        raise HTTPException(status_code=502, detail=f"Réponse invalide du service '{service}'")
+
+
+async def fetch_produits(produit_ids: list, request: Request):
+    """Produits demandés en un seul appel groupé au service produits."""
+    if not produit_ids:
+        return {"produits": {}, "manquants": []}
+    query = urlencode({"ids": ",".join(produit_ids)})
+    return await fetch_json("products", f"/produits/lot?{query}", request)
+
+
+async def settle(coro):
+    """Attend un appel et retourne (données, erreur) au lieu de lever une exception."""
+    try:
+        return await coro, None
+    except HTTPException as e:
+        return None, f"{e.status_code} : {e.detail}"
+
+
+@router.get("/commandes/{commande_id}")
+async def commande_details(commande_id: str, request: Request):
+    """
+    Détail complet d'une commande en un seul aller-retour : la commande, ses
+    paiements et les produits de ses lignes (un seul appel groupé), récupérés
+    en parallèle.
+    Si les paiements ou certains produits sont indisponibles, la réponse est
+    partielle et "erreurs" indique ce qui manque.
+    """
+    # Mêmes limites de débit que les routes proxifiées (3 appels amont par requête)
+    admission.check_rate("aggregate", f"commandes/{commande_id}", request)
+
+    # Les paiements ne dépendent que de l'identifiant : lancés tout de suite
+    paiements_task = asyncio.ensure_future(
+        settle(fetch_json("payments", f"/paiements/commande/{commande_id}", request))
+    )
+    try:
+        commande = await fetch_json("orders", f"/commande/get/{commande_id}", request)
+    except HTTPException:
+        paiements_task.cancel()
+        raise
+
+    # Tous les produits des lignes en un seul appel (/produits/lot), chacun une fois
+    produit_ids = list(dict.fromkeys(ligne["produit_id"] for ligne in commande.get("lignes", [])))
+    (paiements, paiements_erreur), (lot, lot_erreur) = await asyncio.gather(
+        paiements_task, settle(fetch_produits(produit_ids, request))
+    )
+
+    erreurs = {}
+    if paiements_erreur:
+        erreurs["paiements"] = paiements_erreur
+    produits = {}
+    for pid in produit_ids:
+        produit = lot["produits"].get(pid) if lot else None
+        produits[pid] = produit
+        if lot_erreur:
+            erreurs.setdefault("produits", {})[pid] = lot_erreur
+        elif produit is None:
+            erreurs.setdefault("produits", {})[pid] = "404 : Produit introuvable"
+
+    return {
+        "commande": commande,
+        "paiements": paiements,
+        "produits": produits,
+        "erreurs": erreurs,
+        "partiel": bool(erreurs),
+    }
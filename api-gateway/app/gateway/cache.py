@@ -0,0 +1,204 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Règles de mise en cache : (service, motif du chemin, TTL en secondes).
+# La première règle qui correspond s'applique ; sans règle, pas de cache.
+CACHE_RULES = [
+    ("products", re.compile(r"^produits/categories/(liste|stats)/?$"), 300),
+    ("products", re.compile(r"^produits/categorie/[^/]+/?$"), 60),
+    ("products", re.compile(r"^produits/(recherche|lot)/?$"), 30),
+    ("products", re.compile(r"^produits/[^/]+/?$"), 60),  # détail d'un produit
+    ("products", re.compile(r"^produits/?$"), 30),
+]
+
+# Écritures ciblant un seul produit : seules sa fiche et les listes sont invalidées.
+# Toute autre écriture sur le service vide l'ensemble de ses entrées.
+SINGLE_PRODUCT_WRITES = {
+    "PUT": re.compile(r"^produits/([^/]+)/?$"),
+    "PATCH": re.compile(r"^produits/([^/]+)/?$"),
+    "DELETE": re.compile(r"^produits/([^/]+)/?$"),
+    "POST": re.compile(r"^produits/([^/]+)/promo/?$"),
+}
+PRODUCT_DETAIL = re.compile(r"^produits/(?!(?:recherche|lot)/?$)([^/]+)/?$")
+
+# En-têtes de la requête qui font varier la réponse
+VARY_HEADERS = ("accept", "authorization")
+
+# En-têtes de la réponse amont qui ne sont pas conservés
+EXCLUDED_HEADERS = {"content-length", "etag", "last-modified", "cache-control", "date", "server"}
+
+
+def request_key(service: str, path: str, request: Request) -> tuple:
+    """Identifie une lecture : service, chemin, paramètres et en-têtes qui font varier la réponse."""
+    query = tuple(sorted(request.query_params.multi_items()))
+    vary = tuple(request.headers.get(name, "") for name in VARY_HEADERS)
+    return (service, path.strip("/"), query, vary)
+
+
+class CacheEntry:
+    __slots__ = ("status_code", "headers", "body", "etag", "last_modified", "expires_at")
+
+    def __init__(self, status_code: int, headers: dict, body: bytes, ttl: float):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.last_modified = time.time()
+        self.expires_at = time.monotonic() + ttl
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def validators(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",  # le navigateur revalide à chaque fois (304)
+        }
+
+    def not_modified(self, request: Request) -> bool:
+        """Vrai si les validateurs conditionnels du client correspondent."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.last_modified) <= since
+        return False
+
+    def to_response(self, status: str) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            headers={**self.headers, **self.validators(), "X-Cache": status}
+        )
+
+
+class ResponseCache:
+    """
+    Cache LRU borné (en nombre d'entrées et en octets) des réponses GET de la
+    gateway, avec expiration par TTL selon CACHE_RULES.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024,
+                 max_entry_bytes: int = 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        # Incrémentée à chaque écriture sur le service : une lecture lancée
+        # avant ne doit pas remettre en cache une version périmée
+        self._generations = {}
+        self.stats = {
+            "hits": 0, "misses": 0, "not_modified": 0,
+            "stores": 0, "evictions": 0, "expirations": 0, "invalidations": 0,
+        }
+
+    @staticmethod
+    def ttl_for(service: str, path: str):
+        path = path.strip("/")
+        for rule_service, pattern, ttl in CACHE_RULES:
+            if rule_service == service and pattern.match(path):
+                return ttl
+        return None
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if not entry.is_fresh():
+            self._remove(key)
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+
+    def store(self, key: tuple, response: Response, ttl: float):
+        """Met en cache une réponse 200 et retourne l'entrée (ou None si non cachable)."""
+        body = response.body
+        if response.status_code != 200 or len(body) > self.max_entry_bytes:
+            return None
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in EXCLUDED_HEADERS
+        }
+        if key in self._entries:
+            self._remove(key)
+        entry = CacheEntry(response.status_code, headers, body, ttl)
+        self._entries[key] = entry
+        self._size += len(body)
+        self.stats["stores"] += 1
+
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+        return entry
+
+    def respond(self, entry: CacheEntry, request: Request, status: str) -> Response:
+        """Réponse complète, ou 304 si le client détient déjà cette version."""
+        if entry.not_modified(request):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers={**entry.validators(), "X-Cache": status})
+        return entry.to_response(status)
+
+    def generation(self, service: str) -> int:
+        return self._generations.get(service, 0)
+
+    def invalidate(self, service: str, method: str, path: str) -> int:
+        """Retire les entrées concernées par une écriture et retourne leur nombre."""
+        self._generations[service] = self.generation(service) + 1
+        path = path.strip("/")
+        pattern = SINGLE_PRODUCT_WRITES.get(method)
+        match = pattern.match(path) if pattern else None
+        written_id = match.group(1) if match else None
+
+        removed = 0
+        for key in list(self._entries):
+            if key[0] != service:
+                continue
+            if written_id is not None:
+                detail = PRODUCT_DETAIL.match(key[1])
+                # La fiche d'un autre produit n'est pas touchée par cette écriture
+                if detail and detail.group(1) != written_id:
+                    continue
+            self._remove(key)
+            removed += 1
+        self.stats["invalidations"] += removed
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+
+import httpx
+
+from app.gateway.services import SERVICES, get_service_config
+
+logger = logging.getLogger(__name__)
+
+
+def build_client(config: dict) -> httpx.AsyncClient:
+    """Construit un client httpx à partir de la configuration d'un service."""
+    limits = httpx.Limits(
+        max_connections=config["max_connections"],
+        max_keepalive_connections=config["max_keepalive_connections"],
+        keepalive_expiry=config["keepalive_expiry"],
+    )
+    timeout = httpx.Timeout(
+        connect=config["connect_timeout"],
+        read=config["read_timeout"],
+        write=config["write_timeout"],
+        pool=config["pool_timeout"],
+    )
+    try:
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=config["http2"],
+            follow_redirects=True,
+        )
+    except ImportError:
+        # HTTP/2 demandé mais le paquet "h2" n'est pas installé
+        logger.warning("HTTP/2 indisponible (paquet 'h2' manquant), repli sur HTTP/1.1")
+        return httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True)
+
+
+class UpstreamClients:
+    """
+    Pools de connexions persistants, un par service amont.
+    Ouverts au démarrage de la gateway et fermés à l'arrêt, ils permettent
+    de réutiliser les connexions TCP (keep-alive) d'une requête à l'autre.
+    """
+
+    def __init__(self):
+        self._clients = {}
+
+    async def start(self):
+        for name in SERVICES:
+            if name not in self._clients:
+                self._clients[name] = build_client(get_service_config(name))
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Retourne le client du service (créé à la demande si besoin)."""
+        client = self._clients.get(name)
+        if client is None:
+            config = get_service_config(name)
+            if config is None:
+                raise KeyError(name)
+            client = self._clients[name] = build_client(config)
+        return client
+
+
+upstream_clients = UpstreamClients()
@@ -0,0 +1,46 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Regroupe les appels identiques simultanés : le premier lance l'appel
+    amont, les suivants attendent et reçoivent le même résultat.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.stats = {"leaders": 0, "collapsed": 0}
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            # Tâche indépendante : l'annulation d'un client (même le premier)
+            # ne l'interrompt pas pour les autres
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.stats["collapsed"] += 1
+        return await asyncio.shield(task)
+
+    def forget(self, predicate):
+        """
+        Détache les appels en cours dont la clé vérifie `predicate` : ceux qui
+        attendent déjà les gardent, les nouveaux lancent un appel neuf.
+        """
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marque l'exception comme lue si tous les clients sont partis
+            task.exception()
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "in_flight": len(self._calls)}
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from contextlib import contextmanager
+
+import httpx
+
+from app.gateway.services import SERVICES, get_service_config
+
+logger = logging.getLogger(__name__)
+
+# Source de découverte : "static" (SERVICES), "file" (JSON local) ou "consul"
+DISCOVERY_SOURCE = os.getenv("DISCOVERY_SOURCE", "static")
+DISCOVERY_FILE = os.getenv("DISCOVERY_FILE", "services.json")
+DISCOVERY_REFRESH_INTERVAL = float(os.getenv("DISCOVERY_REFRESH_INTERVAL", "10"))
+CONSUL_HOST = os.getenv("CONSUL_HOST", "localhost")
+CONSUL_PORT = int(os.getenv("CONSUL_PORT", "8500"))
+
+
+class Endpoint:
+    """Une instance (réplique) d'un service, avec son nombre de requêtes en cours."""
+
+    __slots__ = ("url", "in_flight")
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+
+    @contextmanager
+    def track(self):
+        self.in_flight += 1
+        try:
+            yield self
+        finally:
+            self.in_flight -= 1
+
+
+class StaticSource:
+    """
+    Source en mémoire : les URLs de SERVICES ("url" ou liste "urls").
+    Sert aussi de doublure dans les tests via set().
+    """
+
+    def __init__(self, services: dict = None):
+        services = SERVICES if services is None else services
+        self._urls = {
+            name: list(config.get("urls") or [config["url"]])
+            for name, config in services.items()
+        }
+
+    def set(self, service: str, urls: list):
+        self._urls[service] = list(urls)
+
+    async def fetch(self) -> dict:
+        return {name: list(urls) for name, urls in self._urls.items()}
+
+    async def close(self):
+        pass
+
+
+class FileSource:
+    """Fichier JSON relu à chaque rafraîchissement : {"products": ["http://...", ...]}."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read(self) -> dict:
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    async def fetch(self) -> dict:
+        return await asyncio.to_thread(self._read)
+
+    async def close(self):
+        pass
+
+
+class ConsulSource:
+    """Catalogue Consul : seules les instances dont les health checks passent sont retenues."""
+
+    def __init__(self, host: str, port: int):
+        self.base_url = f"http://{host}:{port}"
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(2.0))
+
+    async def _instances(self, consul_name: str) -> list:
+        response = await self._client.get(
+            f"{self.base_url}/v1/health/service/{consul_name}", params={"passing": "true"}
+        )
+        response.raise_for_status()
+        urls = []
+        for entry in response.json():
+            address = entry["Service"].get("Address") or entry["Node"]["Address"]
+            urls.append(f"http://{address}:{entry['Service']['Port']}")
+        return urls
+
+    async def fetch(self) -> dict:
+        names = [name for name in SERVICES if SERVICES[name].get("consul_name")]
+        results = await asyncio.gather(
+            *(self._instances(SERVICES[name]["consul_name"]) for name in names)
+        )
+        return dict(zip(names, results))
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def build_source():
+    if DISCOVERY_SOURCE == "consul":
+        return ConsulSource(CONSUL_HOST, CONSUL_PORT)
+    if DISCOVERY_SOURCE == "file":
+        return FileSource(DISCOVERY_FILE)
+    return StaticSource()
+
+
+class ServiceRegistry:
+    """
+    Instances connues de chaque service, rafraîchies en tâche de fond depuis
+    la source de découverte, et répartition des requêtes entre elles.
+    En cas d'échec de la source, le dernier état connu est conservé ; sans
+    aucune instance connue, l'URL de SERVICES sert de repli.
+    """
+
+    def __init__(self, source=None, refresh_interval: float = DISCOVERY_REFRESH_INTERVAL):
+        self.source = source if source is not None else build_source()
+        self.refresh_interval = refresh_interval
+        self._endpoints = {}
+        self._fallbacks = {}
+        self._task = None
+
+    async def refresh(self):
+        try:
+            discovered = await self.source.fetch()
+        except Exception as e:
+            logger.warning(f"Découverte des services impossible, état précédent conservé : {e}")
+            return
+        for service, urls in discovered.items():
+            if not urls:
+                # Aucune instance saine annoncée : on garde les précédentes
+                continue
+            # Réutilise les Endpoint existants pour conserver leurs compteurs
+            current = {endpoint.url: endpoint for endpoint in self._endpoints.get(service, [])}
+            self._endpoints[service] = [
+                current.get(url.rstrip("/")) or Endpoint(url) for url in urls
+            ]
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def start(self):
+        await self.refresh()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.source.close()
+
+    def endpoints(self, service: str) -> list:
+        endpoints = self._endpoints.get(service)
+        if endpoints:
+            return endpoints
+        if service not in self._fallbacks:
+            self._fallbacks[service] = Endpoint(get_service_config(service)["url"])
+        return [self._fallbacks[service]]
+
+    def pick(self, service: str) -> Endpoint:
+        """
+        Choisit une instance : "p2c" (meilleure de deux instances tirées au hasard)
+        ou "least_outstanding" (celle qui a le moins de requêtes en cours).
+        """
+        endpoints = self.endpoints(service)
+        if len(endpoints) == 1:
+            return endpoints[0]
+        if get_service_config(service)["balancer"] == "least_outstanding":
+            lowest = min(endpoint.in_flight for endpoint in endpoints)
+            return random.choice([e for e in endpoints if e.in_flight == lowest])
+        first, second = random.sample(endpoints, 2)
+        return first if first.in_flight <= second.in_flight else second
+
+    def snapshot(self) -> dict:
+        return {
+            service: [
+                {"url": endpoint.url, "in_flight": endpoint.in_flight}
+                for endpoint in self.endpoints(service)
+            ]
+            for service in SERVICES
+        }
+
+
+service_registry = ServiceRegistry()
@@ -0,0 +1,282 @@
+import os
+import re
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from app.gateway.services import SERVICES
+
+# Désactivé (METRICS_ENABLED=0), aucun middleware ni trace httpx n'est installé
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# Gabarits de routes : bornent le nombre de séries (pas d'identifiants dans les labels).
+# Un gabarit None garde le chemin tel quel (routes sans paramètre) ; sans
+# correspondance, le gabarit est le premier segment suivi de "/*".
+ROUTE_TEMPLATES = [
+    ("products", re.compile(r"^produits/?$"), "produits"),
+    ("products", re.compile(r"^produits/categories/liste/?$"), "produits/categories/liste"),
+    ("products", re.compile(r"^produits/categorie/[^/]+/?$"), "produits/categorie/{categorie}"),
+    ("products", re.compile(r"^produits/[^/]+/promo/?$"), "produits/{id}/promo"),
+    ("products", re.compile(r"^produits/[^/]+/?$"), "produits/{id}"),
+    ("products", re.compile(r"^upload/?$"), "upload"),
+    ("products", re.compile(r"^static/uploads/.+$"), "static/uploads/{fichier}"),
+    ("orders", re.compile(r"^commande/?$"), "commande"),
+    ("orders", re.compile(r"^commande/admin/?$"), "commande/admin"),
+    ("orders", re.compile(r"^commande/get/[^/]+/?$"), "commande/get/{id}"),
+    ("orders", re.compile(r"^commande/utilisateur/[^/]+/?$"), "commande/utilisateur/{id}"),
+    ("orders", re.compile(r"^commande/[^/]+/statut/?$"), "commande/{id}/statut"),
+    ("payments", re.compile(r"^paiements/?$"), "paiements"),
+    ("payments", re.compile(r"^paiements/utilisateur/[^/]+/?$"), "paiements/utilisateur/{id}"),
+    ("payments", re.compile(r"^paiements/commande/[^/]+/?$"), "paiements/commande/{id}"),
+    ("payments", re.compile(r"^paiements/[^/]+/?$"), "paiements/{id}"),
+    ("users", re.compile(r"^(register|login|login_admin|db-health)/?$"), None),
+    ("users", re.compile(r"^me/[^/]+/?$"), "me/{id}"),
+    ("users", re.compile(r"^admin/users/?$"), "admin/users"),
+    ("users", re.compile(r"^admin/user/[^/]+/?$"), "admin/user/{id}"),
+    ("aggregate", re.compile(r"^commandes/[^/]+/?$"), "commandes/{id}"),
+]
+
+
+def route_template(service: str, path: str) -> str:
+    path = path.strip("/")
+    for rule_service, pattern, template in ROUTE_TEMPLATES:
+        if rule_service == service and pattern.match(path):
+            return template or path
+    first, _, rest = path.partition("/")
+    return f"{first}/*" if rest else first
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, kind: str = "counter"):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {kind}"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(Counter):
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple, value: float):
+        self._values[labels] = value
+
+    def render(self, kind: str = "gauge"):
+        return super().render(kind)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # [compteurs par bucket (+Inf compris), somme]
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            suffix = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+REQUESTS = Counter("gateway_requests_total", "Requêtes traitées par la gateway.",
+                   ("service", "route", "method", "status"))
+REQUEST_DURATION = Histogram("gateway_request_duration_seconds",
+                             "Durée totale des requêtes vues par la gateway.", ("service", "route"))
+GATEWAY_OVERHEAD = Histogram("gateway_overhead_seconds",
+                             "Temps passé dans la gateway hors appels amont.", ("service", "route"))
+RESPONSE_SIZE = Histogram("gateway_response_size_bytes", "Taille des corps de réponse.",
+                          ("service", "route"), SIZE_BUCKETS)
+IN_FLIGHT = Gauge("gateway_requests_in_flight", "Requêtes en cours de traitement.", ("service",))
+UPSTREAM_CONNECT = Histogram("gateway_upstream_connect_seconds",
+                             "Établissement des nouvelles connexions TCP amont.", ("service",))
+UPSTREAM_TTFB = Histogram("gateway_upstream_ttfb_seconds",
+                          "Délai jusqu'aux en-têtes de la réponse amont (attente du pool comprise).",
+                          ("service",))
+UPSTREAM_TOTAL = Histogram("gateway_upstream_total_seconds",
+                           "Durée complète d'un appel amont, corps de réponse compris.", ("service",))
+
+# Début du premier et fin du dernier appel amont de la requête en cours
+_upstream_window = ContextVar("upstream_window", default=None)
+
+
+class UpstreamTimer:
+    """Mesure un appel amont à partir des évènements de trace httpx/httpcore."""
+
+    __slots__ = ("service", "start", "connect_start", "window")
+
+    def __init__(self, service: str):
+        self.service = service
+        self.start = perf_counter()
+        self.connect_start = None
+        self.window = _upstream_window.get()
+        if self.window is not None and self.window[0] is None:
+            self.window[0] = self.start
+
+    async def __call__(self, event: str, info: dict):
+        now = perf_counter()
+        if event == "connection.connect_tcp.started":
+            self.connect_start = now
+        elif event == "connection.connect_tcp.complete" and self.connect_start is not None:
+            UPSTREAM_CONNECT.observe((self.service,), now - self.connect_start)
+        elif event.endswith("receive_response_headers.complete"):
+            UPSTREAM_TTFB.observe((self.service,), now - self.start)
+        elif event.endswith("response_closed.complete"):
+            UPSTREAM_TOTAL.observe((self.service,), now - self.start)
+            if self.window is not None:
+                self.window[1] = now
+
+
+def upstream_extensions(service: str):
+    """Extensions httpx à passer à un appel amont (None si les métriques sont désactivées)."""
+    if not METRICS_ENABLED:
+        return None
+    return {"trace": UpstreamTimer(service)}
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : compte et chronomètre les requêtes /api/."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        service, _, path = scope["path"][len("/api/"):].partition("/")
+        service = service.lower()
+        if service not in SERVICES and service != "aggregate":
+            service, path = "inconnu", ""
+        labels = (service, route_template(service, path))
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        window = [None, None]
+        token = _upstream_window.set(window)
+        IN_FLIGHT.inc((service,))
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = perf_counter() - start
+            IN_FLIGHT.dec((service,))
+            _upstream_window.reset(token)
+            REQUESTS.inc((*labels, scope["method"], str(status)))
+            REQUEST_DURATION.observe(labels, duration)
+            RESPONSE_SIZE.observe(labels, size)
+            upstream = window[1] - window[0] if window[1] is not None else 0.0
+            GATEWAY_OVERHEAD.observe(labels, max(0.0, duration - upstream))
+
+
+def _gauge_lines(name: str, documentation: str, labelnames: tuple, samples, kind: str = "gauge"):
+    gauge = Gauge(name, documentation, labelnames)
+    for labels, value in samples:
+        gauge.set(labels, value)
+    return gauge.render(kind)
+
+
+def render_metrics(registry, admission, cache, coalescing, resilience) -> str:
+    """Format texte Prometheus ; les états internes sont lus au moment du scrape."""
+    lines = []
+    for metric in (REQUESTS, REQUEST_DURATION, GATEWAY_OVERHEAD, RESPONSE_SIZE, IN_FLIGHT,
+                   UPSTREAM_CONNECT, UPSTREAM_TTFB, UPSTREAM_TOTAL):
+        lines.extend(metric.render())
+
+    instances = registry.snapshot()
+    lines.extend(_gauge_lines(
+        "gateway_upstream_in_flight", "Requêtes en cours par instance amont.", ("service", "endpoint"),
+        (((service, e["url"]), e["in_flight"]) for service, items in instances.items() for e in items),
+    ))
+
+    states = resilience.snapshot()
+    breaker_values = {"closed": 0, "half_open": 1, "open": 2}
+    lines.extend(_gauge_lines(
+        "gateway_circuit_state", "État du disjoncteur (0 fermé, 1 semi-ouvert, 2 ouvert).", ("service",),
+        (((service,), breaker_values[s["breaker"]["state"]]) for service, s in states.items()),
+    ))
+    for stat in ("retries", "hedges", "rejected"):
+        lines.extend(_gauge_lines(
+            f"gateway_upstream_{stat}_total", f"Compteur '{stat}' de la couche de résilience.", ("service",),
+            (((service,), s[stat]) for service, s in states.items()), kind="counter",
+        ))
+
+    upstreams = admission.snapshot()["upstreams"]
+    for stat in ("active", "waiting"):
+        lines.extend(_gauge_lines(
+            f"gateway_admission_{stat}", f"Requêtes '{stat}' du plafond de concurrence.", ("service",),
+            (((service,), s[stat]) for service, s in upstreams.items()),
+        ))
+    lines.extend(_gauge_lines(
+        "gateway_admission_shed_total", "Requêtes rejetées en 503 par le contrôle d'admission.",
+        ("service", "reason"),
+        (((service, reason), s[f"shed_{reason}"]) for service, s in upstreams.items()
+         for reason in ("queue_full", "timeout")),
+        kind="counter",
+    ))
+    lines.extend(_gauge_lines(
+        "gateway_rate_limited_total", "Requêtes rejetées en 429.", (),
+        [((), admission.rate_limited)], kind="counter",
+    ))
+
+    cache_stats = cache.snapshot()
+    for stat in ("hits", "misses", "not_modified", "evictions", "invalidations"):
+        lines.extend(_gauge_lines(
+            f"gateway_cache_{stat}_total", f"Compteur '{stat}' du cache de réponses.", (),
+            [((), cache_stats[stat])], kind="counter",
+        ))
+    lines.extend(_gauge_lines("gateway_cache_bytes", "Octets en cache.", (), [((), cache_stats["bytes"])]))
+
+    flights = coalescing.snapshot()
+    lines.extend(_gauge_lines(
+        "gateway_coalesced_requests_total", "Requêtes servies par un appel amont déjà en cours.", (),
+        [((), flights["collapsed"])], kind="counter",
+    ))
+    return "\n".join(lines) + "\n"
@@ -1,34 +1,196 @@
 from fastapi import HTTPException, Request
-from httpx import AsyncClient, ConnectError, TimeoutException
-from fastapi.responses import Response
+from httpx import AsyncClient, ConnectError, Headers, TimeoutException
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 
+# En-têtes propres à une connexion (RFC 7230 §6.1) : jamais retransmis
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+}
+
+# En-têtes du client transmis aux services
+FORWARDED_HEADERS = ("authorization", "content-type", "accept")
+
+# En dessous de cette taille, le corps de la requête est lu d'un bloc
+# (il peut alors être rejoué sur une redirection) ; au-delà il est streamé.
+STREAM_BODY_THRESHOLD = 64 * 1024
 
-async def forward_request(service_url: str, path: str, request: Request):
-    url = f"{service_url}{path}"
 
-    headers = {
+def filter_request_headers(request: Request) -> dict:
+    return {
         key: value for key, value in request.headers.items()
-        if key.lower() in ("authorization", "content-type", "accept")
+        if key.lower() in FORWARDED_HEADERS
     }
 
+
+def filter_response_headers(headers: Headers, decoded: bool = False) -> dict:
+    """
+    Retire les en-têtes hop-by-hop (et ceux cités dans "Connection").
+    Si le corps a été décodé par httpx, Content-Encoding et Content-Length
+    ne correspondent plus et sont aussi retirés.
+    """
+    excluded = set(HOP_BY_HOP_HEADERS)
+    excluded.update(
+        token.strip().lower()
+        for token in headers.get("connection", "").split(",") if token.strip()
+    )
+    if decoded:
+        excluded.update(("content-encoding", "content-length"))
+    return {key: value for key, value in headers.items() if key.lower() not in excluded}
+
+
+async def forward_request(client: AsyncClient, service_url: str, path: str, request: Request,
+                          extensions: dict = None):
+    url = f"{service_url}{path}"
+
+    headers = filter_request_headers(request)
+
     try:
-        async with AsyncClient(follow_redirects=True) as client:  # ⬅️ follow_redirects ajouté
-            response = await client.request(
-                method=request.method,
-                url=url,
-                content=await request.body(),
-                params=request.query_params,
-                headers=headers
-            )
+        # Le client provient du pool partagé (keep-alive, redirections suivies)
+        response = await client.request(
+            method=request.method,
+            url=url,
+            content=await request.body(),
+            params=request.query_params,
+            headers=headers,
+            extensions=extensions
+        )
 
         return Response(
             content=response.content,
             status_code=response.status_code,
-            headers=dict(response.headers)
+            headers=filter_response_headers(response.headers, decoded=True)
+        )
+
+    except (ConnectError, TimeoutException) as e:
+        raise HTTPException(status_code=503, detail=f"Service indisponible : {str(e)}")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
+
+
+def is_replayable(request: Request, stream: bool) -> bool:
+    """Vrai si le corps de la requête est lu d'un bloc et peut donc être renvoyé."""
+    if not stream:
+        return True
+    if "chunked" in request.headers.get("transfer-encoding", "").lower():
+        return False
+    length = request.headers.get("content-length")
+    if length is None:
+        return True
+    # Longueur invalide : le corps est streamé tel quel, jamais rejoué
+    return length.isdecimal() and int(length) <= STREAM_BODY_THRESHOLD
+
+
+async def _request_content(request: Request):
+    """Corps à envoyer en amont : None, bytes, ou flux asynchrone si volumineux."""
+    length = request.headers.get("content-length")
+    chunked = "chunked" in request.headers.get("transfer-encoding", "").lower()
+    if length is None and not chunked:
+        return None
+    if is_replayable(request, stream=True):
+        return await request.body()
+    return request.stream()
+
+
+async def _iter_upstream(response):
+    # Octets bruts (non décompressés) : Content-Length et Content-Encoding restent valides
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+
+
+async def stream_request(client: AsyncClient, service_url: str, path: str, request: Request,
+                         extensions: dict = None):
+    """
+    Variante streamée de forward_request : les corps de requête et de réponse
+    sont relayés morceau par morceau. httpx ne lit le flux entrant qu'au rythme
+    où il écrit vers le service et Starlette attend chaque envoi au client,
+    la mémoire utilisée reste donc bornée quelle que soit la taille du corps.
+    """
+    url = f"{service_url}{path}"
+
+    headers = filter_request_headers(request)
+    content = await _request_content(request)
+    length = request.headers.get("content-length", "")
+    if length.isdecimal() and not isinstance(content, bytes):
+        headers["content-length"] = length
+
+    try:
+        upstream_request = client.build_request(
+            method=request.method,
+            url=url,
+            content=content,
+            params=request.query_params,
+            headers=headers,
+            extensions=extensions
         )
+        response = await client.send(upstream_request, stream=True)
 
     except (ConnectError, TimeoutException) as e:
         raise HTTPException(status_code=503, detail=f"Service indisponible : {str(e)}")
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
+
+    return stream_response(response)
+
+
+def stream_response(response, headers: dict = None) -> StreamingResponse:
+    """Relaie une réponse httpx ouverte en mode stream vers le client."""
+    response_headers = filter_response_headers(response.headers)
+    if headers:
+        response_headers.update(headers)
+    return StreamingResponse(
+        _iter_upstream(response),
+        status_code=response.status_code,
+        headers=response_headers,
+        background=BackgroundTask(response.aclose)
+    )
+
+
+def release_when_sent(response: StreamingResponse, release):
+    """
+    Appelle `release` (une seule fois) quand le corps streamé a été relayé,
+    abandonné (client parti) ou écarté sans être envoyé : fin du générateur
+    ou tâche de fond, au premier des deux. Les ressources prises pour l'appel
+    (place de concurrence, requête en cours sur l'instance) restent ainsi
+    comptées pendant tout le transfert, pas seulement jusqu'aux en-têtes.
+    """
+    released = False
+
+    def once():
+        nonlocal released
+        if not released:
+            released = True
+            release()
+
+    body = response.body_iterator
+
+    async def iterate():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            once()
+
+    previous = response.background
+
+    async def background():
+        try:
+            if previous is not None:
+                await previous()
+        finally:
+            once()
+
+    response.body_iterator = iterate()
+    response.background = BackgroundTask(background)
+
+
+async def close_response(response: Response):
+    """Libère la connexion amont d'une réponse streamée qui ne sera pas envoyée."""
+    if isinstance(response, StreamingResponse) and response.background is not None:
+        await response.background()
@@ -0,0 +1,259 @@
+import asyncio
+import time
+from collections import deque
+
+from fastapi import HTTPException, Request
+
+from app.gateway.proxy import close_response, is_replayable
+from app.gateway.services import SERVICES, get_service_config
+
+# Méthodes qu'on peut renvoyer sans risque de double effet
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Réponses amont qui justifient une nouvelle tentative
+RETRYABLE_STATUSES = {502, 503, 504}
+
+# Nombre minimal de mesures avant d'utiliser un percentile pour le hedging
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : après `failure_threshold` échecs consécutifs, le circuit
+    s'ouvre et les requêtes échouent immédiatement pendant `reset_timeout`
+    secondes. Il passe ensuite en semi-ouvert : quelques requêtes de test
+    passent, une réussite le referme, un échec le rouvre.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 half_open_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.opened_at = time.monotonic()
+            self._probes = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                # Une sonde sans verdict (requête annulée) ne bloque pas indéfiniment
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.opened_at = time.monotonic()
+                self._probes = 0
+            self._probes += 1
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Budget de nouvelles tentatives : chaque requête crédite `ratio` jeton,
+    chaque retry (ou requête de hedging) en consomme un. Un plancher de
+    `min_per_second` jetons par seconde garde quelques retries possibles à
+    faible trafic. Les retries ne peuvent donc pas multiplier la charge
+    d'un service déjà en difficulté.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated = time.monotonic()
+
+    def _refill(self, amount: float):
+        self.tokens = min(self.max_tokens, self.tokens + amount)
+
+    def record_request(self):
+        self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._refill((now - self._updated) * self.min_per_second)
+        self._updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LatencyTracker:
+    """Latences récentes (fenêtre glissante) et leurs percentiles, en secondes."""
+
+    def __init__(self, size: int = 512):
+        self._samples = deque(maxlen=size)
+        self._sorted = None
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, p: float):
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = min(len(self._sorted) - 1, int(len(self._sorted) * p / 100))
+        return self._sorted[index]
+
+
+class ServiceResilience:
+    def __init__(self, config: dict):
+        self.config = config
+        self.breaker = CircuitBreaker(
+            failure_threshold=config["breaker_failure_threshold"],
+            reset_timeout=config["breaker_reset_timeout"],
+            half_open_calls=config["breaker_half_open_calls"],
+        )
+        self.budget = RetryBudget(
+            ratio=config["retry_budget_ratio"],
+            min_per_second=config["retry_min_per_second"],
+        )
+        self.latency = LatencyTracker()
+        self.stats = {"retries": 0, "hedges": 0, "rejected": 0}
+
+    def hedge_delay(self):
+        percentile = self.config["hedge_percentile"]
+        if not percentile or len(self.latency) < MIN_LATENCY_SAMPLES:
+            return None
+        return self.latency.percentile(percentile)
+
+
+class Resilience:
+    """Disjoncteur, budget de retries et hedging, un jeu par service amont."""
+
+    def __init__(self):
+        self._services = {}
+
+    def get(self, service: str) -> ServiceResilience:
+        state = self._services.get(service)
+        if state is None:
+            state = self._services[service] = ServiceResilience(get_service_config(service))
+        return state
+
+    async def call(self, service: str, request: Request, attempt, stream: bool):
+        """
+        Exécute `attempt(stream)` (un appel vers une instance du service) sous
+        la protection du disjoncteur, avec retries bornés pour les méthodes
+        idempotentes et hedging optionnel des GET.
+        """
+        state = self.get(service)
+        if not state.breaker.allow():
+            state.stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail=f"Service indisponible : circuit ouvert pour '{service}'")
+        state.budget.record_request()
+
+        delay = state.hedge_delay() if request.method == "GET" else None
+        if delay is not None:
+            # Le hedging suppose des réponses lues d'un bloc (voir _hedged)
+            stream = False
+        retryable = request.method in IDEMPOTENT_METHODS and is_replayable(request, stream)
+
+        retries = 0
+        while True:
+            start = time.monotonic()
+            try:
+                if delay is not None:
+                    response = await self._hedged(state, attempt, delay)
+                else:
+                    response = await attempt(stream)
+            except HTTPException as e:
+                state.breaker.record_failure()
+                # 503 : connexion refusée ou délai dépassé, on peut retenter
+                if (e.status_code == 503 and retryable
+                        and retries < state.config["max_retries"] and self._may_retry(state)):
+                    retries += 1
+                    continue
+                raise
+
+            state.latency.record(time.monotonic() - start)
+            if response.status_code < 500:
+                state.breaker.record_success()
+                return response
+            state.breaker.record_failure()
+            if (response.status_code in RETRYABLE_STATUSES and retryable
+                    and retries < state.config["max_retries"] and self._may_retry(state)):
+                await close_response(response)
+                retries += 1
+                continue
+            return response
+
+    @staticmethod
+    def _may_retry(state: ServiceResilience) -> bool:
+        if state.breaker.allow() and state.budget.try_spend():
+            state.stats["retries"] += 1
+            return True
+        return False
+
+    @staticmethod
+    async def _hedged(state: ServiceResilience, attempt, delay: float):
+        """
+        Lance une seconde requête si la première n'a pas répondu après `delay`
+        (un percentile de latence) et garde la première réponse valide.
+        Les réponses sont lues d'un bloc : la requête perdante est simplement
+        annulée sans flux à refermer.
+        """
+        primary = asyncio.create_task(attempt(False))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not state.budget.try_spend():
+            return await primary
+
+        state.stats["hedges"] += 1
+        pending = {primary, asyncio.create_task(attempt(False))}
+        last = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last = task
+                    if task.exception() is None and task.result().status_code < 500:
+                        return task.result()
+            return last.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> dict:
+        result = {}
+        for service in SERVICES:
+            state = self.get(service)
+            result[service] = {
+                "breaker": {"state": state.breaker.state, "failures": state.breaker.failures},
+                "latency_ms": {
+                    name: round(value * 1000, 2) if value is not None else None
+                    for name, value in (
+                        ("p50", state.latency.percentile(50)),
+                        ("p95", state.latency.percentile(95)),
+                        ("p99", state.latency.percentile(99)),
+                    )
+                },
+                "retry_tokens": round(state.budget.tokens, 2),
+                **state.stats,
+            }
+        return result
+
+
+resilience = Resilience()
@@ -1,7 +1,66 @@
 # Configuration des services
+#
+# Chaque service déclare son URL et peut surcharger les réglages de son pool
+# de connexions. Les clés absentes prennent la valeur de DEFAULT_CLIENT_CONFIG.
+# "url" (ou une liste "urls" de répliques) sert de source statique et de repli
+# quand la découverte (voir discovery.py) ne retourne aucune instance ;
+# "consul_name" est le nom du service dans le catalogue Consul.
+DEFAULT_CLIENT_CONFIG = {
+    "max_connections": 100,            # connexions simultanées max vers le service
+    "max_keepalive_connections": 20,   # connexions gardées ouvertes au repos
+    "keepalive_expiry": 30.0,          # secondes avant fermeture d'une connexion inactive
+    "connect_timeout": 3.0,
+    "read_timeout": 30.0,
+    "write_timeout": 30.0,
+    "pool_timeout": 5.0,               # attente max d'une connexion libre dans le pool
+    "http2": False,                    # nécessite le paquet optionnel "h2"
+    "streaming": True,                 # relaie les corps par morceaux (voir stream_request)
+    "balancer": "p2c",                 # "p2c" ou "least_outstanding" entre les répliques
+    "coalesce": False,                 # regroupe les GET identiques simultanés (single-flight)
+    # Admission (voir admission.py)
+    "max_concurrency": 32,             # requêtes simultanées max vers le service
+    "max_queue": 64,                   # requêtes en attente au-delà : rejet 503
+    "queue_timeout": 1.0,              # attente max en file avant rejet 503
+    # Résilience (voir resilience.py)
+    "breaker_failure_threshold": 5,    # échecs consécutifs avant ouverture du circuit
+    "breaker_reset_timeout": 10.0,     # secondes avant une requête de test (semi-ouvert)
+    "breaker_half_open_calls": 1,
+    "max_retries": 2,                  # méthodes idempotentes uniquement
+    "retry_budget_ratio": 0.2,         # au plus ~20 % de requêtes en plus dues aux retries
+    "retry_min_per_second": 1.0,
+    "hedge_percentile": None,          # ex. 95 : double un GET plus lent que le p95
+}
+
 SERVICES = {
-    "users": "http://localhost:8001",
-    "products": "http://localhost:8002",
-    "orders": "http://localhost:8003",
-    "payments": "http://localhost:8004"
-}
\ No newline at end of file
+    "users": {
+        "consul_name": "user-service",
+        "url": "http://localhost:8001",
+    },
+    "products": {
+        "consul_name": "product-service",
+        "url": "http://localhost:8002",
+        "max_connections": 200,
+        "max_keepalive_connections": 50,
+        "hedge_percentile": 95,
+        "coalesce": True,
+        "max_concurrency": 64,
+        "max_queue": 256,
+    },
+    "orders": {
+        "consul_name": "order-service",
+        "url": "http://localhost:8003",
+    },
+    "payments": {
+        "consul_name": "payment-service",
+        "url": "http://localhost:8004",
+        "read_timeout": 15.0,
+    },
+}
+
+
+def get_service_config(name: str):
+    """Retourne la configuration complète d'un service, ou None s'il est inconnu."""
+    service = SERVICES.get(name)
+    if service is None:
+        return None
+    return {**DEFAULT_CLIENT_CONFIG, **service}
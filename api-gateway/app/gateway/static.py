@@ -0,0 +1,87 @@
+import os
+import re
+
+from fastapi import HTTPException, Request
+from httpx import AsyncClient, ConnectError, TimeoutException
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.gateway.proxy import stream_response
+
+# Les noms produits par save_upload_file sont uniques (empreinte du contenu) :
+# un fichier ne change jamais sous le même nom, il peut donc être mis en cache indéfiniment.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Répertoire des uploads partagé avec product_service (volume Docker).
+# S'il n'est pas défini, les images sont relayées depuis le service.
+UPLOADS_DIR = os.getenv("STATIC_UPLOADS_DIR")
+
+# Noms servis : jamais de fichier caché (fichiers temporaires et copies mises
+# de côté par le GC du service produits : .<nom>.tmp, .<nom>.gc) ni de suffixe réservé
+SAFE_FILENAME = re.compile(r"^(?!\.)[\w.-]+$")
+RESERVED_SUFFIXES = (".tmp", ".gc")
+
+# En-têtes transmis au service pour qu'il gère Range et les GET conditionnels
+CONDITIONAL_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+
+
+# Noms dérivés du contenu (<sha256>.<ext>, <sha256>_<taille>.<ext>) : le nom
+# sert d'ETag fort, identique à celui du service produits
+HASHED_FILENAME = re.compile(r"^[0-9a-f]{64}(_\w+)?\.\w+$")
+
+
+def is_public_upload(filename: str) -> bool:
+    return bool(SAFE_FILENAME.match(filename)) and not filename.endswith(RESERVED_SUFFIXES)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles gère déjà Range (206), If-Range et les réponses 304 ;
+    on y ajoute l'en-tête de cache longue durée et l'ETag des noms dérivés du contenu.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        filename = os.path.basename(full_path)
+        if HASHED_FILENAME.match(filename):
+            response.headers["ETag"] = f'"{filename}"'
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+local_uploads = ImmutableStaticFiles(directory=UPLOADS_DIR, check_dir=False) if UPLOADS_DIR else None
+
+
+async def serve_upload(client: AsyncClient, service_url: str, filename: str, request: Request):
+    """Sert une image uploadée, depuis le disque si possible, sinon en streaming."""
+    if not is_public_upload(filename):
+        raise HTTPException(status_code=404, detail="Fichier non trouvé")
+
+    if local_uploads is not None:
+        try:
+            return await local_uploads.get_response(filename, request.scope)
+        except StarletteHTTPException as e:
+            if e.status_code != 404:
+                raise
+            # Pas encore visible sur le volume partagé : on interroge le service
+
+    headers = {
+        name: request.headers[name] for name in CONDITIONAL_HEADERS if name in request.headers
+    }
+    try:
+        upstream_request = client.build_request(
+            "GET", f"{service_url}/static/uploads/{filename}", headers=headers
+        )
+        response = await client.send(upstream_request, stream=True)
+    except (ConnectError, TimeoutException) as e:
+        raise HTTPException(status_code=503, detail=f"Service indisponible : {str(e)}")
+
+    if response.status_code not in (200, 206, 304, 416):
+        await response.aclose()
+        raise HTTPException(status_code=response.status_code, detail="Fichier non trouvé")
+
+    return stream_response(response, {"Cache-Control": IMMUTABLE_CACHE_CONTROL})
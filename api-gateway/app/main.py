@@ -1,13 +1,36 @@
-from fastapi import FastAPI, Request, HTTPException, Response
+from contextlib import ExitStack, asynccontextmanager
+
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.gateway.proxy import forward_request
-from app.gateway.services import SERVICES
-import httpx
+from app.gateway.admission import admission
+from app.gateway.aggregation import router as aggregation_router
+from app.gateway.cache import request_key, response_cache
+from app.gateway.clients import upstream_clients
+from app.gateway.coalescing import single_flight
+from app.gateway.discovery import service_registry
+from app.gateway.metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics, upstream_extensions
+from app.gateway.proxy import forward_request, release_when_sent, stream_request
+from app.gateway.resilience import resilience
+from app.gateway.services import get_service_config
+from app.gateway.static import serve_upload
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ouverture des pools de connexions et découverte des services au démarrage
+    await upstream_clients.start()
+    await service_registry.start()
+    yield
+    await service_registry.close()
+    await upstream_clients.close()
+
 
 app = FastAPI(
     title="API Gateway",
     description="Point d'entrée unique pour toutes les requêtes des microservices.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Middleware CORS
@@ -17,35 +40,153 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Jeton de pagination des listes de produits, lisible par le front
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Instrumentation (compteurs et histogrammes exposés sur /metrics)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+async def call_upstream(service: str, path: str, request: Request, stream: bool):
+    """
+    Envoie la requête à une instance du service choisie par le répartiteur,
+    sous la protection du disjoncteur (retries et hedging compris).
+    Une réponse streamée garde sa place de concurrence et son compteur de
+    requêtes en cours jusqu'à la fin du transfert du corps.
+    """
+    client = upstream_clients.get(service)
+
+    async def attempt(stream: bool):
+        endpoint = service_registry.pick(service)
+        with ExitStack() as tracking:
+            tracking.enter_context(endpoint.track())
+            extensions = upstream_extensions(service)
+            if not stream:
+                return await forward_request(client, endpoint.url, f"/{path}", request, extensions)
+            response = await stream_request(client, endpoint.url, f"/{path}", request, extensions)
+            release_when_sent(response, tracking.pop_all().close)
+            return response
+
+    # Plafond de concurrence par service : file bornée, rejet rapide en 503
+    limiter = admission.limiter(service)
+    await limiter.acquire()
+    try:
+        response = await resilience.call(service, request, attempt, stream)
+    except BaseException:
+        limiter.release()
+        raise
+    if isinstance(response, StreamingResponse):
+        release_when_sent(response, limiter.release)
+    else:
+        limiter.release()
+    return response
+
+
+# Routes d'agrégation (déclarées avant la route générique /api/{service}/...)
+app.include_router(aggregation_router)
+
+
 # Nouvelle route avec prefix /api
 @app.api_route("/api/{service}/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def gateway(service: str, path: str, request: Request):
     """
     Route protégée sous /api/
     """
-    service_url = SERVICES.get(service.lower())
-    if not service_url:
+    service = service.lower()
+    config = get_service_config(service)
+    if not config:
         raise HTTPException(status_code=404, detail=f"Service '{service}' introuvable.")
+
+    # Limites de débit par client et par route (429)
+    admission.check_rate(service, path, request)
     
     # Gestion spéciale pour les fichiers statiques
     if "static/uploads" in path:
         # Extraire le nom du fichier du chemin
         filename = path.split("static/uploads/")[-1]
-        static_path = f"static/uploads/{filename}"
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(f"{service_url}/{static_path}")
-                if response.status_code == 200:
-                    return Response(
-                        content=response.content,
-                        media_type=response.headers.get("content-type", "application/octet-stream")
-                    )
-                else:
-                    raise HTTPException(status_code=response.status_code, detail="Fichier non trouvé")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=str(e))
-    
-    return await forward_request(service_url, f"/{path}", request)
\ No newline at end of file
+        endpoint = service_registry.pick(service)
+        return await serve_upload(upstream_clients.get(service), endpoint.url, filename, request)
+
+    if request.method == "GET":
+        ttl = response_cache.ttl_for(service, path)
+
+        # Lectures cachables : servies depuis le cache de la gateway ; les
+        # requêtes identiques simultanées partagent un seul appel amont
+        if ttl:
+            key = request_key(service, path, request)
+            entry = response_cache.get(key)
+            if entry is not None:
+                return response_cache.respond(entry, request, "HIT")
+
+            async def fetch():
+                generation = response_cache.generation(service)
+                response = await call_upstream(service, path, request, stream=False)
+                # Écriture survenue pendant l'appel : réponse peut-être antérieure, non cachée
+                if response_cache.generation(service) != generation:
+                    return response, None
+                return response, response_cache.store(key, response, ttl)
+
+            response, entry = await single_flight.do(key, fetch)
+            return response_cache.respond(entry, request, "MISS") if entry else response
+
+        if config["coalesce"]:
+            key = request_key(service, path, request)
+            return await single_flight.do(
+                key, lambda: call_upstream(service, path, request, stream=False)
+            )
+
+    response = await call_upstream(service, path, request, stream=config["streaming"])
+
+    # Une écriture invalide les réponses cachées qu'elle peut avoir modifiées
+    if request.method != "GET":
+        response_cache.invalidate(service, request.method, path)
+        # Les lectures suivantes ne rejoignent pas un appel lancé avant l'écriture
+        single_flight.forget(lambda key: key[0] == service)
+    return response
+
+
+@app.get("/gateway/cache")
+async def cache_stats():
+    """Compteurs du cache de réponses (hits, misses, évictions...)."""
+    return response_cache.snapshot()
+
+
+
+@app.get("/gateway/coalescing")
+async def coalescing_stats():
+    """Appels amont lancés (leaders) et requêtes regroupées sur un appel en cours."""
+    return single_flight.snapshot()
+
+
+@app.get("/gateway/admission")
+async def admission_stats():
+    """Requêtes limitées (429) et occupation des files par service (503)."""
+    return admission.snapshot()
+
+
+@app.get("/gateway/upstreams")
+async def upstreams():
+    """Instances, état des disjoncteurs et percentiles de latence par service."""
+    instances = service_registry.snapshot()
+    states = resilience.snapshot()
+    return {
+        service: {"instances": instances[service], **states[service]}
+        for service in instances
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métriques de la gateway au format texte Prometheus."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métriques désactivées")
+    return PlainTextResponse(
+        render_metrics(service_registry, admission, response_cache, single_flight, resilience),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
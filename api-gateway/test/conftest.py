@@ -0,0 +1,62 @@
+# test/conftest.py
+
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.gateway.admission import admission
+from app.gateway.cache import response_cache
+from app.gateway.clients import upstream_clients
+from app.gateway.coalescing import single_flight
+from app.gateway.resilience import resilience
+from app.main import app
+
+
+def json_response(data, status_code: int = 200) -> httpx.Response:
+    return httpx.Response(
+        status_code,
+        stream=httpx.ByteStream(json.dumps(data).encode()),
+        headers={"content-type": "application/json"},
+    )
+
+
+class FakeUpstream:
+    """
+    Faux services amont (tous les services) : `handler` (async) produit les
+    réponses, `calls` enregistre les requêtes reçues (méthode, chemin).
+    """
+
+    def __init__(self):
+        self.calls = []
+
+        async def echo(request: httpx.Request):
+            return json_response({"path": request.url.path})
+        self.handler = echo
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append((request.method, request.url.path))
+        return await self.handler(request)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def upstream(client: TestClient):
+    fake = FakeUpstream()
+    for name in list(upstream_clients._clients):
+        upstream_clients._clients[name] = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+
+    # État partagé de la gateway remis à zéro pour chaque test
+    response_cache.clear()
+    response_cache._generations.clear()
+    resilience._services.clear()
+    admission._clients.clear()
+    admission._routes.clear()
+    single_flight._calls.clear()
+    return fake
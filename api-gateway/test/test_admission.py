@@ -0,0 +1,53 @@
+# test/test_admission.py
+
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.gateway.admission import admission
+from app.gateway.discovery import service_registry
+
+
+class CorpsLent(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        for _ in range(10):
+            await asyncio.sleep(0.05)
+            yield b"x" * 1000
+
+
+def en_cours(service: str):
+    return admission.limiter(service).active, sum(e.in_flight for e in service_registry.endpoints(service))
+
+
+def test_reponse_streamee_garde_sa_place(client: TestClient, upstream):
+    async def export(request):
+        return httpx.Response(200, stream=CorpsLent())
+    upstream.handler = export
+
+    resultat = {}
+    telechargement = threading.Thread(
+        target=lambda: resultat.setdefault("r", client.get("/api/orders/commande/admin/export"))
+    )
+    telechargement.start()
+    time.sleep(0.25)
+    # Corps en cours d'envoi : place de concurrence et requête en cours toujours comptées
+    assert en_cours("orders") == (1, 1)
+    telechargement.join()
+
+    assert len(resultat["r"].content) == 10 * 1000
+    assert en_cours("orders") == (0, 0)
+
+
+def test_limite_par_route(client: TestClient, upstream):
+    codes = [client.post("/api/users/login", json={}).status_code for _ in range(60)]
+
+    # Rafale de 40 acceptée ; au-delà le débit (20/s) est vite dépassé
+    assert codes[:40] == [200] * 40
+    assert 429 in codes[40:]
+    r = client.post("/api/users/login", json={})
+    assert int(r.headers["retry-after"]) >= 1
+    # Les autres routes du service ne sont pas limitées
+    assert client.get("/api/users/profil").status_code == 200
@@ -0,0 +1,83 @@
+# test/test_aggregation.py
+
+import httpx
+from fastapi.testclient import TestClient
+
+from conftest import json_response
+
+COMMANDE = {
+    "id": "c1",
+    "lignes": [{"produit_id": "p1", "quantite": 1}, {"produit_id": "p2", "quantite": 2}, {"produit_id": "p1", "quantite": 1}],
+}
+
+
+def services(paiements=None, produits=None, commande=None):
+    """Handler des trois services ; chaque réponse peut être remplacée."""
+    async def handler(request: httpx.Request):
+        path = request.url.path
+        if path.startswith("/commande/get/"):
+            return commande or json_response(COMMANDE)
+        if path.startswith("/paiements/commande/"):
+            return paiements or json_response([{"id": "pay1", "montant": 10.0}])
+        if path == "/produits/lot":
+            if produits is not None:
+                return produits
+            ids = request.url.params["ids"].split(",")
+            return json_response({"produits": {pid: {"id": pid} for pid in ids}, "manquants": []})
+        return json_response({"detail": "inconnu"}, status_code=404)
+    return handler
+
+
+def corps_invalide(contenu: bytes = b"<html>Bad gateway</html>") -> httpx.Response:
+    return httpx.Response(200, stream=httpx.ByteStream(contenu), headers={"content-type": "text/html"})
+
+
+def test_details_complets(client: TestClient, upstream):
+    upstream.handler = services()
+
+    data = client.get("/api/aggregate/commandes/c1").json()
+    assert data["partiel"] is False
+    assert data["commande"]["id"] == "c1"
+    assert data["paiements"][0]["id"] == "pay1"
+    assert set(data["produits"]) == {"p1", "p2"}
+    # Un seul appel groupé pour les produits, chacun une fois
+    lots = [path for method, path in upstream.calls if path == "/produits/lot"]
+    assert len(lots) == 1
+
+
+def test_paiements_non_json_reponse_partielle(client: TestClient, upstream):
+    upstream.handler = services(paiements=corps_invalide())
+
+    r = client.get("/api/aggregate/commandes/c1")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["partiel"] is True
+    assert data["paiements"] is None
+    assert data["erreurs"]["paiements"].startswith("502")
+    assert data["produits"]["p1"] == {"id": "p1"}
+
+
+def test_produits_tronques_reponse_partielle(client: TestClient, upstream):
+    upstream.handler = services(produits=corps_invalide(b'{"produits": {"p1": '))
+
+    data = client.get("/api/aggregate/commandes/c1").json()
+    assert data["partiel"] is True
+    assert set(data["erreurs"]["produits"]) == {"p1", "p2"}
+    assert data["paiements"][0]["id"] == "pay1"
+
+
+def test_commande_invalide_ou_absente(client: TestClient, upstream):
+    upstream.handler = services(commande=corps_invalide())
+    assert client.get("/api/aggregate/commandes/c1").status_code == 502
+
+    upstream.handler = services(commande=json_response({"detail": "introuvable"}, status_code=404))
+    assert client.get("/api/aggregate/commandes/c1").status_code == 404
+
+
+def test_limite_de_debit(client: TestClient, upstream):
+    upstream.handler = services()
+
+    codes = [client.get(f"/api/aggregate/commandes/c{i}").status_code for i in range(80)]
+    # Rafale de 60 acceptée, puis 30/s : la route finit par répondre 429
+    assert codes[:60] == [200] * 60
+    assert 429 in codes[60:]
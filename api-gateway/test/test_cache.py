@@ -0,0 +1,96 @@
+# test/test_cache.py
+
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from conftest import json_response
+
+
+def test_hit_apres_miss(client: TestClient, upstream):
+    r1 = client.get("/api/products/produits/abc")
+    r2 = client.get("/api/products/produits/abc")
+
+    assert r1.headers["x-cache"] == "MISS"
+    assert r2.headers["x-cache"] == "HIT"
+    assert r2.json() == r1.json()
+    assert len(upstream.calls) == 1
+
+
+def test_304_si_none_match(client: TestClient, upstream):
+    r1 = client.get("/api/products/produits/abc")
+    etag = r1.headers["etag"]
+
+    r2 = client.get("/api/products/produits/abc", headers={"if-none-match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    assert r2.headers["etag"] == etag
+
+    r3 = client.get("/api/products/produits/abc", headers={"if-none-match": '"autre"'})
+    assert r3.status_code == 200
+    assert r3.json() == r1.json()
+
+    r4 = client.get("/api/products/produits/abc", headers={"if-modified-since": r1.headers["last-modified"]})
+    assert r4.status_code == 304
+    assert len(upstream.calls) == 1
+
+
+def test_ecriture_invalide(client: TestClient, upstream):
+    prix = {"abc": 1, "xyz": 1}
+
+    async def handler(request):
+        produit_id = request.url.path.rstrip("/").split("/")[-1]
+        if request.method == "PUT":
+            prix[produit_id] = 2
+        return json_response({"id": produit_id, "prix": prix.get(produit_id)})
+    upstream.handler = handler
+
+    for path in ("produits/abc", "produits/xyz", "produits/"):
+        client.get(f"/api/products/{path}")
+    assert client.put("/api/products/produits/abc", json={}).status_code == 200
+
+    r = client.get("/api/products/produits/abc")
+    assert r.headers["x-cache"] == "MISS"
+    assert r.json()["prix"] == 2
+    # Liste invalidée, fiche d'un autre produit conservée
+    assert client.get("/api/products/produits/").headers["x-cache"] == "MISS"
+    assert client.get("/api/products/produits/xyz").headers["x-cache"] == "HIT"
+
+
+def test_lecture_concurrente_a_une_ecriture(client: TestClient, upstream):
+    etat = {"prix": 1}
+    lecture_lente = threading.Event()
+
+    async def handler(request):
+        if request.method == "PUT":
+            etat["prix"] = 2
+            return json_response(etat)
+        # Version lue avant l'écriture, renvoyée après elle
+        copie = dict(etat)
+        while not lecture_lente.is_set():
+            await asyncio.sleep(0.01)
+        return json_response(copie)
+    upstream.handler = handler
+
+    resultats = {}
+    ancienne = threading.Thread(
+        target=lambda: resultats.setdefault("ancienne", client.get("/api/products/produits/abc"))
+    )
+    ancienne.start()
+    time.sleep(0.2)
+    client.put("/api/products/produits/abc", json={})
+    suivante = threading.Thread(
+        target=lambda: resultats.setdefault("suivante", client.get("/api/products/produits/abc"))
+    )
+    suivante.start()
+    time.sleep(0.2)
+    lecture_lente.set()
+    ancienne.join()
+    suivante.join()
+
+    assert resultats["ancienne"].json()["prix"] == 1
+    # Ni la lecture suivante ni le cache ne reprennent la version antérieure
+    assert resultats["suivante"].json()["prix"] == 2
+    assert client.get("/api/products/produits/abc").json()["prix"] == 2
@@ -0,0 +1,71 @@
+# test/test_coalescing.py
+
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.gateway.coalescing import single_flight
+from conftest import json_response
+
+
+def test_get_identiques_un_seul_appel(client: TestClient, upstream):
+    reponse_prete = threading.Event()
+
+    async def lent(request):
+        while not reponse_prete.is_set():
+            await asyncio.sleep(0.01)
+        return json_response({"path": request.url.path})
+    upstream.handler = lent
+
+    resultats = []
+    clients = [
+        threading.Thread(target=lambda: resultats.append(client.get("/api/products/reservations/abc")))
+        for _ in range(5)
+    ]
+    for thread in clients:
+        thread.start()
+    time.sleep(0.3)
+    reponse_prete.set()
+    for thread in clients:
+        thread.join()
+
+    assert [r.status_code for r in resultats] == [200] * 5
+    assert len(upstream.calls) == 1
+    assert single_flight.stats["collapsed"] >= 4
+
+
+def test_ecriture_detache_la_lecture_en_cours(client: TestClient, upstream):
+    etat = {"statut": "active"}
+    lecture_lente = threading.Event()
+
+    async def handler(request):
+        if request.method == "POST":
+            etat["statut"] = "confirmee"
+            return json_response(etat)
+        copie = dict(etat)
+        while not lecture_lente.is_set():
+            await asyncio.sleep(0.01)
+        return json_response(copie)
+    upstream.handler = handler
+
+    resultats = {}
+    ancienne = threading.Thread(
+        target=lambda: resultats.setdefault("ancienne", client.get("/api/products/reservations/abc"))
+    )
+    ancienne.start()
+    time.sleep(0.2)
+    client.post("/api/products/reservations/abc/confirmer")
+    suivante = threading.Thread(
+        target=lambda: resultats.setdefault("suivante", client.get("/api/products/reservations/abc"))
+    )
+    suivante.start()
+    time.sleep(0.2)
+    lecture_lente.set()
+    ancienne.join()
+    suivante.join()
+
+    # La lecture lancée après l'écriture ne rejoint pas celle d'avant
+    assert resultats["ancienne"].json()["statut"] == "active"
+    assert resultats["suivante"].json()["statut"] == "confirmee"
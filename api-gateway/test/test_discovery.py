@@ -0,0 +1,110 @@
+# test/test_discovery.py
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.gateway.discovery import ConsulSource, FileSource, ServiceRegistry, StaticSource
+from app.gateway.services import SERVICES
+
+A, B, C = "http://10.0.0.1:8003", "http://10.0.0.2:8003", "http://10.0.0.3:8003"
+
+
+def registre(source) -> ServiceRegistry:
+    registry = ServiceRegistry(source)
+    asyncio.run(registry.refresh())
+    return registry
+
+
+def charger(registry: ServiceRegistry, service: str, charges: dict):
+    """Fixe le nombre de requêtes en cours de chaque instance (URL -> nombre)."""
+    for endpoint in registry.endpoints(service):
+        endpoint.in_flight = charges.get(endpoint.url, 0)
+
+
+def test_p2c_evite_l_instance_chargee():
+    registry = registre(StaticSource({"orders": {"urls": [A, B]}}))
+    charger(registry, "orders", {A: 5})
+    assert {registry.pick("orders").url for _ in range(20)} == {B}
+
+
+def test_least_outstanding(monkeypatch):
+    monkeypatch.setitem(SERVICES["orders"], "balancer", "least_outstanding")
+    registry = registre(StaticSource({"orders": {"urls": [A, B, C]}}))
+    charger(registry, "orders", {A: 2, B: 1, C: 4})
+    assert {registry.pick("orders").url for _ in range(20)} == {B}
+
+    # Ex aequo : réparties entre les instances les moins chargées
+    charger(registry, "orders", {A: 1, B: 1, C: 4})
+    assert {registry.pick("orders").url for _ in range(50)} == {A, B}
+
+
+def test_rafraichissement_garde_les_compteurs():
+    source = StaticSource({"orders": {"urls": [A, B]}})
+    registry = registre(source)
+    endpoint = registry.endpoints("orders")[0]
+    with endpoint.track():
+        source.set("orders", [A + "/", C])
+        asyncio.run(registry.refresh())
+        assert registry.endpoints("orders")[0] is endpoint
+        assert [e.url for e in registry.endpoints("orders")] == [A, C]
+        assert endpoint.in_flight == 1
+    assert endpoint.in_flight == 0
+
+
+def test_aucune_instance_annoncee_garde_l_etat():
+    source = StaticSource({"orders": {"urls": [A]}})
+    registry = registre(source)
+    source.set("orders", [])
+    asyncio.run(registry.refresh())
+    assert [e.url for e in registry.endpoints("orders")] == [A]
+
+
+def test_repli_sur_l_url_configuree(tmp_path):
+    # Fichier absent : échec de la source, rien n'a jamais été découvert
+    registry = registre(FileSource(str(tmp_path / "absent.json")))
+    assert [e.url for e in registry.endpoints("orders")] == [SERVICES["orders"]["url"]]
+    assert registry.pick("orders") is registry.pick("orders")
+
+
+def test_source_fichier(tmp_path):
+    fichier = tmp_path / "services.json"
+    fichier.write_text(json.dumps({"orders": [A, B]}))
+    registry = registre(FileSource(str(fichier)))
+    assert [e.url for e in registry.endpoints("orders")] == [A, B]
+
+    # Fichier illisible au rafraîchissement suivant : dernier état connu conservé
+    fichier.write_text("{")
+    asyncio.run(registry.refresh())
+    assert [e.url for e in registry.endpoints("orders")] == [A, B]
+
+
+@pytest.mark.parametrize("statut", [200, 500])
+def test_source_consul(statut):
+    async def consul(request):
+        if statut != 200:
+            return httpx.Response(statut)
+        assert request.url.params["passing"] == "true"
+        nom = request.url.path.rsplit("/", 1)[1]
+        entries = [
+            {"Service": {"Address": "10.0.0.1", "Port": 8003}, "Node": {"Address": "192.168.0.1"}},
+            # Sans adresse de service : celle du nœud
+            {"Service": {"Address": "", "Port": 8003}, "Node": {"Address": "10.0.0.2"}},
+        ] if nom == "order-service" else []
+        return httpx.Response(200, json=entries)
+
+    source = ConsulSource("consul", 8500)
+    source._client = httpx.AsyncClient(transport=httpx.MockTransport(consul))
+    registry = ServiceRegistry(source)
+
+    async def decouvrir():
+        await registry.refresh()
+        await registry.close()
+    asyncio.run(decouvrir())
+
+    attendu = [A, B] if statut == 200 else [SERVICES["orders"]["url"]]
+    assert [e.url for e in registry.endpoints("orders")] == attendu
+    # Service sans instance saine : repli sur l'URL configurée
+    assert [e.url for e in registry.endpoints("users")] == [SERVICES["users"]["url"]]
@@ -0,0 +1,66 @@
+# test/test_metrics.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.gateway.metrics import Histogram, route_template
+from conftest import json_response
+
+
+def echantillons(client: TestClient) -> dict:
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    valeurs = {}
+    for line in r.text.splitlines():
+        if line and not line.startswith("#"):
+            nom, _, valeur = line.rpartition(" ")
+            valeurs[nom] = float(valeur)
+    return valeurs
+
+
+@pytest.mark.parametrize("service, path, template", [
+    ("products", "produits/abc-123", "produits/{id}"),
+    ("products", "produits/categorie/Livres/", "produits/categorie/{categorie}"),
+    ("orders", "commande/get/42", "commande/get/{id}"),
+    ("users", "login", "login"),
+    ("users", "inconnue/7/detail", "inconnue/*"),
+])
+def test_gabarits_de_routes(service, path, template):
+    assert route_template(service, path) == template
+
+
+def test_requetes_comptees_par_gabarit(client: TestClient, upstream):
+    async def absente(request):
+        return json_response({"detail": "Commande introuvable"}, status_code=404)
+    upstream.handler = absente
+
+    serie = 'gateway_requests_total{service="orders",route="commande/get/{id}",method="GET",status="404"}'
+    duree = 'gateway_request_duration_seconds_count{service="orders",route="commande/get/{id}"}'
+    avant = echantillons(client)
+    for commande in ("a1", "b2", "c3"):
+        assert client.get(f"/api/orders/commande/get/{commande}").status_code == 404
+    apres = echantillons(client)
+
+    assert apres[serie] - avant.get(serie, 0) == 3
+    assert apres[duree] - avant.get(duree, 0) == 3
+    # Aucun identifiant dans les labels
+    assert not any("a1" in nom for nom in apres)
+    assert apres['gateway_requests_in_flight{service="orders"}'] == 0
+    assert 'gateway_circuit_state{service="orders"}' in apres
+
+
+def test_histogramme_cumulatif():
+    histogramme = Histogram("essai_seconds", "Essai.", ("service",), buckets=(0.1, 1.0))
+    for valeur in (0.05, 0.1, 0.5, 3.0):
+        histogramme.observe(("orders",), valeur)
+
+    lignes = list(histogramme.render())
+    assert lignes[:2] == ["# HELP essai_seconds Essai.", "# TYPE essai_seconds histogram"]
+    assert lignes[2:] == [
+        'essai_seconds_bucket{service="orders",le="0.1"} 2',
+        'essai_seconds_bucket{service="orders",le="1.0"} 3',
+        'essai_seconds_bucket{service="orders",le="+Inf"} 4',
+        'essai_seconds_sum{service="orders"} 3.65',
+        'essai_seconds_count{service="orders"} 4',
+    ]
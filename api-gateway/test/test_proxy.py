@@ -0,0 +1,157 @@
+# test/test_proxy.py
+
+import asyncio
+import gzip
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.gateway.clients import UpstreamClients, build_client
+from app.gateway.proxy import (
+    STREAM_BODY_THRESHOLD, _request_content, close_response, is_replayable, stream_request
+)
+from app.gateway.services import SERVICES, get_service_config
+from conftest import json_response
+
+
+def test_un_pool_par_service():
+    clients = UpstreamClients()
+    orders = clients.get("orders")
+    # Même client (et donc mêmes connexions keep-alive) d'une requête à l'autre
+    assert clients.get("orders") is orders
+    assert clients.get("users") is not orders
+    with pytest.raises(KeyError):
+        clients.get("inconnu")
+
+    asyncio.run(clients.close())
+    assert orders.is_closed
+    assert clients._clients == {}
+
+
+def test_reglages_du_pool():
+    payments = build_client(get_service_config("payments"))
+    assert payments.timeout.read == 15.0
+    assert payments.timeout.connect == get_service_config("payments")["connect_timeout"]
+
+    # HTTP/2 demandé sans le paquet "h2" : repli sur HTTP/1.1 au lieu d'une erreur
+    client = build_client({**get_service_config("orders"), "http2": True})
+    assert isinstance(client, httpx.AsyncClient)
+    asyncio.run(payments.aclose())
+    asyncio.run(client.aclose())
+
+
+def test_seuls_les_en_tetes_utiles_sont_transmis(client: TestClient, upstream):
+    recus = []
+
+    async def handler(request):
+        recus.append(request.headers)
+        return json_response({"ok": True})
+    upstream.handler = handler
+
+    r = client.get("/api/orders/commande/abc", headers={
+        "authorization": "Bearer jeton", "cookie": "session=1", "x-interne": "1",
+    })
+    assert r.status_code == 200
+    assert recus[0]["authorization"] == "Bearer jeton"
+    assert "cookie" not in recus[0]
+    assert "x-interne" not in recus[0]
+
+
+def requete(headers: dict, corps: bytes = b"") -> Request:
+    scope = {
+        "type": "http", "method": "POST", "path": "/", "query_string": b"",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": corps, "more_body": False}
+    return Request(scope, receive)
+
+
+@pytest.mark.parametrize("headers, rejouable", [
+    ({}, True),
+    ({"content-length": "10"}, True),
+    ({"content-length": str(STREAM_BODY_THRESHOLD + 1)}, False),
+    ({"transfer-encoding": "chunked"}, False),
+    ({"content-length": "abc"}, False),
+    ({"content-length": "-1"}, False),
+])
+def test_corps_rejouable(headers, rejouable):
+    assert is_replayable(requete(headers), stream=True) is rejouable
+    # Mode bufferisé : le corps est toujours lu d'un bloc
+    assert is_replayable(requete(headers), stream=False)
+
+
+def test_gros_corps_streame(client: TestClient, upstream):
+    recus = []
+
+    async def handler(request):
+        recus.append((request.headers.get("content-length"), len(await request.aread())))
+        return json_response({"ok": True})
+    upstream.handler = handler
+
+    taille = STREAM_BODY_THRESHOLD * 3
+    assert client.post("/api/orders/commande", content=b"x" * taille).status_code == 200
+    assert recus == [(str(taille), taille)]
+
+    # Au-delà du seuil le corps est relayé en flux, en dessous il est lu d'un bloc
+    assert not isinstance(asyncio.run(_request_content(requete({"content-length": str(taille)}))), bytes)
+    assert asyncio.run(_request_content(requete({"content-length": "3"}, b"abc"))) == b"abc"
+
+
+def test_longueur_invalide_non_transmise():
+    recus = []
+
+    async def handler(request):
+        recus.append(request.headers)
+        return json_response({"ok": True})
+
+    async def envoyer():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as amont:
+            response = await stream_request(amont, "http://service", "/commande",
+                                            requete({"content-length": "abc"}, b"abc"))
+            await close_response(response)
+
+    asyncio.run(envoyer())
+    assert recus[0].get("content-length") != "abc"
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_en_tetes_hop_by_hop_retires(client: TestClient, upstream, monkeypatch, streaming):
+    monkeypatch.setitem(SERVICES["orders"], "streaming", streaming)
+
+    async def handler(request):
+        return httpx.Response(200, stream=httpx.ByteStream(b"{}"), headers={
+            "content-type": "application/json",
+            "connection": "keep-alive, x-trace-interne",
+            "keep-alive": "timeout=5",
+            "x-trace-interne": "1",
+            "x-request-id": "42",
+        })
+    upstream.handler = handler
+
+    r = client.post("/api/orders/commande", json={})
+    assert r.status_code == 200
+    for name in ("connection", "keep-alive", "x-trace-interne"):
+        assert name not in r.headers
+    assert r.headers["x-request-id"] == "42"
+
+
+def test_corps_decode_en_mode_bufferise(client: TestClient, upstream, monkeypatch):
+    monkeypatch.setitem(SERVICES["orders"], "streaming", False)
+
+    async def handler(request):
+        corps = gzip.compress(b'{"id": "abc"}')
+        return httpx.Response(200, stream=httpx.ByteStream(corps), headers={
+            "content-type": "application/json", "content-encoding": "gzip",
+            "content-length": str(len(corps)),
+        })
+    upstream.handler = handler
+
+    # httpx a décompressé le corps : Content-Encoding et Content-Length d'origine retirés
+    r = client.post("/api/orders/commande", json={})
+    assert r.json() == {"id": "abc"}
+    assert "content-encoding" not in r.headers
+    assert r.headers["content-length"] == str(len(r.content))
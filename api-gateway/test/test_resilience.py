@@ -0,0 +1,93 @@
+# test/test_resilience.py
+
+from fastapi.testclient import TestClient
+
+from app.gateway.resilience import CircuitBreaker, resilience
+from conftest import json_response
+
+
+def expirer_delai(service: str):
+    breaker = resilience.get(service).breaker
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_circuit_ouvert_apres_echecs(client: TestClient, upstream):
+    async def panne(request):
+        return json_response({"detail": "erreur"}, status_code=500)
+    upstream.handler = panne
+
+    for _ in range(5):
+        assert client.get("/api/orders/commande/abc").status_code == 500
+    assert resilience.get("orders").breaker.state == CircuitBreaker.OPEN
+
+    # Circuit ouvert : rejet immédiat, le service n'est plus appelé
+    r = client.get("/api/orders/commande/abc")
+    assert r.status_code == 503
+    assert "circuit ouvert" in r.json()["detail"]
+    assert len(upstream.calls) == 5
+    # Les autres services ne sont pas touchés
+    assert resilience.get("payments").breaker.state == CircuitBreaker.CLOSED
+
+
+def test_semi_ouvert_reussite_referme(client: TestClient, upstream):
+    async def panne(request):
+        return json_response({"detail": "erreur"}, status_code=500)
+    upstream.handler = panne
+    for _ in range(5):
+        client.get("/api/orders/commande/abc")
+
+    async def retabli(request):
+        return json_response({"id": "abc"})
+    upstream.handler = retabli
+    expirer_delai("orders")
+
+    assert client.get("/api/orders/commande/abc").status_code == 200
+    breaker = resilience.get("orders").breaker
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert client.get("/api/orders/commande/abc").status_code == 200
+
+
+def test_semi_ouvert_echec_rouvre(client: TestClient, upstream):
+    async def panne(request):
+        return json_response({"detail": "erreur"}, status_code=500)
+    upstream.handler = panne
+    for _ in range(5):
+        client.get("/api/orders/commande/abc")
+    expirer_delai("orders")
+
+    # Une seule sonde passe ; son échec rouvre le circuit aussitôt
+    assert client.get("/api/orders/commande/abc").status_code == 500
+    assert resilience.get("orders").breaker.state == CircuitBreaker.OPEN
+    assert client.get("/api/orders/commande/abc").status_code == 503
+    assert len(upstream.calls) == 6
+
+
+def test_semi_ouvert_une_sonde_a_la_fois():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, half_open_calls=1)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    breaker.opened_at -= 10.0
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    # Sonde sans verdict (requête annulée) : une nouvelle passe après le délai
+    breaker.opened_at -= 10.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_sur_503(client: TestClient, upstream):
+    reponses = iter([503, 200])
+
+    async def instable(request):
+        return json_response({"ok": True}, status_code=next(reponses))
+    upstream.handler = instable
+
+    assert client.get("/api/orders/commande/abc").status_code == 200
+    assert len(upstream.calls) == 2
+    assert resilience.get("orders").stats["retries"] == 1
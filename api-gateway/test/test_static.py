@@ -0,0 +1,97 @@
+# test/test_static.py
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.gateway.static as static
+from conftest import json_response
+
+HASH = "a" * 64
+
+
+@pytest.mark.parametrize("filename", [
+    f".{HASH}.jpg.gc",
+    f".{HASH}_card.webp.tmp",
+    f"{HASH}.jpg.tmp",
+    f"{HASH}.jpg.gc",
+    ".env",
+])
+def test_fichiers_caches_jamais_servis(client: TestClient, upstream, tmp_path, monkeypatch, filename):
+    (tmp_path / filename).write_bytes(b"contenu de travail")
+    monkeypatch.setattr(static, "local_uploads", static.ImmutableStaticFiles(directory=str(tmp_path)))
+
+    r = client.get(f"/api/products/static/uploads/{filename}")
+    assert r.status_code == 404
+    # Ni servi depuis le volume partagé, ni relayé au service
+    assert upstream.calls == []
+
+
+def test_image_servie_depuis_le_volume(client: TestClient, upstream, tmp_path, monkeypatch):
+    (tmp_path / f"{HASH}.jpg").write_bytes(b"jpeg")
+    monkeypatch.setattr(static, "local_uploads", static.ImmutableStaticFiles(directory=str(tmp_path)))
+
+    r = client.get(f"/api/products/static/uploads/{HASH}.jpg")
+    assert r.status_code == 200
+    assert r.content == b"jpeg"
+    assert r.headers["cache-control"] == static.IMMUTABLE_CACHE_CONTROL
+    assert r.headers["etag"] == f'"{HASH}.jpg"'
+    assert upstream.calls == []
+
+
+def test_image_relayee_par_le_service(client: TestClient, upstream):
+    async def image(request):
+        return httpx.Response(200, stream=httpx.ByteStream(b"png"), headers={"content-type": "image/png"})
+    upstream.handler = image
+
+    r = client.get(f"/api/products/static/uploads/{HASH}.png")
+    assert r.status_code == 200
+    assert r.content == b"png"
+    assert r.headers["cache-control"] == static.IMMUTABLE_CACHE_CONTROL
+    assert upstream.calls == [("GET", f"/static/uploads/{HASH}.png")]
+
+
+def test_range_et_get_conditionnel_depuis_le_volume(client: TestClient, upstream, tmp_path, monkeypatch):
+    (tmp_path / f"{HASH}.jpg").write_bytes(b"0123456789")
+    monkeypatch.setattr(static, "local_uploads", static.ImmutableStaticFiles(directory=str(tmp_path)))
+    url = f"/api/products/static/uploads/{HASH}.jpg"
+
+    r = client.get(url, headers={"range": "bytes=2-5"})
+    assert r.status_code == 206
+    assert r.content == b"2345"
+    assert r.headers["content-range"] == "bytes 2-5/10"
+
+    r = client.get(url, headers={"if-none-match": f'"{HASH}.jpg"'})
+    assert r.status_code == 304
+    assert r.headers["cache-control"] == static.IMMUTABLE_CACHE_CONTROL
+
+    # If-Range périmé : fichier complet
+    r = client.get(url, headers={"range": "bytes=2-5", "if-range": '"autre"'})
+    assert r.status_code == 200
+    assert r.content == b"0123456789"
+
+
+def test_range_relaye_au_service(client: TestClient, upstream):
+    recus = []
+
+    async def image(request):
+        recus.append(request.headers)
+        return httpx.Response(206, stream=httpx.ByteStream(b"23"), headers={"content-range": "bytes 2-3/10"})
+    upstream.handler = image
+
+    r = client.get(f"/api/products/static/uploads/{HASH}.png",
+                   headers={"range": "bytes=2-3", "if-range": f'"{HASH}.png"', "cookie": "session=1"})
+    assert r.status_code == 206
+    assert r.content == b"23"
+    assert r.headers["content-range"] == "bytes 2-3/10"
+    assert recus[0]["range"] == "bytes=2-3"
+    assert recus[0]["if-range"] == f'"{HASH}.png"'
+    assert "cookie" not in recus[0]
+
+
+def test_image_absente_du_service(client: TestClient, upstream):
+    async def absente(request):
+        return json_response({"detail": "Not Found"}, status_code=404)
+    upstream.handler = absente
+
+    assert client.get(f"/api/products/static/uploads/{HASH}.png").status_code == 404
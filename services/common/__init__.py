@@ -0,0 +1,3 @@
+# Code partagé par les services (order, payment, user).
+# Le dossier services/ doit être dans le chemin d'import : contexte de build
+# Docker (voir docker-compose.yml), PYTHONPATH posé par run.py, conftest des tests.
@@ -0,0 +1,99 @@
+import csv
+import datetime
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+# Lignes lues par page (une transaction courte chacune), et taille des blocs envoyés
+PAGE_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+
+def valeur(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def iter_pages(session_factory, lire_page: Callable, cle: str) -> Iterator[Dict]:
+    """
+    Lit l'export page après page (pagination par clé) : chaque page est lue
+    dans sa propre session, fermée avant l'envoi des lignes. Aucune
+    transaction ne reste ouverte pendant qu'un client lent télécharge, les
+    écritures du service ne sont donc jamais bloquées par un export.
+
+    `lire_page(db, apres)` retourne les lignes qui suivent la clé `apres`
+    (None pour la première page), triées par la colonne `cle`.
+    """
+    apres = None
+    while True:
+        db = session_factory()
+        try:
+            lignes = [
+                {key: valeur(value) for key, value in row._mapping.items()}
+                for row in lire_page(db, apres)
+            ]
+        finally:
+            db.close()
+        if not lignes:
+            return
+        yield from lignes
+        apres = lignes[-1][cle]
+
+
+def page_par_cle(stmt, colonne, taille: int = PAGE_SIZE) -> Callable:
+    """`lire_page` pour un select simple, paginé sur une colonne unique (`colonne`)."""
+    def lire_page(db, apres: Optional[str]):
+        page = stmt.order_by(colonne).limit(taille)
+        if apres is not None:
+            page = page.where(colonne > apres)
+        return db.execute(page).all()
+    return lire_page
+
+
+def ndjson_chunks(objets: Iterable[Dict]) -> Iterator[str]:
+    buffer, taille = [], 0
+    for objet in objets:
+        ligne = json.dumps(objet, ensure_ascii=False) + "\n"
+        buffer.append(ligne)
+        taille += len(ligne)
+        if taille >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, taille = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def csv_chunks(lignes: Iterable[Dict], colonnes: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=colonnes, extrasaction="ignore")
+    writer.writeheader()
+    for ligne in lignes:
+        writer.writerow(ligne)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_response(contenu: Iterator[str], fmt: str, nom: str) -> StreamingResponse:
+    """Réponse NDJSON ou CSV écrite au fil de la lecture : mémoire constante."""
+    return StreamingResponse(
+        contenu,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{nom}.{fmt}"'}
+    )
+
+
+def export_table(session_factory, stmt, colonne, fmt: str, nom: str) -> StreamingResponse:
+    """Export d'un select simple : une ligne par résultat, pagination sur `colonne`."""
+    colonnes = [c.name for c in stmt.selected_columns]
+    lignes = iter_pages(session_factory, page_par_cle(stmt, colonne), colonne.key)
+    contenu = csv_chunks(lignes, colonnes) if fmt == "csv" else ndjson_chunks(lignes)
+    return export_response(contenu, fmt, nom)
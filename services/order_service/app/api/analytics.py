@@ -0,0 +1,163 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import delete, func, insert as insert_select, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.db.schemas import StatutStats, VentesJourStats, VentesProduitStats
+from app.models.analytics import CommandesStatut, VentesJour, VentesProduit
+from app.models.commande import Commande, LigneCommande
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ---------------------------
+# Mise à jour incrémentale (appelée dans la transaction de la commande)
+# ---------------------------
+
+def _incrementer_statut(db: Session, statut: str, delta: int):
+    stmt = insert(CommandesStatut).values(statut=statut, commandes=delta)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[CommandesStatut.statut],
+        set_={"commandes": CommandesStatut.commandes + stmt.excluded.commandes}
+    ))
+
+
+def enregistrer_commande(db: Session, commande: Commande, lignes: List[Dict]):
+    """
+    Ajoute une nouvelle commande aux agrégats : trois upserts (jour, statut,
+    produits en executemany), sans relire les lignes déjà enregistrées.
+    """
+    stmt = insert(VentesJour).values(
+        jour=commande.date_commande.date(), commandes=1, chiffre_affaires=commande.total
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[VentesJour.jour],
+        set_={
+            "commandes": VentesJour.commandes + 1,
+            "chiffre_affaires": VentesJour.chiffre_affaires + stmt.excluded.chiffre_affaires,
+        }
+    ))
+    _incrementer_statut(db, commande.statut, 1)
+
+    # Un même produit sur plusieurs lignes ne compte qu'une commande
+    par_produit = defaultdict(lambda: {"quantite": 0, "chiffre_affaires": 0.0})
+    for ligne in lignes:
+        cumul = par_produit[ligne["produit_id"]]
+        cumul["quantite"] += ligne["quantite"]
+        cumul["chiffre_affaires"] += ligne["quantite"] * ligne["prix_unitaire"]
+
+    stmt = insert(VentesProduit)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[VentesProduit.produit_id],
+            set_={
+                "quantite": VentesProduit.quantite + stmt.excluded.quantite,
+                "chiffre_affaires": VentesProduit.chiffre_affaires + stmt.excluded.chiffre_affaires,
+                "commandes": VentesProduit.commandes + 1,
+            }
+        ),
+        [{"produit_id": pid, "commandes": 1, **cumul} for pid, cumul in par_produit.items()]
+    )
+
+
+def changer_statut(db: Session, ancien: str, nouveau: str):
+    """Déplace une commande d'un compteur de statut à l'autre."""
+    if ancien == nouveau:
+        return
+    db.execute(
+        update(CommandesStatut)
+        .where(CommandesStatut.statut == ancien)
+        .values(commandes=CommandesStatut.commandes - 1)
+    )
+    _incrementer_statut(db, nouveau, 1)
+
+
+def reconstruire(db: Session):
+    """Recalcule tous les agrégats depuis les commandes (une requête GROUP BY par table)."""
+    for table in (VentesJour, VentesProduit, CommandesStatut):
+        db.execute(delete(table))
+
+    jour = func.date(Commande.date_commande)
+    db.execute(insert_select(VentesJour).from_select(
+        ["jour", "commandes", "chiffre_affaires"],
+        select(jour, func.count(), func.sum(Commande.total)).group_by(jour)
+    ))
+    db.execute(insert_select(VentesProduit).from_select(
+        ["produit_id", "quantite", "chiffre_affaires", "commandes"],
+        select(
+            LigneCommande.produit_id,
+            func.sum(LigneCommande.quantite),
+            func.sum(LigneCommande.quantite * LigneCommande.prix_unitaire),
+            func.count(LigneCommande.commande_id.distinct()),
+        ).group_by(LigneCommande.produit_id)
+    ))
+    db.execute(insert_select(CommandesStatut).from_select(
+        ["statut", "commandes"],
+        select(Commande.statut, func.count()).group_by(Commande.statut)
+    ))
+
+
+def setup_analytics(engine):
+    """Au démarrage : remplit les agrégats d'une base créée avant leur existence."""
+    with Session(engine) as db:
+        vide = db.execute(select(CommandesStatut.statut).limit(1)).first() is None
+        if vide and db.execute(select(Commande.id).limit(1)).first() is not None:
+            reconstruire(db)
+            db.commit()
+
+
+# ---------------------------
+# 📊 [ADMIN] Tableau de bord (lecture des agrégats uniquement)
+# ---------------------------
+
+@router.get('/ventes', response_model=List[VentesJourStats])
+def get_ventes_par_jour(
+    du: Optional[datetime.date] = None,
+    au: Optional[datetime.date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    [Admin] Nombre de commandes et chiffre d'affaires par jour (UTC),
+    `du` et `au` inclus. Une ligne lue par jour, quel que soit le volume.
+    """
+    query = db.query(VentesJour)
+    if du:
+        query = query.filter(VentesJour.jour >= du)
+    if au:
+        query = query.filter(VentesJour.jour <= au)
+    return query.order_by(VentesJour.jour).all()
+
+
+@router.get('/produits', response_model=List[VentesProduitStats])
+def get_top_produits(
+    tri: str = Query("chiffre_affaires", pattern="^(chiffre_affaires|quantite)$"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """[Admin] Produits les plus vendus, par chiffre d'affaires ou par quantité."""
+    colonne = getattr(VentesProduit, tri)
+    return db.query(VentesProduit).order_by(colonne.desc()).limit(limit).all()
+
+
+@router.get('/statuts', response_model=List[StatutStats])
+def get_commandes_par_statut(db: Session = Depends(get_db)):
+    """[Admin] Nombre de commandes par statut."""
+    return (
+        db.query(CommandesStatut)
+        .filter(CommandesStatut.commandes > 0)
+        .order_by(CommandesStatut.statut)
+        .all()
+    )
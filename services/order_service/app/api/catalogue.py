@@ -0,0 +1,63 @@
+import os
+from typing import Dict, List
+
+import httpx
+from fastapi import HTTPException, status
+
+# Service produits : source des prix au moment de la commande
+PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL", "http://product-service:5002")
+PRODUCT_SERVICE_TIMEOUT = float(os.getenv("PRODUCT_SERVICE_TIMEOUT", "2.0"))
+
+# Limite de /produits/lot côté service produits
+MAX_LOT_IDS = 500
+
+
+class Catalogue:
+    """
+    Client du service produits. Un seul appel à /produits/lot par tranche de
+    500 identifiants, quelle que soit la taille du panier ; connexions
+    réutilisées d'une commande à l'autre.
+    """
+
+    def __init__(self, base_url: str = PRODUCT_SERVICE_URL, transport: httpx.BaseTransport = None):
+        self.client = httpx.Client(base_url=base_url, timeout=PRODUCT_SERVICE_TIMEOUT, transport=transport)
+
+    def get_prix(self, produit_ids: List[str]) -> Dict[str, float]:
+        """Prix courant de chaque produit ; 400 si un produit n'existe pas."""
+        ids = list(dict.fromkeys(produit_ids))
+        prix, manquants = {}, []
+        for i in range(0, len(ids), MAX_LOT_IDS):
+            try:
+                response = self.client.get(
+                    "/produits/lot",
+                    params={"ids": ",".join(ids[i:i + MAX_LOT_IDS]), "champs": "prix"}
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Service produits indisponible : {str(e)}"
+                )
+            data = response.json()
+            manquants += data["manquants"]
+            prix.update({pid: p["prix"] for pid, p in data["produits"].items() if p is not None})
+
+        if manquants:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Produits introuvables : {', '.join(manquants)}"
+            )
+        return prix
+
+    def close(self):
+        self.client.close()
+
+
+_catalogue = None
+
+
+def get_catalogue() -> Catalogue:
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = Catalogue()
+    return _catalogue
@@ -0,0 +1,75 @@
+from typing import Dict, Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.db.database import SessionLocal
+from app.models.commande import Commande, LigneCommande
+from common.export import PAGE_SIZE, csv_chunks, export_response, iter_pages, ndjson_chunks
+
+COLONNES_CSV = [
+    "commande_id", "utilisateur_id", "date_commande", "statut", "total",
+    "ligne_id", "produit_id", "quantite", "prix_unitaire",
+]
+
+
+def lire_page(db, apres):
+    """
+    Les PAGE_SIZE commandes qui suivent `apres` et toutes leurs lignes : une
+    page ne coupe jamais une commande en deux.
+    """
+    ids = select(Commande.id).order_by(Commande.id).limit(PAGE_SIZE)
+    if apres is not None:
+        ids = ids.where(Commande.id > apres)
+    stmt = (
+        select(
+            Commande.id.label("commande_id"), Commande.utilisateur_id, Commande.date_commande,
+            Commande.statut, Commande.total, LigneCommande.id.label("ligne_id"),
+            LigneCommande.produit_id, LigneCommande.quantite, LigneCommande.prix_unitaire,
+        )
+        .outerjoin(LigneCommande, LigneCommande.commande_id == Commande.id)
+        .where(Commande.id.in_(ids.scalar_subquery()))
+        .order_by(Commande.id, LigneCommande.id)
+    )
+    return db.execute(stmt).all()
+
+
+def iter_lignes() -> Iterator[Dict]:
+    """Commandes et lignes (jointure triée par commande), lues par pages de commandes."""
+    return iter_pages(SessionLocal, lire_page, "commande_id")
+
+
+def iter_commandes(lignes: Iterable[Dict]) -> Iterator[Dict]:
+    """Regroupe les lignes consécutives d'une même commande (format de /commande/admin)."""
+    courante = None
+    for ligne in lignes:
+        if courante is None or courante["id"] != ligne["commande_id"]:
+            if courante is not None:
+                yield courante
+            courante = {
+                "id": ligne["commande_id"],
+                "utilisateur_id": ligne["utilisateur_id"],
+                "date_commande": ligne["date_commande"],
+                "statut": ligne["statut"],
+                "total": ligne["total"],
+                "lignes": [],
+            }
+        if ligne["ligne_id"] is not None:
+            courante["lignes"].append({
+                "id": ligne["ligne_id"],
+                "commande_id": ligne["commande_id"],
+                "produit_id": ligne["produit_id"],
+                "quantite": ligne["quantite"],
+                "prix_unitaire": ligne["prix_unitaire"],
+            })
+    if courante is not None:
+        yield courante
+
+
+def export_commandes(fmt: str) -> StreamingResponse:
+    """NDJSON : une commande (avec ses lignes) par ligne. CSV : une ligne de commande par ligne."""
+    if fmt == "csv":
+        contenu = csv_chunks(iter_lignes(), COLONNES_CSV)
+    else:
+        contenu = ndjson_chunks(iter_commandes(iter_lignes()))
+    return export_response(contenu, fmt, "commandes")
@@ -0,0 +1,144 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.api.transport import Transport
+from app.db.database import SessionLocal
+from app.models.outbox import EvenementOutbox
+
+# Topic créé par kafka/init-topics.sh
+OUTBOX_TOPIC = "orders"
+
+# Relais : événements lus par lot, pause quand il n'y a plus rien à publier,
+# attente doublée à chaque échec (plafonnée) avant de réessayer le même lot
+OUTBOX_RELAY = os.getenv("OUTBOX_RELAY", "1") == "1"
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "500"))
+OUTBOX_INTERVAL = float(os.getenv("OUTBOX_INTERVAL", "1.0"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "60"))
+
+# Événements publiés conservés (secondes) puis purgés, vérifié toutes les heures
+OUTBOX_RETENTION = int(os.getenv("OUTBOX_RETENTION", str(7 * 86400)))
+OUTBOX_PURGE_INTERVAL = 3600
+
+logger = logging.getLogger(__name__)
+
+
+def ajouter_evenement(db: Session, type_evenement: str, commande_id: str, donnees: Dict):
+    """
+    Écrit l'événement dans la transaction en cours : il n'existe que si la
+    commande est validée, et il sera publié même si le broker est en panne.
+    """
+    evenement_id = uuid.uuid4().hex
+    maintenant = datetime.datetime.utcnow()
+    payload = {
+        "id": evenement_id,
+        "type": type_evenement,
+        "date": maintenant.isoformat(),
+        "commande_id": commande_id,
+        "donnees": donnees,
+    }
+    db.execute(insert(EvenementOutbox).values(
+        evenement_id=evenement_id,
+        topic=OUTBOX_TOPIC,
+        cle=commande_id,
+        type=type_evenement,
+        payload=json.dumps(payload, default=str),
+        cree_le=maintenant,
+    ))
+
+
+def lire_a_publier(limit: int) -> List[EvenementOutbox]:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(EvenementOutbox)
+            .filter(EvenementOutbox.publie_le.is_(None))
+            .order_by(EvenementOutbox.id)
+            .limit(limit)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def marquer(ids: List[int], **valeurs):
+    db = SessionLocal()
+    try:
+        db.execute(update(EvenementOutbox).where(EvenementOutbox.id.in_(ids)).values(**valeurs))
+        db.commit()
+    finally:
+        db.close()
+
+
+def purger(avant: datetime.datetime) -> int:
+    db = SessionLocal()
+    try:
+        result = db.execute(delete(EvenementOutbox).where(EvenementOutbox.publie_le < avant))
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+async def relayer_une_fois(transport: Transport) -> int:
+    """
+    Publie le plus ancien lot d'événements en attente, dans l'ordre des id.
+    En cas d'échec, tout le lot reste en attente et sera renvoyé (livraison
+    « au moins une fois » : les consommateurs dédupliquent sur `id`).
+    """
+    evenements = await run_in_threadpool(lire_a_publier, OUTBOX_BATCH)
+    if not evenements:
+        return 0
+
+    ids = [e.id for e in evenements]
+    par_topic = defaultdict(list)
+    for e in evenements:
+        par_topic[e.topic].append((e.cle, e.payload.encode()))
+    try:
+        for topic, messages in par_topic.items():
+            await transport.publier(topic, messages)
+    except Exception as e:
+        await run_in_threadpool(
+            marquer, ids,
+            tentatives=EvenementOutbox.tentatives + 1, derniere_erreur=str(e)[:500]
+        )
+        raise
+    await run_in_threadpool(marquer, ids, publie_le=datetime.datetime.utcnow())
+    return len(evenements)
+
+
+async def relayer_periodiquement(transport: Transport):
+    """Tâche de fond : vide l'outbox vers le transport, lot après lot."""
+    echecs = 0
+    prochaine_purge = time.monotonic()
+    while True:
+        try:
+            publies = await relayer_une_fois(transport)
+            echecs = 0
+        except Exception as e:
+            echecs += 1
+            logger.error("Publication des événements impossible (tentative %d) : %s", echecs, e)
+            await asyncio.sleep(min(OUTBOX_INTERVAL * 2 ** echecs, OUTBOX_MAX_BACKOFF))
+            continue
+
+        if time.monotonic() >= prochaine_purge:
+            limite = datetime.datetime.utcnow() - datetime.timedelta(seconds=OUTBOX_RETENTION)
+            try:
+                await run_in_threadpool(purger, limite)
+            except Exception as e:
+                logger.warning("Purge de l'outbox impossible : %s", e)
+            prochaine_purge = time.monotonic() + OUTBOX_PURGE_INTERVAL
+
+        # Lot complet : il en reste sans doute, on enchaîne sans attendre
+        if publies < OUTBOX_BATCH:
+            await asyncio.sleep(OUTBOX_INTERVAL)
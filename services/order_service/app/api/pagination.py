@@ -0,0 +1,61 @@
+import base64
+import datetime
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+from app.models.commande import Commande
+
+# Plus récentes d'abord ; l'id départage les commandes passées au même instant
+TRI = (Commande.date_commande.desc(), Commande.id.desc())
+
+# En-tête portant le jeton de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(commande: Commande) -> str:
+    """Jeton opaque désignant la position juste après `commande`."""
+    payload = {"d": commande.date_commande.isoformat(), "i": commande.id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(curseur: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        payload = json.loads(raw)
+        return {"d": datetime.datetime.fromisoformat(payload["d"]), "i": str(payload["i"])}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
+
+
+def paginate(query, limit: int, curseur: str = None, du: datetime.datetime = None, au: datetime.datetime = None):
+    """
+    Filtre par période (`du` inclus, `au` exclu), trie et pagine par keyset :
+    la page commence après la dernière commande vue, servie par l'index
+    (utilisateur_id, date_commande, id). Une ligne de plus est lue pour
+    savoir s'il existe une page suivante.
+    """
+    if du:
+        query = query.filter(Commande.date_commande >= du)
+    if au:
+        query = query.filter(Commande.date_commande < au)
+    if curseur:
+        payload = decode_cursor(curseur)
+        query = query.filter(or_(
+            Commande.date_commande < payload["d"],
+            and_(Commande.date_commande == payload["d"], Commande.id < payload["i"])
+        ))
+    return query.order_by(*TRI).limit(limit + 1)
+
+
+def next_page(commandes: list, limit: int):
+    """Retourne (commandes de la page, curseur de la page suivante ou None)."""
+    if len(commandes) > limit:
+        commandes = commandes[:limit]
+        return commandes, encode_cursor(commandes[-1])
+    return commandes, None
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import datetime
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+
+from app.api import analytics, outbox
+from app.api.catalogue import Catalogue, get_catalogue
+from app.api.export import export_commandes
+from app.api.pagination import NEXT_CURSOR_HEADER, next_page, paginate
 from app.db.database import SessionLocal
-from app.models.commande import Commande, LigneCommande
+from app.models.commande import Commande, LigneCommande, generate_id
 from app.db.schemas import CommandeCreate, Commande as CommandeSchema
+from common.export import EXPORT_FORMAT_PATTERN
 
 router = APIRouter(prefix="/commande", tags=["Commandes"])
 
@@ -36,36 +44,55 @@ def verify_admin_rights(db: Session, user_id: str):
 # ---------------------------
 
 @router.post('/', response_model=CommandeSchema, status_code=status.HTTP_201_CREATED)
-def create_commande(commande: CommandeCreate, db: Session = Depends(get_db)):
+def create_commande(
+    commande: CommandeCreate,
+    db: Session = Depends(get_db),
+    catalogue: Catalogue = Depends(get_catalogue)
+):
     """
     Crée une nouvelle commande avec ses lignes.
+    Les prix unitaires et le total sont calculés ici, à partir des prix
+    courants du service produits (un seul appel pour tout le panier).
     Retourne la commande créée avec ID généré.
     """
+    prix = catalogue.get_prix([ligne.produit_id for ligne in commande.lignes])
 
     try:
         db_commande = Commande(
             utilisateur_id=commande.utilisateur_id,
             statut=commande.statut or "en_attente",
-            total=commande.total
+            date_commande=datetime.datetime.utcnow(),
+            total=round(sum(prix[l.produit_id] * l.quantite for l in commande.lignes), 2)
         )
         db.add(db_commande)
         db.flush()
 
-        lignes = []
-        for ligne in commande.lignes:
-            db_ligne = LigneCommande(
-                commande_id=db_commande.id,
-                produit_id=ligne.produit_id,
-                quantite=ligne.quantite,
-                prix_unitaire=ligne.prix_unitaire
-            )
-            db.add(db_ligne)
-            lignes.append(db_ligne)
-
+        # Toutes les lignes en un seul INSERT (executemany), même transaction
+        lignes = [
+            {
+                "id": generate_id(),
+                "commande_id": db_commande.id,
+                "produit_id": ligne.produit_id,
+                "quantite": ligne.quantite,
+                "prix_unitaire": prix[ligne.produit_id]
+            }
+            for ligne in commande.lignes
+        ]
+        db.execute(insert(LigneCommande), lignes)
+        analytics.enregistrer_commande(db, db_commande, lignes)
+
+        reponse = CommandeSchema(
+            id=db_commande.id,
+            utilisateur_id=db_commande.utilisateur_id,
+            statut=db_commande.statut,
+            total=db_commande.total,
+            date_commande=db_commande.date_commande,
+            lignes=lignes
+        )
+        # Événement publié par le relais de l'outbox une fois la commande validée
+        outbox.ajouter_evenement(db, "commande.creee", db_commande.id, reponse.model_dump(mode="json"))
         db.commit()
-        db.refresh(db_commande)
-        db_commande.lignes = lignes
-        return db_commande
+        return reponse
 
     except Exception as e:
         db.rollback()
@@ -85,7 +112,12 @@ def get_commande(id: str, db: Session = Depends(get_db)):
     Récupère les détails d'une commande spécifique.
     Si non trouvée → 404
     """
-    commande = db.query(Commande).filter(Commande.id == id).first()
+    commande = (
+        db.query(Commande)
+        .options(selectinload(Commande.lignes))
+        .filter(Commande.id == id)
+        .first()
+    )
     if not commande:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -99,12 +131,30 @@ def get_commande(id: str, db: Session = Depends(get_db)):
 # ---------------------------
 
 @router.get('/utilisateur/{id}', response_model=List[CommandeSchema])
-def get_commandes_by_user(id: str, db: Session = Depends(get_db)):
+def get_commandes_by_user(
+    id: str,
+    response: Response,
+    du: Optional[datetime.datetime] = None,
+    au: Optional[datetime.datetime] = None,
+    curseur: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
     """
-    Liste toutes les commandes d'un utilisateur donné.
+    Liste les commandes d'un utilisateur donné, des plus récentes aux plus anciennes.
+    - `du` / `au` : période (début inclus, fin exclue)
+    - page suivante : passer le jeton de l'en-tête X-Next-Cursor dans `curseur`
+    Deux requêtes par page (commandes, puis toutes leurs lignes).
     Si aucune commande trouvée → retourne une liste vide.
     """
-    commandes = db.query(Commande).filter(Commande.utilisateur_id == id).all()
+    query = (
+        db.query(Commande)
+        .options(selectinload(Commande.lignes))
+        .filter(Commande.utilisateur_id == id)
+    )
+    commandes, suivant = next_page(paginate(query, limit, curseur, du, au).all(), limit)
+    if suivant:
+        response.headers[NEXT_CURSOR_HEADER] = suivant
     return commandes
 
 
@@ -113,11 +163,36 @@ def get_commandes_by_user(id: str, db: Session = Depends(get_db)):
 # ---------------------------
 
 @router.get('/admin', response_model=List[CommandeSchema])
-def get_all_commandes(db: Session = Depends(get_db)):
+def get_all_commandes(
+    response: Response,
+    du: Optional[datetime.datetime] = None,
+    au: Optional[datetime.datetime] = None,
+    curseur: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
     """
-    [Admin] Liste toutes les commandes du système.
+    [Admin] Liste les commandes du système, des plus récentes aux plus anciennes.
+    Mêmes filtres et pagination que l'historique d'un utilisateur.
     """
-    return db.query(Commande).all()
+    query = db.query(Commande).options(selectinload(Commande.lignes))
+    commandes, suivant = next_page(paginate(query, limit, curseur, du, au).all(), limit)
+    if suivant:
+        response.headers[NEXT_CURSOR_HEADER] = suivant
+    return commandes
+
+
+# ---------------------------
+# 📤 [ADMIN] Exporter toutes les commandes
+# ---------------------------
+
+@router.get('/admin/export')
+def export_all_commandes(fmt: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """
+    [Admin] Export complet, envoyé au fil de la lecture (NDJSON ou CSV) :
+    mémoire constante quel que soit le nombre de commandes.
+    """
+    return export_commandes(fmt)
 
 
 # ---------------------------
@@ -136,7 +211,37 @@ def update_commande_statut(id: str, statut: str, db: Session = Depends(get_db)):
             detail=f"Commande avec l'id '{id}' introuvable."
         )
 
-    commande.statut = statut
-    db.commit()
+    try:
+        # Transition conditionnelle : deux mises à jour simultanées ne
+        # décomptent jamais deux fois le même ancien statut
+        ancien = commande.statut
+        result = db.execute(
+            update(Commande)
+            .where(Commande.id == id, Commande.statut == ancien)
+            .values(statut=statut)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Statut modifié entre-temps, veuillez réessayer."
+            )
+        analytics.changer_statut(db, ancien, statut)
+        if ancien != statut:
+            outbox.ajouter_evenement(db, "commande.statut_modifie", id, {
+                "utilisateur_id": commande.utilisateur_id,
+                "ancien_statut": ancien,
+                "statut": statut,
+            })
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la mise à jour du statut : {str(e)}"
+        )
     db.refresh(commande)
-    return commande
\ No newline at end of file
+    return commande
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Transport des événements de l'outbox : "kafka" (défaut si KAFKA_BOOTSTRAP_SERVERS
+# est défini) ou "memoire" (tests, développement local sans broker)
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS")
+OUTBOX_TRANSPORT = os.getenv("OUTBOX_TRANSPORT", "kafka" if KAFKA_BOOTSTRAP_SERVERS else "memoire")
+
+# Réglages du producteur : les messages envoyés pendant KAFKA_LINGER_MS sont
+# regroupés en lots compressés (gzip ne demande aucune dépendance en plus)
+KAFKA_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "gzip")
+KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "20"))
+KAFKA_MAX_BATCH_BYTES = int(os.getenv("KAFKA_MAX_BATCH_BYTES", str(256 * 1024)))
+
+# Messages gardés par topic par le transport en mémoire (les plus anciens sont écartés)
+OUTBOX_MEMORY_MAX = int(os.getenv("OUTBOX_MEMORY_MAX", "10000"))
+
+# (clé, valeur) : la clé choisit la partition, donc l'ordre des messages
+Message = Tuple[str, bytes]
+
+
+class Transport(ABC):
+    """Interface commune : publier() ne rend la main qu'une fois les messages acceptés."""
+
+    async def demarrer(self):
+        pass
+
+    @abstractmethod
+    async def publier(self, topic: str, messages: List[Message]):
+        ...
+
+    async def arreter(self):
+        pass
+
+
+class TransportMemoire(Transport):
+    """
+    Garde en mémoire les derniers messages publiés (OUTBOX_MEMORY_MAX par topic).
+    Rien ne sort du processus : réservé aux tests et au développement local.
+    `echecs` simule des pannes du broker.
+    """
+
+    def __init__(self, max_messages: int = OUTBOX_MEMORY_MAX):
+        self.messages = defaultdict(lambda: deque(maxlen=max_messages))
+        self.echecs = 0
+
+    async def publier(self, topic: str, messages: List[Message]):
+        if self.echecs > 0:
+            self.echecs -= 1
+            raise ConnectionError("Broker indisponible (simulé)")
+        self.messages[topic].extend(messages)
+
+
+class TransportKafka(Transport):
+    """Producteur aiokafka idempotent : acks de tous les réplicas, lots compressés."""
+
+    def __init__(self, bootstrap_servers: str):
+        self.bootstrap_servers = bootstrap_servers
+        self.producer = None
+
+    async def demarrer(self):
+        try:
+            from aiokafka import AIOKafkaProducer
+        except ImportError:
+            raise RuntimeError("Paquet 'aiokafka' manquant : événements conservés dans l'outbox")
+
+        # Nouveau producteur à chaque tentative : un démarrage échoué n'est pas réutilisable
+        producer = AIOKafkaProducer(
+            bootstrap_servers=self.bootstrap_servers,
+            compression_type=KAFKA_COMPRESSION,
+            linger_ms=KAFKA_LINGER_MS,
+            max_batch_size=KAFKA_MAX_BATCH_BYTES,
+            acks="all",
+            enable_idempotence=True,
+        )
+        try:
+            await producer.start()
+        except Exception:
+            await producer.stop()
+            raise
+        self.producer = producer
+
+    async def publier(self, topic: str, messages: List[Message]):
+        if self.producer is None:
+            await self.demarrer()
+        # send() met en file et regroupe ; on attend ensuite tous les accusés
+        envois = [await self.producer.send(topic, value=valeur, key=cle.encode()) for cle, valeur in messages]
+        await asyncio.gather(*envois)
+
+    async def arreter(self):
+        if self.producer is not None:
+            await self.producer.stop()
+            self.producer = None
+
+
+def creer_transport() -> Transport:
+    if OUTBOX_TRANSPORT == "kafka":
+        # Sans aiokafka, TransportKafka échoue à chaque tentative : les
+        # événements restent en attente dans l'outbox au lieu d'être perdus
+        return TransportKafka(KAFKA_BOOTSTRAP_SERVERS or "localhost:9092")
+    logger.warning("Outbox : transport en mémoire, les événements ne quittent pas le service")
+    return TransportMemoire()
+
+
+_transport = None
+
+
+def get_transport() -> Transport:
+    global _transport
+    if _transport is None:
+        _transport = creer_transport()
+    return _transport
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class LigneCommandeBase(BaseModel):
     produit_id: str
@@ -8,7 +8,9 @@ class LigneCommandeBase(BaseModel):
     prix_unitaire: float
 
 class LigneCommandeCreate(LigneCommandeBase):
-    pass
+    quantite: int = Field(..., gt=0)
+    # Ignoré : le prix est lu dans le service produits à la création
+    prix_unitaire: Optional[float] = None
 
 class LigneCommande(LigneCommandeBase):
     id: str
@@ -23,7 +25,9 @@ class CommandeBase(BaseModel):
     total: float
 
 class CommandeCreate(CommandeBase):
-    lignes: List[LigneCommandeCreate]
+    # Ignoré : recalculé à partir des prix du service produits
+    total: Optional[float] = None
+    lignes: List[LigneCommandeCreate] = Field(..., min_length=1)
 
 class Commande(CommandeBase):
     id: str
@@ -32,3 +36,28 @@ class Commande(CommandeBase):
 
     class Config:
         orm_mode = True
+
+
+class VentesJourStats(BaseModel):
+    jour: date
+    commandes: int
+    chiffre_affaires: float
+
+    class Config:
+        orm_mode = True
+
+class VentesProduitStats(BaseModel):
+    produit_id: str
+    quantite: int
+    chiffre_affaires: float
+    commandes: int
+
+    class Config:
+        orm_mode = True
+
+class StatutStats(BaseModel):
+    statut: str
+    commandes: int
+
+    class Config:
+        orm_mode = True
@@ -1,12 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.api.routes import router as commande_router
+from app.api.analytics import router as analytics_router, setup_analytics
+from app.api.outbox import OUTBOX_RELAY, relayer_periodiquement
+from app.api.transport import get_transport
 
 from app.models.commande import Base
+from app.models import analytics, outbox  # noqa: F401  (agrégats, événements à publier)
 from app.db.database import engine
 
 # Crée toutes les tables dans la base de données SQLite
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+# create_all ne complète pas une table existante : on ajoute les index manquants
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+# Agrégats des ventes : calculés une fois pour une base existante, puis tenus à jour
+setup_analytics(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Publication des événements de l'outbox (commandes créées, statuts modifiés)
+    relais = asyncio.create_task(relayer_periodiquement(get_transport())) if OUTBOX_RELAY else None
+    yield
+    if relais is not None:
+        relais.cancel()
+    await get_transport().arreter()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(commande_router)
+app.include_router(analytics_router)
+
+
+@app.get("/health", tags=["Health"])
+def health():
+    return {"status": "ok"}
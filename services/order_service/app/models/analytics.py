@@ -0,0 +1,31 @@
+from sqlalchemy import Column, String, Float, Date, Integer, Index
+from app.db.database import Base
+
+
+# Agrégats tenus à jour dans la transaction de chaque commande (voir app/api/analytics.py)
+
+class VentesJour(Base):
+    __tablename__ = 'analytics_ventes_jour'
+    jour = Column(Date, primary_key=True)
+    commandes = Column(Integer, nullable=False, default=0)
+    chiffre_affaires = Column(Float, nullable=False, default=0.0)
+
+
+class VentesProduit(Base):
+    __tablename__ = 'analytics_ventes_produit'
+    produit_id = Column(String(6), primary_key=True)
+    quantite = Column(Integer, nullable=False, default=0)
+    chiffre_affaires = Column(Float, nullable=False, default=0.0)
+    commandes = Column(Integer, nullable=False, default=0)
+
+    # Classements « top produits » lus directement dans l'index
+    __table_args__ = (
+        Index("ix_analytics_ventes_produit_ca", "chiffre_affaires"),
+        Index("ix_analytics_ventes_produit_quantite", "quantite"),
+    )
+
+
+class CommandesStatut(Base):
+    __tablename__ = 'analytics_commandes_statut'
+    statut = Column(String(50), primary_key=True)
+    commandes = Column(Integer, nullable=False, default=0)
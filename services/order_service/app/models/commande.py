@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base  # <- Utilise le Base du fichier database.py
 import datetime
@@ -18,11 +18,17 @@ class Commande(Base):
     total = Column(Float, nullable=False)
     lignes = relationship('LigneCommande', back_populates='commande', cascade='all, delete-orphan')
 
+    # Historique d'un utilisateur, du plus récent au plus ancien (pagination keyset)
+    __table_args__ = (
+        Index("ix_commandes_utilisateur_date_id", "utilisateur_id", "date_commande", "id"),
+        Index("ix_commandes_date_id", "date_commande", "id"),
+    )
+
 
 class LigneCommande(Base):
     __tablename__ = 'ligne_commandes'
     id = Column(String(6), primary_key=True, default=generate_id)
-    commande_id = Column(String(6), ForeignKey('commandes.id', ondelete='CASCADE'), nullable=False)
+    commande_id = Column(String(6), ForeignKey('commandes.id', ondelete='CASCADE'), nullable=False, index=True)
     produit_id = Column(String(6), nullable=False)
     quantite = Column(Integer, nullable=False)
     prix_unitaire = Column(Float, nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, Index, text
+from app.db.database import Base
+import datetime
+
+
+class EvenementOutbox(Base):
+    """
+    Événement métier écrit dans la même transaction que la commande, puis
+    publié par le relais (app/api/outbox.py). L'id croissant fixe l'ordre.
+    """
+    __tablename__ = 'outbox'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    evenement_id = Column(String(32), nullable=False, unique=True)  # clé de déduplication côté consommateur
+    topic = Column(String(50), nullable=False)
+    cle = Column(String(50), nullable=False)  # partition Kafka : ordre garanti par commande
+    type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    cree_le = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    publie_le = Column(DateTime, nullable=True)
+    tentatives = Column(Integer, nullable=False, default=0)
+    derniere_erreur = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Seuls les événements en attente sont indexés : le relais les lit sans parcourir l'historique
+        Index("ix_outbox_a_publier", "id", sqlite_where=text("publie_le IS NULL")),
+        Index("ix_outbox_publie_le", "publie_le"),
+    )
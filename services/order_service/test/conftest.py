@@ -1,10 +1,21 @@
 # tests/conftest.py
 
+import os
+import sys
+
+# Code partagé entre services (services/common)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Relais de l'outbox désactivé : les tests le déclenchent eux-mêmes
+os.environ["OUTBOX_RELAY"] = "0"
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.api.catalogue import Catalogue, get_catalogue
 from app.db.database import Base
 from app.main import app
 from app.models.commande import Commande, LigneCommande
@@ -17,9 +28,23 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Prix renvoyés par le faux service produits
+PRIX_PRODUITS = {"prod_456": 100.0, "prod_789": 19.99}
+
+
+def produits_lot(request: httpx.Request) -> httpx.Response:
+    ids = request.url.params["ids"].split(",")
+    return httpx.Response(200, json={
+        "produits": {pid: {"id": pid, "prix": PRIX_PRODUITS[pid]} if pid in PRIX_PRODUITS else None for pid in ids},
+        "manquants": [pid for pid in ids if pid not in PRIX_PRODUITS],
+    })
+
+
 @pytest.fixture(scope="module")
 def client():
     Base.metadata.create_all(bind=engine)
+    catalogue = Catalogue(base_url="http://produits", transport=httpx.MockTransport(produits_lot))
+    app.dependency_overrides[get_catalogue] = lambda: catalogue
     with TestClient(app) as c:
         yield c
 
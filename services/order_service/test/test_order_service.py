@@ -1,9 +1,15 @@
 # tests/test_order_service.py
 
+import asyncio
+import json
+import uuid
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.api.outbox import relayer_une_fois
+from app.api.transport import TransportKafka, TransportMemoire
 from app.db.schemas import CommandeCreate, LigneCommandeCreate
 from app.models.commande import Commande
 
@@ -85,4 +91,129 @@ def test_update_statut_commande(client: TestClient, db_session: Session):
     response = client.put(f"/commande/{commande.id}/statut", json={"statut": new_statut})
     assert response.status_code == 200
     data = response.json()
-    assert data["statut"] == new_statut
\ No newline at end of file
+    assert data["statut"] == new_statut
+
+def test_create_commande_prix_serveur(client: TestClient):
+    # Prix et total envoyés par le client ignorés : ceux du service produits font foi
+    commande_data = {
+        "utilisateur_id": "user_123",
+        "total": 1.0,
+        "lignes": [
+            {"produit_id": "prod_456", "quantite": 1, "prix_unitaire": 0.5},
+            {"produit_id": "prod_789", "quantite": 3, "prix_unitaire": 0.5}
+        ]
+    }
+
+    response = client.post("/commande/", json=commande_data)
+    assert response.status_code == 201
+    data = response.json()
+    assert data["total"] == 159.97
+    assert {l["produit_id"]: l["prix_unitaire"] for l in data["lignes"]} == {"prod_456": 100.0, "prod_789": 19.99}
+
+    commande_data["lignes"].append({"produit_id": "inconnu", "quantite": 1})
+    response = client.post("/commande/", json=commande_data)
+    assert response.status_code == 400
+
+
+def test_historique_pagine(client: TestClient):
+    utilisateur_id = uuid.uuid4().hex[:6]
+    ids = [
+        client.post("/commande/", json={
+            "utilisateur_id": utilisateur_id,
+            "lignes": [{"produit_id": "prod_456", "quantite": 1}]
+        }).json()["id"]
+        for _ in range(3)
+    ]
+
+    response = client.get(f"/commande/utilisateur/{utilisateur_id}", params={"limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page) == 2 and all(len(c["lignes"]) == 1 for c in page)
+
+    curseur = response.headers["X-Next-Cursor"]
+    response = client.get(f"/commande/utilisateur/{utilisateur_id}", params={"limit": 2, "curseur": curseur})
+    assert "X-Next-Cursor" not in response.headers
+    assert sorted(c["id"] for c in page + response.json()) == sorted(ids)
+
+
+def test_analytics_mis_a_jour(client: TestClient):
+    def ventes_produit(produit_id):
+        top = client.get("/analytics/produits", params={"limit": 100}).json()
+        return next((p for p in top if p["produit_id"] == produit_id), {"quantite": 0, "commandes": 0})
+
+    def statuts():
+        return {s["statut"]: s["commandes"] for s in client.get("/analytics/statuts").json()}
+
+    avant, statuts_avant = ventes_produit("prod_789"), statuts()
+    commande = client.post("/commande/", json={
+        "utilisateur_id": "user_123",
+        "lignes": [{"produit_id": "prod_789", "quantite": 2}, {"produit_id": "prod_789", "quantite": 1}]
+    }).json()
+    client.put(f"/commande/{commande['id']}/statut", params={"statut": "expediee"})
+
+    apres, statuts_apres = ventes_produit("prod_789"), statuts()
+    assert apres["quantite"] == avant["quantite"] + 3
+    assert apres["commandes"] == avant["commandes"] + 1
+    assert statuts_apres["expediee"] == statuts_avant.get("expediee", 0) + 1
+    assert statuts_apres.get("en_attente", 0) == statuts_avant.get("en_attente", 0)
+
+
+def test_outbox_publie_evenements(client: TestClient):
+    commande = client.post("/commande/", json={
+        "utilisateur_id": "user_123",
+        "lignes": [{"produit_id": "prod_456", "quantite": 1}]
+    }).json()
+    client.put(f"/commande/{commande['id']}/statut", params={"statut": "payee"})
+
+    # Broker en panne : le lot reste en attente puis part au passage suivant
+    transport = TransportMemoire()
+    transport.echecs = 1
+    with pytest.raises(ConnectionError):
+        asyncio.run(relayer_une_fois(transport))
+    while asyncio.run(relayer_une_fois(transport)):
+        pass
+
+    evenements = [json.loads(valeur) for cle, valeur in transport.messages["orders"] if cle == commande["id"]]
+    assert [e["type"] for e in evenements] == ["commande.creee", "commande.statut_modifie"]
+    assert evenements[0]["donnees"]["total"] == 100.0
+    assert evenements[1]["donnees"]["statut"] == "payee"
+
+
+def test_outbox_kafka_indisponible(client: TestClient):
+    commande = client.post("/commande/", json={
+        "utilisateur_id": "user_123",
+        "lignes": [{"produit_id": "prod_456", "quantite": 1}]
+    }).json()
+
+    # aiokafka absent ou broker injoignable : rien n'est marqué publié
+    with pytest.raises(Exception):
+        asyncio.run(relayer_une_fois(TransportKafka("localhost:1")))
+
+    transport = TransportMemoire()
+    while asyncio.run(relayer_une_fois(transport)):
+        pass
+    assert any(cle == commande["id"] for cle, _ in transport.messages["orders"])
+
+
+def test_export_par_pages(client: TestClient, monkeypatch):
+    # Pages de 2 commandes : chacune lue dans sa propre transaction
+    monkeypatch.setattr("app.api.export.PAGE_SIZE", 2)
+    utilisateur_id = uuid.uuid4().hex[:6]
+    ids = [
+        client.post("/commande/", json={
+            "utilisateur_id": utilisateur_id,
+            "lignes": [{"produit_id": "prod_456", "quantite": 1}, {"produit_id": "prod_789", "quantite": 2}]
+        }).json()["id"]
+        for _ in range(3)
+    ]
+
+    response = client.get("/commande/admin/export")
+    assert response.status_code == 200
+    commandes = [json.loads(ligne) for ligne in response.text.splitlines()]
+    exportees = [c["id"] for c in commandes]
+    assert exportees == sorted(set(exportees))
+    assert all(len(c["lignes"]) == 2 for c in commandes if c["id"] in ids)
+
+    lignes = client.get("/commande/admin/export", params={"format": "csv"}).text.splitlines()
+    assert lignes[0].startswith("commande_id,")
+    assert sum(1 for ligne in lignes if ligne.split(",")[1] == utilisateur_id) == 6
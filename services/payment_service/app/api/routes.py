@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 
 import uuid
 from app.models.paiement import Paiement
 from app.db.schemas import PaiementCreate, PaiementOut
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db
+from common.export import EXPORT_FORMAT_PATTERN, export_table
 
 router = APIRouter(prefix="/paiements", tags=["Paiements"])
 
@@ -72,6 +74,20 @@ def get_all_paiements(db: Session = Depends(get_db)):
     return db.query(Paiement).all()
 
 
+# ---------------------------
+# 📤 Exporter tous les paiements
+# ---------------------------
+
+@router.get("/export")
+def export_paiements(fmt: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """
+    Exporte tous les paiements en NDJSON ou CSV, envoyés au fil de la lecture
+    de la base (mémoire constante, premier octet immédiat).
+    """
+    stmt = select(*Paiement.__table__.columns)
+    return export_table(SessionLocal, stmt, Paiement.id, fmt, "paiements")
+
+
 # ---------------------------
 # 🔍 Obtenir un paiement par ID
 # ---------------------------
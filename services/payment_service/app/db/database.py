@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 # URL de connexion SQLite (un service, une base de données)
@@ -8,6 +8,19 @@ DATABASE_URL = "sqlite:///./paiement.db"
 # Création de l'moteur de base de données
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL : les lectures (exports compris) ne bloquent pas les écritures, et
+    # une écriture concurrente attend le verrou au lieu d'échouer aussitôt
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+
 # Création de la factory de sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
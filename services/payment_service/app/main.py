@@ -11,3 +11,8 @@ app = FastAPI(title="Microservice Paiement")
 
 # Inclure le routeur principal du service paiement
 app.include_router(router)
+
+
+@app.get("/health", tags=["Health"])
+def health():
+    return {"status": "ok"}
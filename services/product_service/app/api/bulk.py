@@ -0,0 +1,259 @@
+import csv
+import json
+import uuid
+from collections import deque
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db import schemas
+from app.db.database import get_db
+from app.models.produit import Produit
+
+router = APIRouter(prefix="/produits", tags=["Produits"])
+
+# Lignes par transaction : une seule requête préparée, exécutée en executemany
+BATCH_SIZE = 500
+# Le rapport ne détaille que les premières erreurs (mémoire bornée)
+MAX_REPORTED_ERRORS = 100
+# Taille maximale d'une ligne, et d'un enregistrement CSV sur plusieurs lignes
+MAX_LINE_BYTES = 64 * 1024
+MAX_RECORD_BYTES = 64 * 1024
+
+UPSERT_COLUMNS = list(schemas.ProduitBase.model_fields)
+
+
+def build_upsert():
+    """
+    INSERT ... ON CONFLICT(id) DO UPDATE : crée ou remplace chaque produit.
+    Le prix importé devient le prix de base : la campagne ou la remise
+    manuelle en cours est détachée, sa fin ne rétablira pas l'ancien prix.
+    """
+    stmt = insert(Produit)
+    set_ = {column: stmt.excluded[column] for column in UPSERT_COLUMNS}
+    set_.update(prix_original=None, promotion_id=None, promotion_manuelle=None)
+    return stmt.on_conflict_do_update(index_elements=[Produit.id], set_=set_)
+
+
+UPSERT = build_upsert()
+
+
+async def iter_lines(stream):
+    """
+    Découpe le corps reçu en lignes, sans jamais le charger en entier.
+    Une ligne de plus de MAX_LINE_BYTES est remplacée par None et son
+    contenu ignoré jusqu'au saut de ligne suivant.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in stream:
+        if b"\n" not in chunk:
+            buffer += chunk
+        else:
+            *lines, rest = (buffer + chunk).split(b"\n")
+            buffer = rest
+            for line in lines:
+                if skipping:
+                    skipping = False
+                elif len(line) > MAX_LINE_BYTES:
+                    yield None
+                else:
+                    yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            if not skipping:
+                yield None
+            skipping = True
+            buffer = b""
+    if buffer and not skipping:
+        yield buffer
+
+
+class CsvRecords:
+    """
+    Regroupe les lignes CSV en enregistrements : un champ entre guillemets
+    peut s'étendre sur plusieurs lignes. Le décompte des guillemets est
+    incrémental, et un enregistrement est analysé une seule fois.
+    Au-delà de MAX_RECORD_BYTES (guillemet isolé), l'enregistrement est
+    rejeté et la lecture reprend à la ligne qui suit son début.
+    """
+
+    def __init__(self):
+        self.header = None
+        self.reset()
+
+    def reset(self):
+        self.pending = []  # (numéro, ligne)
+        self.size = 0
+        self.quotes = 0
+
+    def parse(self):
+        start = self.pending[0][0]
+        text = "\n".join(line for _, line in self.pending)
+        self.reset()
+        if not text.strip():
+            return None
+        values = next(csv.reader([text]))
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+        if len(values) != len(self.header):
+            return start, None, f"{len(values)} colonnes au lieu de {len(self.header)}"
+        # Cellule vide = valeur absente
+        return start, {k: (v if v != "" else None) for k, v in zip(self.header, values)}, None
+
+    def rejeter(self, message: str, todo: deque) -> tuple:
+        start = self.pending[0][0]
+        todo.extendleft(reversed(self.pending[1:]))
+        self.reset()
+        return start, None, message
+
+    def feed(self, numero: int, line: str) -> list:
+        """Retourne les (numéro de ligne, données, erreur) complétés par cette ligne."""
+        results = []
+        todo = deque([(numero, line)])
+        while todo:
+            numero, line = todo.popleft()
+            self.pending.append((numero, line))
+            self.size += len(line) + 1
+            self.quotes += line.count('"')
+            if self.size > MAX_RECORD_BYTES:
+                results.append(self.rejeter("Enregistrement trop long (guillemet non fermé ?)", todo))
+            elif self.quotes % 2 == 0:
+                record = self.parse()
+                if record is not None:
+                    results.append(record)
+        return results
+
+    def finish(self) -> list:
+        results = []
+        while self.pending:
+            todo = deque()
+            results.append(self.rejeter("Guillemet non fermé", todo))
+            for numero, line in todo:
+                results.extend(self.feed(numero, line))
+        return results
+
+
+async def iter_records(stream, fmt: str):
+    """
+    Produit (numéro de ligne, données, erreur) pour chaque enregistrement.
+    CSV : la première ligne donne les colonnes.
+    """
+    records = CsvRecords()
+    numero = 0
+    async for raw in iter_lines(stream):
+        numero += 1
+        if raw is None:
+            yield numero, None, f"Ligne trop longue (plus de {MAX_LINE_BYTES} octets)"
+            continue
+        try:
+            line = raw.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            yield numero, None, "Encodage invalide (UTF-8 attendu)"
+            continue
+        if numero == 1:
+            line = line.lstrip("\ufeff")
+
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                yield numero, json.loads(line), None
+            except ValueError as e:
+                yield numero, None, f"JSON invalide : {e}"
+            continue
+
+        for record in records.feed(numero, line):
+            yield record
+
+    for record in records.finish():
+        yield record
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc']) or 'ligne'} : {e['msg']}" for e in error.errors()
+    )
+
+
+def upsert_batch(db: Session, batch: list) -> list:
+    """
+    Écrit un lot en une transaction. Si le lot échoue, il est rejoué ligne
+    par ligne (savepoints) pour isoler les lignes fautives.
+    Retourne la liste des (numéro de ligne, erreur).
+    """
+    try:
+        db.execute(UPSERT, [row for _, row in batch])
+        db.commit()
+        return []
+    except SQLAlchemyError:
+        db.rollback()
+
+    erreurs = []
+    for numero, row in batch:
+        try:
+            with db.begin_nested():
+                db.execute(UPSERT, [row])
+        except SQLAlchemyError as e:
+            erreurs.append((numero, str(getattr(e, "orig", e))))
+    db.commit()
+    return erreurs
+
+
+@router.post("/import", response_model=schemas.ImportResultat)
+async def import_produits(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Import en masse d'un catalogue (NDJSON ou CSV), lu au fil de l'eau :
+    - une ligne = un produit ; avec un `id` existant, le produit est remplacé
+    - `format`: `ndjson` ou `csv` (défaut : d'après le Content-Type)
+    - les lignes invalides sont signalées sans interrompre l'import
+    """
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    resultat = {"lignes": 0, "importes": 0, "erreurs": 0, "details": []}
+
+    def signaler(numero: int, message: str):
+        resultat["erreurs"] += 1
+        if len(resultat["details"]) < MAX_REPORTED_ERRORS:
+            resultat["details"].append({"ligne": numero, "erreur": message})
+
+    async def flush(batch: list):
+        erreurs = await run_in_threadpool(upsert_batch, db, batch)
+        resultat["importes"] += len(batch) - len(erreurs)
+        for numero, message in erreurs:
+            signaler(numero, message)
+
+    batch = []
+    async for numero, data, message in iter_records(request.stream(), fmt):
+        resultat["lignes"] += 1
+        if message is None:
+            try:
+                produit = schemas.ProduitImport.model_validate(data)
+            except ValidationError as e:
+                message = format_validation_error(e)
+        if message is not None:
+            signaler(numero, message)
+            continue
+
+        row = produit.model_dump()
+        # Identifiant long : les identifiants courts de create_produit
+        # entreraient en collision sur des centaines de milliers de lignes
+        row["id"] = row["id"] or str(uuid.uuid4())
+        batch.append((numero, row))
+        if len(batch) >= BATCH_SIZE:
+            await flush(batch)
+            batch = []
+
+    if batch:
+        await flush(batch)
+    return resultat
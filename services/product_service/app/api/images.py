@@ -0,0 +1,143 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# Tailles servies (plus grand côté, en pixels). "full" est publiée sous le nom
+# de l'original (<hash>.<ext>) ; les autres sont écrites à côté.
+VARIANTES = {"thumb": 200, "card": 480, "full": 1200}
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+# Traitements d'image dans des processus séparés : Pillow ne bloque plus la
+# boucle d'événements. Au-delà de IMAGE_QUEUE travaux, les appels attendent.
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUEUE = IMAGE_WORKERS * 4
+
+_pool = None
+_slots = None
+_en_cours = {}
+
+
+def nom_variante(filename: str, taille: str, webp: bool = False) -> str:
+    """Nom du fichier d'une variante : photo.jpg -> photo_card.jpg, photo_card.webp"""
+    stem, ext = filename.rsplit(".", 1)
+    if taille == "full":
+        return f"{stem}.webp" if webp else filename
+    return f"{stem}_{taille}.{'webp' if webp else ext}"
+
+
+def chemins_variantes(chemin: str) -> list:
+    dossier, filename = os.path.split(chemin)
+    return [
+        os.path.join(dossier, nom_variante(filename, taille, webp))
+        for taille in VARIANTES
+        for webp in (False, True)
+    ]
+
+
+def temporaire(chemin: str) -> str:
+    """Nom caché (jamais servi) où un fichier est écrit avant d'être renommé."""
+    dossier, nom = os.path.split(chemin)
+    return os.path.join(dossier, f".{nom}.tmp")
+
+
+def _ecrire(img: Image.Image, chemin: str, format_image: str):
+    if format_image == "WEBP":
+        img.save(chemin, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif format_image == "JPEG":
+        img.convert("RGB").save(chemin, "JPEG", optimize=True, quality=JPEG_QUALITY)
+    else:
+        img.save(chemin, format_image, optimize=True)
+
+
+def _enregistrer(img: Image.Image, chemin: str, format_image: str):
+    # Écriture dans un fichier temporaire puis renommage : un lecteur ne voit
+    # jamais une variante à moitié écrite
+    if os.path.exists(chemin):
+        return
+    tmp = temporaire(chemin)
+    _ecrire(img, tmp, format_image)
+    os.replace(tmp, chemin)
+
+
+def generer_variantes(chemin: str, source: str = None):
+    """
+    Exécuté dans un processus du pool : produit chaque variante manquante, au
+    format d'origine et en WebP. Un fichier déjà présent n'est jamais réécrit :
+    son URL est servie comme immuable.
+
+    Nouvel upload (`source`, fichier temporaire) : l'image "full" est publiée
+    sous `chemin` en dernier, par renommage atomique, une fois les variantes
+    prêtes. Sans `source` (image plus ancienne que ses variantes), `chemin`
+    reste tel quel et sert de variante "full" au format d'origine.
+    """
+    dossier, filename = os.path.split(chemin)
+    publication = None
+    with Image.open(source or chemin) as img:
+        img.load()
+        format_origine = img.format
+        taille_origine = img.size
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+        # De la plus grande à la plus petite : chaque réduction part de la précédente
+        for taille, cote in sorted(VARIANTES.items(), key=lambda item: -item[1]):
+            img.thumbnail((cote, cote))
+            if taille != "full":
+                _enregistrer(img, os.path.join(dossier, nom_variante(filename, taille)), format_origine)
+            elif source is not None:
+                # Original déjà assez petit : il est publié tel quel
+                publication = source
+                if img.size != taille_origine:
+                    publication = temporaire(chemin)
+                    _ecrire(img, publication, format_origine)
+            _enregistrer(img, os.path.join(dossier, nom_variante(filename, taille, webp=True)), "WEBP")
+    if publication is not None:
+        os.replace(publication, chemin)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+async def traiter_image(chemin: str, source: str = None):
+    """Génère les variantes d'une image dans le pool de processus."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(IMAGE_QUEUE)
+    async with _slots:
+        await asyncio.get_running_loop().run_in_executor(get_pool(), generer_variantes, chemin, source)
+
+
+async def assurer_variantes(chemin: str, source: str = None):
+    """
+    Génère les variantes manquantes, une seule fois même si plusieurs requêtes
+    (uploads du même contenu, lectures) les demandent en même temps : toutes
+    attendent le même traitement. Avec `source`, publie aussi `chemin` (voir
+    generer_variantes) ; l'appelant supprime `source` s'il n'a pas servi.
+    """
+    if os.path.exists(chemin):
+        source = None
+    elif source is None:
+        task = _en_cours.get(chemin)
+        if task is not None:
+            await asyncio.shield(task)
+        return
+    if source is None and all(os.path.exists(p) for p in chemins_variantes(chemin)):
+        return
+    task = _en_cours.get(chemin)
+    if task is None:
+        task = _en_cours[chemin] = asyncio.ensure_future(traiter_image(chemin, source))
+        task.add_done_callback(lambda t: _en_cours.pop(chemin, None))
+    await asyncio.shield(task)
+
+
+def fermer_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
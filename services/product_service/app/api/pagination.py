@@ -0,0 +1,74 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+from app.models.produit import Produit
+
+# Tris stables : l'id départage les produits de même prix
+TRIS = {
+    "id": (Produit.id.asc(),),
+    "prix": (Produit.prix.asc(), Produit.id.asc()),
+    "-prix": (Produit.prix.desc(), Produit.id.desc()),
+}
+TRI_PATTERN = "^(id|prix|-prix)$"
+
+# En-tête portant le jeton de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(tri: str, produit: Produit) -> str:
+    """Jeton opaque désignant la position juste après `produit` dans le tri."""
+    payload = {"t": tri, "i": produit.id}
+    if tri != "id":
+        payload["p"] = produit.prix
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(tri: str, curseur: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        payload = json.loads(raw)
+        if payload["t"] != tri or (tri != "id" and not isinstance(payload["p"], (int, float))):
+            raise ValueError(tri)
+        return payload
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide pour ce tri"
+        )
+
+
+def keyset_filter(tri: str, payload: dict):
+    """Condition « après la position du curseur », servie par les index (prix, id)."""
+    last_id = payload["i"]
+    if tri == "id":
+        return Produit.id > last_id
+    last_prix = payload["p"]
+    if tri == "prix":
+        return or_(Produit.prix > last_prix, and_(Produit.prix == last_prix, Produit.id > last_id))
+    return or_(Produit.prix < last_prix, and_(Produit.prix == last_prix, Produit.id < last_id))
+
+
+def paginate(query, tri: str, limit: int, offset: int = 0, curseur: str = None):
+    """
+    Applique le tri et la pagination à une requête select() de produits.
+    Avec un curseur, la page commence après la dernière ligne vue (keyset) :
+    le coût ne dépend plus de la profondeur, contrairement à offset.
+    Une ligne de plus est lue pour savoir s'il existe une page suivante.
+    """
+    if curseur:
+        query = query.filter(keyset_filter(tri, decode_cursor(tri, curseur))).order_by(*TRIS[tri])
+    else:
+        query = query.order_by(*TRIS[tri]).offset(offset)
+    return query.limit(limit + 1)
+
+
+def next_page(produits: list, tri: str, limit: int):
+    """Retourne (produits de la page, curseur de la page suivante ou None)."""
+    if len(produits) > limit:
+        produits = produits[:limit]
+        return produits, encode_cursor(tri, produits[-1])
+    return produits, None
@@ -0,0 +1,238 @@
+import asyncio
+import datetime
+import json
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.db import schemas
+from app.db.database import SessionLocal, get_db
+from app.models.produit import Produit
+from app.models.promotion import Promotion
+
+router = APIRouter(prefix="/promotions", tags=["Promotions"])
+
+# Fréquence d'activation / fin des campagnes planifiées (secondes)
+PROMO_SCHEDULER_INTERVAL = float(os.getenv("PROMO_SCHEDULER_INTERVAL", "30"))
+
+
+def maintenant() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def changer_statut(db: Session, promotion_id: str, avant: str, apres: str) -> bool:
+    """Transition conditionnelle : une seule requête (API ou planificateur) l'emporte."""
+    result = db.execute(
+        update(Promotion)
+        .where(Promotion.id == promotion_id, Promotion.statut == avant)
+        .values(statut=apres)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def appliquer(db: Session, promotion: Promotion) -> int:
+    """
+    Un seul UPDATE pour toute la cible. La remise part toujours de prix_original :
+    réappliquer ou enchaîner des campagnes ne cumule pas les réductions.
+    """
+    if promotion.categorie:
+        cible = Produit.categorie == promotion.categorie
+    else:
+        # Liste transmise en un seul paramètre JSON, quelle que soit sa taille
+        ids = func.json_each(promotion.produit_ids).table_valued("value")
+        cible = Produit.id.in_(select(ids.c.value))
+    base = func.coalesce(Produit.prix_original, Produit.prix)
+    result = db.execute(
+        update(Produit)
+        .where(cible)
+        .values(
+            prix_original=base,
+            prix=func.round(base * (100 - promotion.pourcentage) / 100.0, 2),
+            promotion=promotion.pourcentage,
+            promotion_id=promotion.id,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def retirer(db: Session, promotion_id: str) -> int:
+    """
+    Retire la campagne des produits qu'elle remise encore, en un seul UPDATE.
+    Chaque produit reprend la plus récente autre campagne active qui le cible,
+    sinon sa remise manuelle (/promo), sinon son prix d'origine.
+    """
+    autre = aliased(Promotion)
+    ids = func.json_each(autre.produit_ids).table_valued("value")
+    remplacante = (
+        select(autre)
+        .where(
+            autre.statut == "active",
+            autre.id != promotion_id,
+            or_(autre.categorie == Produit.categorie, Produit.id.in_(select(ids.c.value))),
+        )
+        .order_by(autre.debut.desc(), autre.cree_le.desc())
+        .limit(1)
+        .correlate(Produit)
+    )
+    remplacante_id = remplacante.with_only_columns(autre.id).scalar_subquery()
+    pourcentage = func.coalesce(
+        remplacante.with_only_columns(autre.pourcentage).scalar_subquery(),
+        Produit.promotion_manuelle,
+    )
+    base = func.coalesce(Produit.prix_original, Produit.prix)
+    result = db.execute(
+        update(Produit)
+        .where(Produit.promotion_id == promotion_id)
+        .values(
+            promotion_id=remplacante_id,
+            promotion=pourcentage,
+            prix=case(
+                (pourcentage.is_(None), base),
+                else_=func.round(base * (100 - pourcentage) / 100.0, 2),
+            ),
+            prix_original=case((pourcentage.is_(None), None), else_=base),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def activer(db: Session, promotion: Promotion) -> bool:
+    if not changer_statut(db, promotion.id, "planifiee", "active"):
+        return False
+    promotion.produits = appliquer(db, promotion)
+    db.commit()
+    return True
+
+
+def terminer(db: Session, promotion: Promotion, statut: str = "terminee") -> bool:
+    if not changer_statut(db, promotion.id, "active", statut):
+        return False
+    retirer(db, promotion.id)
+    db.commit()
+    return True
+
+
+def planifier(db: Session) -> int:
+    """Active les campagnes arrivées à échéance et termine celles qui expirent."""
+    now = maintenant()
+    changements = 0
+    a_activer = db.query(Promotion).filter(
+        Promotion.statut == "planifiee", Promotion.debut <= now,
+        or_(Promotion.fin.is_(None), Promotion.fin > now)
+    ).order_by(Promotion.debut).all()
+    for promotion in a_activer:
+        changements += activer(db, promotion)
+
+    a_terminer = db.query(Promotion).filter(
+        Promotion.statut.in_(("planifiee", "active")), Promotion.fin <= now
+    ).all()
+    for promotion in a_terminer:
+        # Fenêtre déjà passée sans avoir été activée : rien à retirer
+        if changer_statut(db, promotion.id, "planifiee", "terminee"):
+            db.commit()
+            changements += 1
+        else:
+            changements += terminer(db, promotion)
+    return changements
+
+
+def planifier_session():
+    db = SessionLocal()
+    try:
+        planifier(db)
+    finally:
+        db.close()
+
+
+async def planifier_periodiquement():
+    """Tâche de fond : applique et retire les campagnes selon leur fenêtre."""
+    while True:
+        try:
+            await run_in_threadpool(planifier_session)
+        except Exception as e:
+            print(f"⚠ Planification des promotions impossible : {e}")
+        await asyncio.sleep(PROMO_SCHEDULER_INTERVAL)
+
+
+def get_promotion_or_404(db: Session, promotion_id: str) -> Promotion:
+    promotion = db.query(Promotion).filter(Promotion.id == promotion_id).first()
+    if not promotion:
+        raise HTTPException(status_code=404, detail="Promotion introuvable")
+    return promotion
+
+
+@router.post("/", response_model=schemas.PromotionOut, status_code=status.HTTP_201_CREATED)
+def creer_promotion(demande: schemas.PromotionCreate, db: Session = Depends(get_db)):
+    """
+    Remise sur toute une catégorie (`categorie`) ou une liste de produits
+    (`produit_ids`), en un seul UPDATE :
+    - appliquée tout de suite, ou à `debut` si la date est future
+    - retirée automatiquement à `fin`, ou par /promotions/{id}/annuler
+    Un produit déjà en promotion passe à la dernière campagne appliquée.
+    """
+    if bool(demande.categorie) == bool(demande.produit_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indiquez soit une catégorie, soit une liste de produits"
+        )
+    debut = demande.debut or maintenant()
+    if demande.fin is not None and demande.fin <= debut:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fin de la promotion doit suivre son début"
+        )
+
+    promotion = Promotion(
+        pourcentage=demande.pourcentage,
+        categorie=demande.categorie,
+        produit_ids=json.dumps(demande.produit_ids) if demande.produit_ids else None,
+        debut=debut,
+        fin=demande.fin,
+    )
+    try:
+        db.add(promotion)
+        db.commit()
+        if debut <= maintenant():
+            activer(db, promotion)
+        db.refresh(promotion)
+        return promotion
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la création de la promotion: {str(e)}"
+        )
+
+
+@router.get("/", response_model=List[schemas.PromotionOut])
+def get_promotions(statut: str = None, db: Session = Depends(get_db)):
+    """Liste les campagnes, éventuellement filtrées par statut"""
+    query = db.query(Promotion)
+    if statut:
+        query = query.filter(Promotion.statut == statut)
+    return query.order_by(Promotion.debut.desc()).all()
+
+
+@router.get("/{promotion_id}", response_model=schemas.PromotionOut)
+def get_promotion(promotion_id: str, db: Session = Depends(get_db)):
+    """Récupère une campagne et son statut"""
+    return get_promotion_or_404(db, promotion_id)
+
+
+@router.post("/{promotion_id}/annuler", response_model=schemas.PromotionOut)
+def annuler_promotion(promotion_id: str, db: Session = Depends(get_db)):
+    """Annule une campagne : les prix d'origine sont rétablis en un seul UPDATE"""
+    promotion = get_promotion_or_404(db, promotion_id)
+    if not terminer(db, promotion, "annulee"):
+        # Pas encore active : rien à rétablir. Déjà terminée : rien à faire.
+        changer_statut(db, promotion_id, "planifiee", "annulee")
+        db.commit()
+    db.refresh(promotion)
+    return promotion
@@ -0,0 +1,185 @@
+import asyncio
+import datetime
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db import schemas
+from app.db.database import SessionLocal, get_db
+from app.models.produit import Produit
+from app.models.reservation import Reservation, ReservationLigne
+
+router = APIRouter(prefix="/reservations", tags=["Réservations"])
+
+# Fréquence de libération des réservations expirées (secondes)
+SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
+SWEEP_BATCH = 500
+
+
+def maintenant() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def terminer(db: Session, reservation_id: str, statut: str, *conditions) -> bool:
+    """
+    Fait passer une réservation active à `statut`. L'UPDATE conditionnel garantit
+    qu'une seule requête l'emporte (confirmation contre libération ou expiration).
+    """
+    result = db.execute(
+        update(Reservation)
+        .where(Reservation.id == reservation_id, Reservation.statut == "active", *conditions)
+        .values(statut=statut)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def rendre_stock(db: Session, reservation_id: str):
+    lignes = db.query(ReservationLigne.produit_id, ReservationLigne.quantite).filter(
+        ReservationLigne.reservation_id == reservation_id
+    )
+    for produit_id, quantite in lignes.all():
+        db.execute(
+            update(Produit)
+            .where(Produit.id == produit_id)
+            .values(stock=Produit.stock + quantite)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def liberer_expirees(db: Session) -> int:
+    """Rend le stock des réservations actives arrivées à échéance ; retourne leur nombre."""
+    expirees = db.query(Reservation.id).filter(
+        Reservation.statut == "active", Reservation.expire_le <= maintenant()
+    ).limit(SWEEP_BATCH).all()
+    liberees = 0
+    for (reservation_id,) in expirees:
+        if terminer(db, reservation_id, "expiree"):
+            rendre_stock(db, reservation_id)
+            liberees += 1
+    db.commit()
+    return liberees
+
+
+def balayer():
+    db = SessionLocal()
+    try:
+        while liberer_expirees(db) == SWEEP_BATCH:
+            pass
+    finally:
+        db.close()
+
+
+async def balayer_periodiquement():
+    """Tâche de fond : libère régulièrement les réservations expirées."""
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        try:
+            await run_in_threadpool(balayer)
+        except Exception as e:
+            print(f"⚠ Libération des réservations expirées impossible : {e}")
+
+
+def get_reservation_or_404(db: Session, reservation_id: str) -> Reservation:
+    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    if not reservation:
+        raise HTTPException(status_code=404, detail="Réservation introuvable")
+    return reservation
+
+
+@router.post("/", response_model=schemas.ReservationOut, status_code=status.HTTP_201_CREATED)
+def reserver(demande: schemas.ReservationCreate, db: Session = Depends(get_db)):
+    """
+    Réserve le stock d'un panier entier, ou rien :
+    - un UPDATE conditionnel par produit (`stock >= quantité`), sans lecture préalable,
+      donc pas de survente même avec des paniers concurrents sur le même produit
+    - le stock est rendu à la libération ou à l'expiration (`ttl` en secondes)
+    """
+    quantites = {}
+    for ligne in demande.lignes:
+        quantites[ligne.produit_id] = quantites.get(ligne.produit_id, 0) + ligne.quantite
+
+    try:
+        insuffisants = []
+        # Ordre fixe des produits : les transactions concurrentes ne se croisent pas
+        for produit_id in sorted(quantites):
+            result = db.execute(
+                update(Produit)
+                .where(Produit.id == produit_id, Produit.stock >= quantites[produit_id])
+                .values(stock=Produit.stock - quantites[produit_id])
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                insuffisants.append(produit_id)
+
+        if insuffisants:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Stock insuffisant ou produit introuvable : {', '.join(insuffisants)}"
+            )
+
+        reservation = Reservation(
+            expire_le=maintenant() + datetime.timedelta(seconds=demande.ttl),
+            lignes=[ReservationLigne(produit_id=p, quantite=q) for p, q in quantites.items()]
+        )
+        db.add(reservation)
+        db.commit()
+        db.refresh(reservation)
+        return reservation
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la réservation: {str(e)}"
+        )
+
+
+@router.get("/{reservation_id}", response_model=schemas.ReservationOut)
+def get_reservation(reservation_id: str, db: Session = Depends(get_db)):
+    """Récupère une réservation et son statut"""
+    return get_reservation_or_404(db, reservation_id)
+
+
+@router.post("/{reservation_id}/confirmer", response_model=schemas.ReservationOut)
+def confirmer_reservation(reservation_id: str, db: Session = Depends(get_db)):
+    """Confirme une réservation active : le stock reste décompté définitivement"""
+    if terminer(db, reservation_id, "confirmee", Reservation.expire_le > maintenant()):
+        db.commit()
+        return get_reservation_or_404(db, reservation_id)
+
+    reservation = get_reservation_or_404(db, reservation_id)
+    if reservation.statut == "confirmee":
+        return reservation
+    if reservation.statut == "active":
+        # Échue mais pas encore balayée : on rend le stock tout de suite
+        if terminer(db, reservation_id, "expiree"):
+            rendre_stock(db, reservation_id)
+        db.commit()
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Réservation {reservation.statut}, confirmation impossible"
+    )
+
+
+@router.post("/{reservation_id}/liberer", response_model=schemas.ReservationOut)
+def liberer_reservation(reservation_id: str, db: Session = Depends(get_db)):
+    """Annule une réservation active et rend son stock"""
+    if terminer(db, reservation_id, "liberee"):
+        rendre_stock(db, reservation_id)
+        db.commit()
+        return get_reservation_or_404(db, reservation_id)
+
+    reservation = get_reservation_or_404(db, reservation_id)
+    if reservation.statut == "confirmee":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Réservation déjà confirmée"
+        )
+    # Déjà libérée ou expirée : le stock a déjà été rendu
+    return reservation
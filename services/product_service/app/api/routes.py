@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -6,27 +6,38 @@ import secrets
 
 from app.db import schemas
 from app.models.produit import Produit
-from app.db.database import get_db
+from app.models.categorie import CategorieStats
+from app.db.database import ReadSession, get_db, get_read_db
+from app.db.search import RANK, fts, match_expression
+from app.api.pagination import NEXT_CURSOR_HEADER, TRI_PATTERN, next_page, paginate
+from sqlalchemy import literal_column, select
 
 router = APIRouter(prefix="/produits", tags=["Produits"])
 
 def generate_id():
     return secrets.token_hex(3)
 
+# Nombre maximal d'identifiants par appel à /produits/lot
+MAX_LOT_IDS = 500
+
 # ---------------------------
 # ENDPOINTS PUBLIC
+# Lectures via get_read_db : moteur async ou session sync (PRODUCT_ASYNC_READS)
 # ---------------------------
 
 @router.get("/", response_model=List[schemas.ProduitOut])
-def get_produits(
-    db: Session = Depends(get_db),
+async def get_produits(
+    response: Response,
+    db: ReadSession = Depends(get_read_db),
     categorie: Optional[str] = None,
     nouveau: Optional[bool] = None,
     promo: Optional[bool] = None,
     min_prix: Optional[float] = Query(None, alias="min-prix"),
     max_prix: Optional[float] = Query(None, alias="max-prix"),
-    limit: int = 100,
-    offset: int = 0
+    tri: str = Query("id", pattern=TRI_PATTERN),
+    curseur: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
 ):
     """
     Récupère les produits avec filtres :
@@ -34,8 +45,11 @@ def get_produits(
     - Produits nouveaux
     - Produits en promo
     - Fourchette de prix
+
+    Tri stable par `id`, `prix` ou `-prix`. Pour la page suivante, passer le
+    jeton de l'en-tête X-Next-Cursor dans `curseur` (sinon `offset` reste accepté).
     """
-    query = db.query(Produit)
+    query = select(Produit)
     
     if categorie:
         query = query.filter(Produit.categorie == categorie)
@@ -48,7 +62,10 @@ def get_produits(
     if max_prix:
         query = query.filter(Produit.prix <= max_prix)
     
-    produits = query.offset(offset).limit(limit).all()
+    produits = await db.scalars(paginate(query, tri, limit, offset, curseur))
+    produits, next_cursor = next_page(produits, tri, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     if not produits:
         raise HTTPException(
@@ -57,10 +74,100 @@ def get_produits(
         )
     return produits
 
+@router.get("/recherche", response_model=List[schemas.ProduitOut])
+async def rechercher_produits(
+    q: Optional[str] = None,
+    filtres: schemas.ProduitSearch = Depends(),
+    db: ReadSession = Depends(get_read_db),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Recherche plein texte (index FTS5) classée par pertinence :
+    - `q`: mots recherchés dans le nom, la description et la catégorie
+    - `nom`: mots recherchés dans le nom uniquement
+    - Filtres : `categorie`, `en_promotion`, `est_nouveau`, `prix_min`, `prix_max`
+
+    Chaque mot est un préfixe ("smart" trouve "Smartphone") et les accents
+    sont ignorés ("ecran" trouve "Écran").
+    """
+    expressions = [e for e in (match_expression(q), match_expression(filtres.nom, "nom")) if e]
+    if not expressions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indiquez au moins un mot à rechercher (q ou nom)"
+        )
+
+    query = (
+        select(Produit)
+        .join(fts, fts.c.rowid == literal_column("produits.rowid"))
+        .filter(fts.c.produits_fts.op("MATCH")(" AND ".join(expressions)))
+    )
+
+    if filtres.categorie:
+        query = query.filter(Produit.categorie == filtres.categorie)
+    if filtres.est_nouveau is not None:
+        query = query.filter(Produit.est_nouveau == filtres.est_nouveau)
+    if filtres.en_promotion is not None:
+        query = query.filter(
+            Produit.promotion.isnot(None) if filtres.en_promotion else Produit.promotion.is_(None)
+        )
+    if filtres.prix_min is not None:
+        query = query.filter(Produit.prix >= filtres.prix_min)
+    if filtres.prix_max is not None:
+        query = query.filter(Produit.prix <= filtres.prix_max)
+
+    produits = await db.scalars(query.order_by(RANK, Produit.id).offset(offset).limit(limit))
+
+    if not produits:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aucun produit ne correspond à la recherche"
+        )
+    return produits
+
+@router.get("/lot", response_model=schemas.ProduitsLot)
+async def get_produits_lot(
+    ids: List[str] = Query(..., description="Identifiants (paramètre répété ou séparés par des virgules)"),
+    champs: Optional[str] = Query(None, description="Champs à retourner, ex: prix,stock"),
+    db: ReadSession = Depends(get_read_db)
+):
+    """
+    Récupère plusieurs produits en une seule requête (panier, commandes) :
+    - réponse indexée par id, `null` et listé dans `manquants` si introuvable
+    - `champs`: projection optionnelle (l'id est toujours inclus)
+    """
+    ids = list(dict.fromkeys(i.strip() for value in ids for i in value.split(",") if i.strip()))
+    if not ids or len(ids) > MAX_LOT_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Entre 1 et {MAX_LOT_IDS} identifiants attendus"
+        )
+
+    colonnes = list(schemas.ProduitOut.model_fields)
+    if champs:
+        demandes = [c.strip() for c in champs.split(",") if c.strip()]
+        inconnus = [c for c in demandes if c not in colonnes]
+        if inconnus:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Champs inconnus : {', '.join(inconnus)}"
+            )
+        colonnes = ["id"] + [c for c in demandes if c != "id"]
+
+    # Une seule requête IN, limitée aux colonnes demandées
+    rows = await db.all(select(*[getattr(Produit, c) for c in colonnes]).filter(Produit.id.in_(ids)))
+    trouves = {row.id: dict(row._mapping) for row in rows}
+
+    return {
+        "produits": {i: trouves.get(i) for i in ids},
+        "manquants": [i for i in ids if i not in trouves],
+    }
+
 @router.get("/{produit_id}", response_model=schemas.ProduitOut)
-def get_produit(produit_id: str, db: Session = Depends(get_db)):
+async def get_produit(produit_id: str, db: ReadSession = Depends(get_read_db)):
     """Récupère un produit spécifique par son ID"""
-    produit = db.query(Produit).filter(Produit.id == produit_id).first()
+    produit = await db.first(select(Produit).filter(Produit.id == produit_id))
     if not produit:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,10 +176,14 @@ def get_produit(produit_id: str, db: Session = Depends(get_db)):
     return produit
 
 @router.get("/categories/liste", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: ReadSession = Depends(get_read_db)):
     """Récupère la liste des catégories disponibles"""
-    categories = db.query(Produit.categorie).distinct().all()
-    return [cat[0] for cat in categories]
+    return await db.scalars(select(CategorieStats.categorie).order_by(CategorieStats.categorie))
+
+@router.get("/categories/stats", response_model=List[schemas.CategorieStatsOut])
+async def get_categories_stats(db: ReadSession = Depends(get_read_db)):
+    """Catégories avec leur nombre de produits et de produits en promotion"""
+    return await db.scalars(select(CategorieStats).order_by(CategorieStats.categorie))
 
 # ---------------------------
 # ENDPOINTS ADMIN
@@ -110,6 +221,11 @@ def update_produit(
         raise HTTPException(status_code=404, detail="Produit introuvable")
     
     update_data = produit.model_dump(exclude_unset=True)
+    if "prix" in update_data:
+        # Nouveau prix de base : la campagne ou la remise manuelle en cours est
+        # détachée, sa fin ne rétablira pas l'ancien prix_original
+        update_data.setdefault("promotion", None)
+        update_data.update(prix_original=None, promotion_id=None, promotion_manuelle=None)
     
     for field, value in update_data.items():
         setattr(db_produit, field, value)
@@ -149,14 +265,18 @@ def set_promo(
     pourcentage: int = Query(..., gt=0, le=100),
     db: Session = Depends(get_db)
 ):
-    """Appliquer une promotion à un produit"""
+    """Appliquer une promotion à un produit (calculée sur le prix d'origine)"""
     produit = db.query(Produit).filter(Produit.id == produit_id).first()
     if not produit:
         raise HTTPException(status_code=404, detail="Produit introuvable")
     
+    # Le prix d'origine est conservé : une nouvelle remise ne se cumule pas
+    prix_original = produit.prix_original if produit.prix_original is not None else produit.prix
     produit.promotion = pourcentage
-    produit.prix_original = produit.prix
-    produit.prix = produit.prix * (1 - pourcentage / 100)
+    produit.prix_original = prix_original
+    produit.prix = round(prix_original * (1 - pourcentage / 100), 2)
+    produit.promotion_id = None
+    produit.promotion_manuelle = pourcentage
     
     try:
         db.commit()
@@ -170,26 +290,35 @@ def set_promo(
         )
 
 @router.get("/categorie/{categorie_nom}", response_model=List[schemas.ProduitOut])
-def get_produits_par_categorie(
+async def get_produits_par_categorie(
     categorie_nom: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: ReadSession = Depends(get_read_db),
     nouveau: Optional[bool] = None,
     promo: Optional[bool] = None,
-    limit: int = 20,
-    offset: int = 0
+    tri: str = Query("id", pattern=TRI_PATTERN),
+    curseur: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
 ):
     """
     Récupère les produits d'une catégorie spécifique avec options de filtrage:
     - `categorie_nom`: Nom de la catégorie (ex: 'Smartphones')
     - `nouveau`: Filtrer seulement les nouveaux produits (true/false)
     - `promo`: Filtrer seulement les produits en promo (true/false)
+    - `tri`: `id` (défaut), `prix` ou `-prix`
+    - `curseur`: Jeton de la page suivante (en-tête X-Next-Cursor)
     - `limit`: Nombre de résultats par page (défaut: 20)
-    - `offset`: Position de départ (pour pagination)
+    - `offset`: Position de départ (pour pagination, si pas de curseur)
     """
-    # Construction de la requête de base
-    query = db.query(Produit).filter(
-        Produit.categorie.ilike(f"%{categorie_nom}%")
+    # Les catégories correspondantes sont lues dans categories_stats (une ligne
+    # par catégorie, tenue à jour par triggers) sans parcourir produits, puis
+    # filtrées par égalité pour que les index composites (categorie, ...)
+    # servent la requête principale.
+    categories = await db.scalars(
+        select(CategorieStats.categorie).filter(CategorieStats.categorie.ilike(f"%{categorie_nom}%"))
     )
+    query = select(Produit).filter(Produit.categorie.in_(categories))
     
     # Filtres optionnels
     if nouveau is not None:
@@ -198,7 +327,10 @@ def get_produits_par_categorie(
         query = query.filter(Produit.promotion.isnot(None) if promo else Produit.promotion.is_(None))
     
     # Exécution avec pagination
-    produits = query.offset(offset).limit(limit).all()
+    produits = await db.scalars(paginate(query, tri, limit, offset, curseur))
+    produits, next_cursor = next_page(produits, tri, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     if not produits:
         raise HTTPException(
@@ -1,17 +1,72 @@
+import datetime
+import hashlib
 import os
+import re
 import uuid
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-from PIL import Image
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.staticfiles import NotModifiedResponse
 from typing import Optional
 import aiofiles
-from datetime import datetime
+
+from app.api.images import VARIANTES, assurer_variantes, chemins_variantes, nom_variante
+from app.db.database import SessionLocal, get_db
+from app.models.image import FichierImage
 
 router = APIRouter()
 
-UPLOAD_DIR = "app/static/uploads"
+# Dossier des images uploadées (PRODUCT_UPLOAD_DIR : tests, volume dédié)
+UPLOAD_DIR = os.getenv("PRODUCT_UPLOAD_DIR", "app/static/uploads")
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 64 * 1024
+SAFE_FILENAME = re.compile(r"^[\w-]+\.(png|jpg|jpeg|gif)$")
+# <sha256>.<ext>, <sha256>_<taille>.<ext> : nom dérivé du contenu
+HASHED_FILENAME = re.compile(r"^[0-9a-f]{64}(_\w+)?\.\w+$")
+# Suffixes des fichiers de travail (voir images.temporaire et mettre_de_cote)
+RESERVED_SUFFIXES = (".tmp", ".gc")
+
+# Délai avant qu'une image sans produit puisse être supprimée (secondes) :
+# laisse le temps de créer le produit après l'upload
+IMAGE_GC_GRACE = int(os.getenv("IMAGE_GC_GRACE", "86400"))
+
+# Les noms générés ci-dessous sont uniques : un fichier ne change jamais,
+# les clients peuvent donc le garder en cache indéfiniment.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class UploadStaticFiles(StaticFiles):
+    """
+    Sert les images uploadées. StaticFiles gère déjà Range (206), If-Range
+    et les GET conditionnels (304) ; on ajoute le cache longue durée et,
+    pour les noms dérivés du contenu, un ETag fort tiré de ce nom.
+    """
+
+    async def get_response(self, path: str, scope):
+        # Fichiers cachés (temporaires, copies mises de côté par le GC) jamais servis
+        nom = os.path.basename(path)
+        if nom.startswith(".") or nom.endswith(RESERVED_SUFFIXES):
+            raise StarletteHTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        filename = os.path.basename(full_path)
+        if HASHED_FILENAME.match(filename):
+            response.headers["ETag"] = f'"{filename}"'
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+upload_files = UploadStaticFiles(directory=UPLOAD_DIR, check_dir=False)
 
 def get_file_extension(filename: str) -> str:
     return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
@@ -19,48 +74,196 @@ def get_file_extension(filename: str) -> str:
 def is_allowed_file(filename: str) -> bool:
     return get_file_extension(filename) in ALLOWED_EXTENSIONS
 
+def supprimer_fichiers(file_path: str):
+    for chemin in [file_path] + chemins_variantes(file_path):
+        if os.path.exists(chemin):
+            os.remove(chemin)
+
+def trouver_image(digest: str) -> Optional[str]:
+    """
+    Nom du fichier déjà stocké pour ce contenu. La ligne est marquée comme
+    réutilisée avant de vérifier le fichier : le GC ne peut plus la supprimer.
+    """
+    db = SessionLocal()
+    try:
+        image = db.get(FichierImage, digest)
+        if image is None:
+            return None
+        image.televerse_le = datetime.datetime.utcnow()
+        db.commit()
+        if not os.path.isfile(os.path.join(UPLOAD_DIR, image.filename)):
+            return None
+        return image.filename
+    finally:
+        db.close()
+
+def enregistrer_image(digest: str, filename: str):
+    db = SessionLocal()
+    try:
+        stmt = insert(FichierImage).values(hash=digest, filename=filename, refs=0)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[FichierImage.hash],
+            set_={"filename": filename, "televerse_le": datetime.datetime.utcnow()}
+        ))
+        db.commit()
+    finally:
+        db.close()
+
 async def save_upload_file(upload_file: UploadFile) -> str:
     if not is_allowed_file(upload_file.filename):
         raise HTTPException(status_code=400, detail="Type de fichier non autorisé")
 
-    # Créer un nom de fichier unique
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_filename = f"{timestamp}_{uuid.uuid4()}.{get_file_extension(upload_file.filename)}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
+    # Réception par blocs dans un fichier temporaire, empreinte calculée au passage
+    if upload_file.size is not None and upload_file.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="Fichier trop volumineux")
+    tmp_path = os.path.join(UPLOAD_DIR, f".{uuid.uuid4()}.tmp")
+    sha256 = hashlib.sha256()
+    taille = 0
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as out_file:
+            while chunk := await upload_file.read(CHUNK_SIZE):
+                taille += len(chunk)
+                if taille > MAX_FILE_SIZE:
+                    raise HTTPException(status_code=400, detail="Fichier trop volumineux")
+                sha256.update(chunk)
+                await out_file.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
-    # Sauvegarder le fichier
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await upload_file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="Fichier trop volumineux")
-        await out_file.write(content)
+    digest = sha256.hexdigest()
+    existant = await run_in_threadpool(trouver_image, digest)
+    if existant:
+        # Contenu déjà connu : même fichier, on attend seulement ses variantes
+        filename, source = existant, None
+    else:
+        ext = get_file_extension(upload_file.filename).replace("jpeg", "jpg")
+        filename, source = f"{digest}.{ext}", tmp_path
+        # Ligne enregistrée avant de regarder le disque : un GC en cours garde le fichier
+        await run_in_threadpool(enregistrer_image, digest, filename)
+    file_path = os.path.join(UPLOAD_DIR, filename)
 
-    # Optimiser l'image
+    # Variantes (thumb, card, full, WebP) générées hors de la boucle d'événements.
+    # L'URL n'existe qu'une fois l'image "full" publiée par renommage atomique :
+    # elle ne sert jamais qu'un seul contenu. Un envoi simultané du même contenu
+    # attend le même traitement.
     try:
-        with Image.open(file_path) as img:
-            # Redimensionner si l'image est trop grande
-            if img.width > 1200 or img.height > 1200:
-                img.thumbnail((1200, 1200))
-                img.save(file_path, optimize=True, quality=85)
-    except Exception as e:
-        os.remove(file_path)
+        await assurer_variantes(file_path, source)
+    except Exception:
+        # Image jamais publiée : seules ses variantes déjà écrites sont à retirer
+        if source is not None and not os.path.exists(file_path):
+            supprimer_fichiers(file_path)
         raise HTTPException(status_code=500, detail="Erreur lors du traitement de l'image")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
     # Retourner le chemin d'accès pour le frontend via l'API Gateway
-    return f"/api/products/static/uploads/{unique_filename}"
+    return f"/api/products/static/uploads/{filename}"
 
 
 @router.post("/upload")
 async def upload_image(file: UploadFile = File(...)):
     try:
         file_url = await save_upload_file(file)
+        filename = os.path.basename(file_url)
         return JSONResponse(
             content={
                 "url": file_url,
-                "filename": os.path.basename(file_url)
+                "filename": filename,
+                "variantes": {
+                    taille: f"/api/products/images/{filename}?taille={taille}" for taille in VARIANTES
+                }
             }
         )
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/images/{filename}")
+async def get_image(
+    filename: str,
+    request: Request,
+    taille: str = Query("full", pattern="^(thumb|card|full)$"),
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(webp|origine)$")
+):
+    """
+    Sert une image uploadée à la taille demandée (`thumb`, `card`, `full`).
+    Sans `format`, la version WebP est choisie si le navigateur l'accepte.
+    """
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    if not SAFE_FILENAME.match(filename) or not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="Image introuvable")
+
+    webp = fmt == "webp" or (fmt is None and "image/webp" in request.headers.get("accept", ""))
+    await assurer_variantes(file_path)
+    response = await upload_files.get_response(nom_variante(filename, taille, webp), request.scope)
+    if fmt is None:
+        response.headers["Vary"] = "Accept"
+    return response
+
+
+def mettre_de_cote(file_path: str) -> list:
+    """Renomme l'image et ses variantes en fichiers cachés ; retourne les (chemin, copie)."""
+    paires = []
+    for chemin in [file_path] + chemins_variantes(file_path):
+        dossier, nom = os.path.split(chemin)
+        copie = os.path.join(dossier, f".{nom}.gc")
+        try:
+            os.replace(chemin, copie)
+            paires.append((chemin, copie))
+        except FileNotFoundError:
+            pass
+    return paires
+
+
+def restaurer(paires: list):
+    for chemin, copie in paires:
+        # Réécrite entre-temps par un upload du même contenu : identique
+        if os.path.exists(chemin):
+            os.remove(copie)
+        else:
+            os.replace(copie, chemin)
+
+
+@router.post("/images/gc")
+def collecter_images(db: Session = Depends(get_db)):
+    """
+    Supprime les images qu'aucun produit n'utilise plus (compteur à 0),
+    une fois passé le délai de grâce après leur dernier upload.
+    Les fichiers sont d'abord mis de côté, puis effacés seulement si leur
+    ligne a bien été supprimée : un upload du même contenu pendant la
+    collecte (qui rafraîchit la ligne avant de regarder le disque) les garde.
+    """
+    limite = datetime.datetime.utcnow() - datetime.timedelta(seconds=IMAGE_GC_GRACE)
+    collectable = (FichierImage.refs <= 0, FichierImage.televerse_le < limite)
+    candidates = db.query(FichierImage.hash, FichierImage.filename).filter(*collectable).all()
+    # Fin de la lecture : la suppression revérifie les conditions dans sa propre transaction
+    db.rollback()
+
+    de_cote = {
+        image.hash: mettre_de_cote(os.path.join(UPLOAD_DIR, image.filename)) for image in candidates
+    }
+    supprimees = set()
+    try:
+        result = db.execute(
+            delete(FichierImage)
+            .where(FichierImage.hash.in_(list(de_cote)), *collectable)
+            .returning(FichierImage.hash)
+        )
+        supprimees = {row.hash for row in result}
+        db.commit()
+    except Exception:
+        db.rollback()
+        supprimees = set()
+        raise
+    finally:
+        for digest, paires in de_cote.items():
+            if digest in supprimees:
+                for _, copie in paires:
+                    os.remove(copie)
+            else:
+                restaurer(paires)
+    return {"supprimees": len(supprimees)}
@@ -0,0 +1,61 @@
+# Catégories et compteurs précalculés (table categories_stats) : le menu ne
+# parcourt plus produits. Les triggers ne réagissent qu'aux colonnes categorie
+# et promotion ; toutes les écritures (API, import en masse) sont comptées.
+
+def _ajouter(row: str) -> str:
+    return f"""
+        INSERT INTO categories_stats(categorie, produits, promos)
+        VALUES ({row}.categorie, 1, {row}.promotion IS NOT NULL)
+        ON CONFLICT(categorie) DO UPDATE SET
+            produits = produits + 1, promos = promos + excluded.promos;
+    """
+
+
+def _retirer(row: str) -> str:
+    return f"""
+        UPDATE categories_stats
+        SET produits = produits - 1, promos = promos - ({row}.promotion IS NOT NULL)
+        WHERE categorie = {row}.categorie;
+        DELETE FROM categories_stats WHERE categorie = {row}.categorie AND produits <= 0;
+    """
+
+
+STATS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categories_stats_ai AFTER INSERT ON produits
+    WHEN new.categorie IS NOT NULL BEGIN {_ajouter('new')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categories_stats_ad AFTER DELETE ON produits
+    WHEN old.categorie IS NOT NULL BEGIN {_retirer('old')} END
+    """,
+    # Deux triggers pour la mise à jour : une catégorie NULL n'est pas comptée
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categories_stats_au_old AFTER UPDATE OF categorie, promotion ON produits
+    WHEN old.categorie IS NOT NULL
+        AND (old.categorie IS NOT new.categorie OR (old.promotion IS NULL) != (new.promotion IS NULL))
+    BEGIN {_retirer('old')} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS categories_stats_au_new AFTER UPDATE OF categorie, promotion ON produits
+    WHEN new.categorie IS NOT NULL
+        AND (old.categorie IS NOT new.categorie OR (old.promotion IS NULL) != (new.promotion IS NULL))
+    BEGIN {_ajouter('new')} END
+    """,
+]
+
+# Recalcul complet au démarrage (seul parcours de produits)
+RECOUNT = [
+    "DELETE FROM categories_stats",
+    """
+    INSERT INTO categories_stats(categorie, produits, promos)
+    SELECT categorie, COUNT(*), SUM(promotion IS NOT NULL)
+    FROM produits WHERE categorie IS NOT NULL GROUP BY categorie
+    """,
+]
+
+
+def setup_category_stats(engine):
+    with engine.begin() as conn:
+        for statement in STATS_TRIGGERS + RECOUNT:
+            conn.exec_driver_sql(statement)
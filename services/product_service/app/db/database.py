@@ -1,13 +1,36 @@
-from sqlalchemy import create_engine
+import os
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 Base = declarative_base()
 
-# SQLite (fichier) — le chemin sera "product.db" dans le directory du service
-DATABASE_URL = "sqlite:///./product.db"
+# SQLite (fichier) — par défaut "product.db" dans le directory du service ;
+# PRODUCT_DATABASE_URL pointe ailleurs (tests, volume dédié)
+DATABASE_URL = os.getenv("PRODUCT_DATABASE_URL", "sqlite:///./product.db")
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+# Lectures (listes, fiche, recherche, lot) sur le moteur async aiosqlite si "1".
+# Par défaut, session sync exécutée dans le pool de threads : comparer les deux
+# avec bench_reads.py sur la machine cible avant d'activer.
+ASYNC_READS = os.getenv("PRODUCT_ASYNC_READS", "0") == "1"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL : les lectures ne sont plus bloquées par une écriture en cours, et les
+    # écritures concurrentes (réservations de stock) attendent au lieu d'échouer
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -16,3 +39,55 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_READS:
+    try:
+        import aiosqlite  # noqa: F401
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=20, max_overflow=20)
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+        AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    except ImportError:
+        print("⚠ Paquet 'aiosqlite' manquant : lectures sur la session sync")
+
+
+class ReadSession:
+    """
+    Session de lecture commune aux deux moteurs : les requêtes select() sont
+    attendues sur le moteur async, ou exécutées dans le pool de threads sur la
+    session sync. Les résultats sont chargés entièrement avant de revenir.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.is_async = not isinstance(session, SessionLocal.class_)
+
+    async def _execute(self, stmt, fetch):
+        if self.is_async:
+            return fetch(await self.session.execute(stmt))
+        return await run_in_threadpool(lambda: fetch(self.session.execute(stmt)))
+
+    async def scalars(self, stmt) -> list:
+        return await self._execute(stmt, lambda result: result.scalars().all())
+
+    async def all(self, stmt) -> list:
+        return await self._execute(stmt, lambda result: result.all())
+
+    async def first(self, stmt):
+        return await self._execute(stmt, lambda result: result.scalars().first())
+
+
+async def get_read_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield ReadSession(session)
+    else:
+        db = SessionLocal()
+        try:
+            yield ReadSession(db)
+        finally:
+            await run_in_threadpool(db.close)
@@ -0,0 +1,50 @@
+# Compteurs de références des images (table images), tenus à jour par triggers
+# sur produits.image_url : toute écriture (API, import en masse) est comptée.
+
+def image_hash_sql(url: str) -> str:
+    """Empreinte contenue dans une URL d'image (.../uploads/<hash>.jpg ou .../images/<hash>.jpg?taille=...)."""
+    return f"""
+        CASE
+            WHEN instr({url}, '/uploads/') > 0 THEN substr({url}, instr({url}, '/uploads/') + 9, 64)
+            WHEN instr({url}, '/images/') > 0 THEN substr({url}, instr({url}, '/images/') + 8, 64)
+        END
+    """
+
+
+REFS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS images_refs_ai AFTER INSERT ON produits
+    WHEN new.image_url IS NOT NULL BEGIN
+        UPDATE images SET refs = refs + 1 WHERE hash = {image_hash_sql('new.image_url')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS images_refs_ad AFTER DELETE ON produits
+    WHEN old.image_url IS NOT NULL BEGIN
+        UPDATE images SET refs = refs - 1 WHERE hash = {image_hash_sql('old.image_url')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS images_refs_au AFTER UPDATE OF image_url ON produits
+    WHEN old.image_url IS NOT new.image_url BEGIN
+        UPDATE images SET refs = refs - 1 WHERE hash = {image_hash_sql('old.image_url')};
+        UPDATE images SET refs = refs + 1 WHERE hash = {image_hash_sql('new.image_url')};
+    END
+    """,
+]
+
+# Recalcul complet au démarrage : corrige les écarts (triggers créés après les données)
+RECOUNT = f"""
+WITH usages AS (
+    SELECT {image_hash_sql('image_url')} AS hash, COUNT(*) AS n
+    FROM produits WHERE image_url IS NOT NULL GROUP BY 1
+)
+UPDATE images SET refs = COALESCE((SELECT n FROM usages WHERE usages.hash = images.hash), 0)
+"""
+
+
+def setup_image_refs(engine):
+    with engine.begin() as conn:
+        for trigger in REFS_TRIGGERS:
+            conn.exec_driver_sql(trigger)
+        conn.exec_driver_sql(RECOUNT)
@@ -0,0 +1,16 @@
+from sqlalchemy import inspect
+
+# Colonnes ajoutées après coup : create_all ne modifie pas une table existante
+COLONNES = [
+    ("produits", "prix_original", "FLOAT"),
+    ("produits", "promotion_id", "VARCHAR"),
+    ("produits", "promotion_manuelle", "INTEGER"),
+]
+
+
+def ajouter_colonnes_manquantes(engine):
+    with engine.begin() as conn:
+        for table, colonne, type_sql in COLONNES:
+            existantes = {c["name"] for c in inspect(conn).get_columns(table)}
+            if colonne not in existantes:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {colonne} {type_sql}")
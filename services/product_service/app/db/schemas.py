@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict
+from datetime import datetime, timezone
+import json
 import uuid
 
 class ProduitBase(BaseModel):
@@ -29,12 +31,28 @@ class ProduitUpdate(BaseModel):
     note: Optional[float] = None
     avis: Optional[int] = None
 
+class ProduitImport(ProduitBase):
+    id: Optional[str] = None  # Produit existant mis à jour, sinon création
+
 class ProduitOut(ProduitBase):
     id: str
+    prix_original: Optional[float] = None  # Prix avant promotion
     
     class Config:
         from_attributes = True  # Pour Pydantic v2 (anciennement orm_mode=True)
 
+class ProduitsLot(BaseModel):
+    produits: Dict[str, Optional[Dict]]  # Champs demandés, ou None si introuvable
+    manquants: List[str]
+
+class CategorieStatsOut(BaseModel):
+    categorie: str
+    produits: int
+    promos: int
+
+    class Config:
+        from_attributes = True
+
 class ProduitDelete(BaseModel):
     id: str
 
@@ -44,4 +62,65 @@ class ProduitSearch(BaseModel):
     en_promotion: Optional[bool] = None
     est_nouveau: Optional[bool] = None
     prix_min: Optional[float] = None
-    prix_max: Optional[float] = None
\ No newline at end of file
+    prix_max: Optional[float] = None
+
+class ImportErreur(BaseModel):
+    ligne: int
+    erreur: str
+
+class ImportResultat(BaseModel):
+    lignes: int
+    importes: int
+    erreurs: int
+    details: List[ImportErreur]  # Limité aux premières erreurs
+
+class ReservationLigneBase(BaseModel):
+    produit_id: str
+    quantite: int = Field(..., gt=0)
+
+class ReservationCreate(BaseModel):
+    lignes: List[ReservationLigneBase] = Field(..., min_length=1)
+    ttl: int = Field(900, ge=10, le=3600)  # Durée de validité en secondes
+
+class ReservationOut(BaseModel):
+    id: str
+    statut: str
+    cree_le: datetime
+    expire_le: datetime
+    lignes: List[ReservationLigneBase]
+
+    class Config:
+        from_attributes = True
+
+class PromotionCreate(BaseModel):
+    pourcentage: int = Field(..., gt=0, le=100)
+    categorie: Optional[str] = None  # Cible : une catégorie...
+    produit_ids: Optional[List[str]] = None  # ... ou une liste de produits
+    debut: Optional[datetime] = None  # Immédiat si absent
+    fin: Optional[datetime] = None  # Jusqu'à annulation si absent
+
+    @field_validator("debut", "fin")
+    @classmethod
+    def en_utc(cls, value):
+        # Dates stockées en UTC sans fuseau, comme le reste du service
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class PromotionOut(BaseModel):
+    id: str
+    pourcentage: int
+    categorie: Optional[str] = None
+    produit_ids: Optional[List[str]] = None
+    debut: datetime
+    fin: Optional[datetime] = None
+    statut: str
+    produits: int
+
+    @field_validator("produit_ids", mode="before")
+    @classmethod
+    def depuis_json(cls, value):
+        return json.loads(value) if isinstance(value, str) else value
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,99 @@
+import re
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.exc import DBAPIError
+
+# Index plein texte FTS5 adossé à la table produits (contenu externe : le
+# texte n'est pas dupliqué, seul l'index inversé est stocké).
+# - unicode61 remove_diacritics 2 : "écran" et "ecran" donnent le même terme
+# - prefix '2 3' : index des préfixes courts pour la recherche à la frappe
+FTS_TABLE = "produits_fts"
+
+FTS_DDL = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    nom, description, categorie,
+    content='produits', content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 2",
+    prefix='2 3'
+)
+"""
+
+# Synchronisation incrémentale par triggers : chaque écriture sur produits
+# (API, import en masse, SQL direct) met à jour l'index dans la même transaction.
+# La mise à jour ne touche l'index que si un champ indexé change.
+FTS_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS produits_fts_ai AFTER INSERT ON produits BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nom, description, categorie)
+        VALUES (new.rowid, new.nom, new.description, new.categorie);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS produits_fts_ad AFTER DELETE ON produits BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nom, description, categorie)
+        VALUES ('delete', old.rowid, old.nom, old.description, old.categorie);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS produits_fts_au AFTER UPDATE OF nom, description, categorie ON produits BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nom, description, categorie)
+        VALUES ('delete', old.rowid, old.nom, old.description, old.categorie);
+        INSERT INTO {FTS_TABLE}(rowid, nom, description, categorie)
+        VALUES (new.rowid, new.nom, new.description, new.categorie);
+    END
+    """,
+]
+
+# Poids bm25 par colonne : le nom compte plus que la catégorie et la description
+RANK = func.bm25(literal_column(FTS_TABLE), 10.0, 2.0, 4.0)
+
+fts = table(FTS_TABLE, column("rowid"), column(FTS_TABLE))
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def index_coherent(conn) -> bool:
+    """
+    Compare l'index au contenu de produits. produits a une clé primaire TEXT :
+    son rowid implicite n'est pas stable (VACUUM, restauration, copie de la
+    table peuvent le renuméroter) et l'index pointerait alors sur d'autres lignes.
+    """
+    try:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+        return True
+    except DBAPIError:
+        return False
+
+
+def setup_search(engine):
+    """
+    Crée l'index et ses triggers s'ils n'existent pas ; indexe le catalogue
+    existant, ou le réindexe s'il ne correspond plus aux rowid de produits.
+    """
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+        if not exists:
+            conn.exec_driver_sql(FTS_DDL)
+        if not exists or not index_coherent(conn):
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        for trigger in FTS_TRIGGERS:
+            conn.exec_driver_sql(trigger)
+
+
+def match_expression(q: str, colonne: str = None):
+    """
+    Traduit une saisie libre en requête MATCH : chaque mot devient un préfixe
+    ("iph" trouve "iPhone") et tous les mots doivent être présents.
+    Les mots sont mis entre guillemets pour neutraliser la syntaxe FTS5.
+    Retourne None si la saisie ne contient aucun mot.
+    """
+    terms = TERM_PATTERN.findall(q or "")
+    if not terms:
+        return None
+    expression = " ".join(f'"{term}"*' for term in terms)
+    if colonne:
+        return f"{colonne} : ({expression})"
+    return expression
@@ -1,18 +1,62 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router as products_router
-from app.api.upload import router as upload_router
-from app.db.database import Base, engine
+from app.api.bulk import router as bulk_router
+from app.api.reservations import router as reservations_router, balayer_periodiquement
+from app.api.promotions import router as promotions_router, planifier_periodiquement
+from app.api.upload import router as upload_router, UploadStaticFiles, UPLOAD_DIR
+from app.api.images import fermer_pool
+from app.db.database import Base, async_engine, engine
+from app.models.produit import Produit
+from app.models.reservation import Reservation
+from app.models.image import FichierImage
+from app.models.categorie import CategorieStats
+from app.models.promotion import Promotion
+from app.db.search import setup_search
+from app.db.image_refs import setup_image_refs
+from app.db.categories import setup_category_stats
+from app.db.migrations import ajouter_colonnes_manquantes
 import os
 
 # Création des tables
 Base.metadata.create_all(bind=engine)
+ajouter_colonnes_manquantes(engine)
+
+# create_all ne complète pas une table existante : on ajoute les index manquants
+for index in Produit.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+
+# Index de recherche plein texte, tenu à jour par triggers
+setup_search(engine)
+
+# Compteurs de références des images, tenus à jour par triggers
+setup_image_refs(engine)
+
+# Catégories et compteurs du menu, tenus à jour par triggers
+setup_category_stats(engine)
 print("✅ Base de données SQLite initialisée avec succès.")
 print("✅ Toutes les tables ont été créées.")
 print("➡ Fichier de base de données généré : product.db")
 
-app = FastAPI(title="Product Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Libération des réservations de stock expirées
+    balayage = asyncio.create_task(balayer_periodiquement())
+    # Activation et fin des promotions planifiées
+    planification = asyncio.create_task(planifier_periodiquement())
+    yield
+    balayage.cancel()
+    planification.cancel()
+    fermer_pool()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+app = FastAPI(title="Product Service", lifespan=lifespan)
 
 # Configuration CORS
 app.add_middleware(
@@ -24,12 +68,20 @@ app.add_middleware(
 )
 
 # Créer le dossier uploads s'il n'existe pas
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "static", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Monter le dossier des fichiers statiques
+# Monter le dossier des fichiers statiques (images uploadées en cache longue durée)
+app.mount("/static/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Inclure les routes
 app.include_router(products_router)
+app.include_router(bulk_router)
+app.include_router(reservations_router)
+app.include_router(promotions_router)
 app.include_router(upload_router, tags=["upload"])
+
+
+@app.get("/health", tags=["Health"])
+def health():
+    return {"status": "ok"}
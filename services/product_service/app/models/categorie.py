@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Integer
+from app.db.database import Base
+
+class CategorieStats(Base):
+    """Compteurs par catégorie, tenus à jour par triggers sur produits."""
+    __tablename__ = "categories_stats"
+
+    categorie = Column(String(50), primary_key=True)
+    produits = Column(Integer, nullable=False, default=0)
+    promos = Column(Integer, nullable=False, default=0)  # Produits en promotion
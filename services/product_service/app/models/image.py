@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Integer, DateTime
+import datetime
+from app.db.database import Base
+
+class FichierImage(Base):
+    """Image stockée sous l'empreinte SHA-256 de son contenu, partagée entre produits."""
+    __tablename__ = "images"
+
+    hash = Column(String(64), primary_key=True)
+    filename = Column(String, nullable=False)  # <hash>.<ext>
+    refs = Column(Integer, nullable=False, default=0)  # Produits qui l'utilisent (triggers)
+    televerse_le = Column(DateTime, default=datetime.datetime.utcnow)  # Dernier upload
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean
+from sqlalchemy import Column, String, Integer, Float, Boolean, Index
 from sqlalchemy.orm import declarative_base
 import uuid
 from app.db.database import Base
@@ -15,6 +15,9 @@ class Produit(Base):
     # Pour les badges (nouveau/promo)
     est_nouveau = Column(Boolean, default=False)
     promotion = Column(Integer)  # Null si pas en promo, sinon % (ex: 15)
+    prix_original = Column(Float)  # Prix avant promotion (Null si pas en promo)
+    promotion_id = Column(String)  # Campagne de promotion appliquée, le cas échéant
+    promotion_manuelle = Column(Integer)  # Remise posée par /promo, rétablie à la fin d'une campagne
     
     # Pour la catégorie (simplifié)
     categorie = Column(String(50))  # Ex: "Smartphones"
@@ -26,5 +29,16 @@ class Produit(Base):
     note = Column(Float)  # Ex: 4.5
     avis = Column(Integer)  # Nombre d'avis (ex: 128)
 
+    # Index composites alignés sur les filtres des listes (catégorie, nouveauté,
+    # promo, prix) et sur les tris stables (prix, id) de la pagination par curseur
+    __table_args__ = (
+        Index("ix_produits_categorie_id", "categorie", "id"),
+        Index("ix_produits_categorie_prix_id", "categorie", "prix", "id"),
+        Index("ix_produits_prix_id", "prix", "id"),
+        Index("ix_produits_nouveau_categorie_id", "est_nouveau", "categorie", "id"),
+        Index("ix_produits_promotion_categorie_id", "promotion", "categorie", "id"),
+        Index("ix_produits_promotion_id", "promotion_id"),
+    )
+
     def __repr__(self):
         return f"<Produit {self.nom} - {self.prix}FCFA>"
\ No newline at end of file
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+import datetime
+import uuid
+from app.db.database import Base
+
+class Promotion(Base):
+    """Campagne de promotion sur une catégorie ou une liste de produits."""
+    __tablename__ = "promotions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    pourcentage = Column(Integer, nullable=False)
+    categorie = Column(String(50))  # Cible : une catégorie...
+    produit_ids = Column(Text)  # ... ou une liste d'identifiants (JSON)
+    debut = Column(DateTime, nullable=False)
+    fin = Column(DateTime)  # Null : jusqu'à annulation
+    statut = Column(String(20), nullable=False, default="planifiee")  # planifiee, active, terminee, annulee
+    produits = Column(Integer, nullable=False, default=0)  # Produits remisés à l'activation
+    cree_le = Column(DateTime, default=datetime.datetime.utcnow)
+
+    # Recherche des campagnes à activer ou à terminer
+    __table_args__ = (
+        Index("ix_promotions_statut_debut", "statut", "debut"),
+    )
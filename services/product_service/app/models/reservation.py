@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+import datetime
+import uuid
+from app.db.database import Base
+
+class Reservation(Base):
+    """Stock mis de côté pour un panier, jusqu'à confirmation, libération ou expiration."""
+    __tablename__ = "reservations"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    statut = Column(String(20), nullable=False, default="active")  # active, confirmee, liberee, expiree
+    cree_le = Column(DateTime, default=datetime.datetime.utcnow)
+    expire_le = Column(DateTime, nullable=False)
+    lignes = relationship("ReservationLigne", back_populates="reservation", cascade="all, delete-orphan")
+
+    # Balayage des réservations expirées
+    __table_args__ = (
+        Index("ix_reservations_statut_expire_le", "statut", "expire_le"),
+    )
+
+
+class ReservationLigne(Base):
+    __tablename__ = "reservation_lignes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    reservation_id = Column(String, ForeignKey("reservations.id", ondelete="CASCADE"), nullable=False, index=True)
+    produit_id = Column(String, nullable=False)
+    quantite = Column(Integer, nullable=False)
+    reservation = relationship("Reservation", back_populates="lignes")
@@ -0,0 +1,122 @@
+"""
+Banc d'essai des lectures du service produits : session sync (pool de threads)
+contre moteur async (aiosqlite).
+
+Pour chaque mode, un uvicorn est lancé sur la base du service, puis chargé
+pendant `--duree` secondes par `--concurrence` clients qui enchaînent liste,
+fiche, recherche et lot. Affiche le débit soutenu et les latences p50/p95/p99.
+
+    python bench_reads.py --duree 15 --concurrence 128
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def attendre_service(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Service injoignable sur {url}")
+
+
+async def charger(url: str, duree: float, concurrence: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrence, max_keepalive_connections=concurrence)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        produits = (await client.get("/produits/", params={"limit": 50})).json()
+        ids = [p["id"] for p in produits]
+        mot = produits[0]["nom"].split()[0][:3]
+        chemins = [
+            ("/produits/", {"limit": 20}),
+            (f"/produits/{ids[0]}", None),
+            ("/produits/recherche", {"q": mot}),
+            ("/produits/lot", {"ids": ",".join(ids[:10]), "champs": "prix,stock"}),
+        ]
+
+        latences, erreurs = [], 0
+        fin = time.monotonic() + duree
+
+        async def client_virtuel(rang: int):
+            nonlocal erreurs
+            i = rang
+            while time.monotonic() < fin:
+                chemin, params = chemins[i % len(chemins)]
+                i += 1
+                debut = time.perf_counter()
+                try:
+                    response = await client.get(chemin, params=params)
+                    if response.status_code >= 500:
+                        erreurs += 1
+                except httpx.HTTPError:
+                    erreurs += 1
+                latences.append(time.perf_counter() - debut)
+
+        debut = time.monotonic()
+        await asyncio.gather(*(client_virtuel(rang) for rang in range(concurrence)))
+        ecoule = time.monotonic() - debut
+
+    return {
+        "requetes": len(latences),
+        "debit": len(latences) / ecoule,
+        "p50": percentile(latences, 50) * 1000,
+        "p95": percentile(latences, 95) * 1000,
+        "p99": percentile(latences, 99) * 1000,
+        "erreurs": erreurs,
+    }
+
+
+def lancer_service(mode_async: bool, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PRODUCT_ASYNC_READS="1" if mode_async else "0")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duree", type=float, default=10.0)
+    parser.add_argument("--concurrence", type=int, default=128)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    resultats = {}
+    for nom, mode_async in (("sync", False), ("async", True)):
+        process = lancer_service(mode_async, args.port)
+        try:
+            url = f"http://127.0.0.1:{args.port}"
+            await attendre_service(url)
+            await charger(url, 2.0, args.concurrence)  # Mise en température
+            resultats[nom] = await charger(url, args.duree, args.concurrence)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{'mode':<6} {'requêtes':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+    for nom, r in resultats.items():
+        print(f"{nom:<6} {r['requetes']:>9} {r['debit']:>9.0f} {r['p50']:>8.1f} "
+              f"{r['p95']:>8.1f} {r['p99']:>8.1f} {r['erreurs']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
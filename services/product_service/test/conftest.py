@@ -0,0 +1,38 @@
+# test/conftest.py
+
+import os
+import tempfile
+
+# Base et images dans un dossier temporaire : product.db et app/static/uploads
+# du service ne sont pas modifiés
+TEST_DIR = tempfile.mkdtemp(prefix="product_service_test_")
+os.environ["PRODUCT_DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'product.db')}"
+os.environ["PRODUCT_UPLOAD_DIR"] = os.path.join(TEST_DIR, "uploads")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def produit(client: TestClient):
+    """Crée un produit (5 unités à 50.0 par défaut, champs modifiables) et retourne son id."""
+    def creer(stock: int = 5, **champs) -> str:
+        response = client.post("/produits/", json={
+            "nom": "Clavier test",
+            "description": "Produit de test",
+            "prix": 50.0,
+            "stock": stock,
+            "categorie": "Tests",
+            **champs,
+        })
+        assert response.status_code == 201
+        return response.json()["id"]
+    return creer
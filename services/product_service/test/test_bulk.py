@@ -0,0 +1,124 @@
+# test/test_bulk.py
+
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.bulk import MAX_LINE_BYTES
+from app.db.database import engine
+
+ENTETE = "id,nom,description,prix,stock,categorie"
+
+
+def importer(client: TestClient, contenu, fmt: str = "csv") -> dict:
+    if isinstance(contenu, str):
+        contenu = contenu.encode("utf-8")
+    types = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+    response = client.post("/produits/import", content=contenu, headers={"content-type": types[fmt]})
+    assert response.status_code == 200
+    return response.json()
+
+
+def ligne_csv(produit_id: str, nom: str = "Souris", description: str = "Sans fil", prix: float = 10.0) -> str:
+    return f"{produit_id},{nom},{description},{prix},3,Import"
+
+
+def get_produit(client: TestClient, produit_id: str):
+    response = client.get(f"/produits/{produit_id}")
+    return response.json() if response.status_code == 200 else None
+
+
+def nouveaux_ids(n: int) -> list:
+    return [f"imp-{uuid.uuid4().hex[:10]}" for _ in range(n)]
+
+
+def test_guillemet_isole(client: TestClient):
+    ids = nouveaux_ids(4)
+    lignes = [ENTETE, ligne_csv(ids[0]), ligne_csv(ids[1], description='"guillemet isolé'),
+              ligne_csv(ids[2]), ligne_csv(ids[3])]
+
+    resultat = importer(client, "\n".join(lignes) + "\n")
+    assert resultat["importes"] == 3
+    assert resultat["erreurs"] == 1
+    assert resultat["details"][0]["ligne"] == 3
+    # Les lignes qui suivent le guillemet sont relues et importées
+    assert get_produit(client, ids[1]) is None
+    assert all(get_produit(client, pid) for pid in (ids[0], ids[2], ids[3]))
+
+
+def test_ligne_trop_longue(client: TestClient):
+    ids = nouveaux_ids(3)
+    lignes = [
+        json.dumps({"id": ids[0], "nom": "A", "description": "d", "prix": 1, "stock": 1, "categorie": "Import"}),
+        json.dumps({"id": ids[1], "nom": "B", "description": "x" * (MAX_LINE_BYTES + 10), "prix": 1, "stock": 1}),
+        json.dumps({"id": ids[2], "nom": "C", "description": "d", "prix": 1, "stock": 1, "categorie": "Import"}),
+    ]
+
+    resultat = importer(client, "\n".join(lignes), fmt="ndjson")
+    assert (resultat["lignes"], resultat["importes"], resultat["erreurs"]) == (3, 2, 1)
+    assert resultat["details"][0]["ligne"] == 2
+    assert "trop longue" in resultat["details"][0]["erreur"]
+    assert get_produit(client, ids[2])["nom"] == "C"
+
+
+def test_bom_et_fins_de_ligne_windows(client: TestClient):
+    ids = nouveaux_ids(2)
+    contenu = "﻿" + "\r\n".join([ENTETE, ligne_csv(ids[0]), ligne_csv(ids[1])]) + "\r\n"
+
+    resultat = importer(client, contenu)
+    assert (resultat["importes"], resultat["erreurs"]) == (2, 0)
+    assert get_produit(client, ids[0])["categorie"] == "Import"
+
+
+def test_champ_sur_plusieurs_lignes(client: TestClient):
+    ids = nouveaux_ids(2)
+    contenu = "\n".join([
+        ENTETE,
+        f'{ids[0]},Clavier,"Première ligne\nseconde, avec virgule\n""citée""",25.5,2,Import',
+        f"{ids[1]},Écran,incomplet,abc,2,Import",
+    ]) + "\n"
+
+    resultat = importer(client, contenu)
+    assert (resultat["importes"], resultat["erreurs"]) == (1, 1)
+    assert get_produit(client, ids[0])["description"] == 'Première ligne\nseconde, avec virgule\n"citée"'
+    # Numéro de la ligne où commence l'enregistrement fautif, après le champ multiligne
+    assert resultat["details"][0]["ligne"] == 5
+
+
+@pytest.fixture
+def refus_en_base():
+    """Trigger de test : la base refuse les produits nommés REFUS (erreur SQL, pas de validation)."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TRIGGER test_refus BEFORE INSERT ON produits WHEN new.nom = 'REFUS' "
+            "BEGIN SELECT RAISE(ABORT, 'produit refusé'); END"
+        )
+    yield
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TRIGGER test_refus")
+
+
+def test_lot_mixte_rejoue_ligne_par_ligne(client: TestClient, refus_en_base):
+    ids = nouveaux_ids(4)
+    lignes = [ENTETE, ligne_csv(ids[0]), ligne_csv(ids[1], nom="REFUS"), ligne_csv(ids[2]), ligne_csv(ids[3])]
+
+    resultat = importer(client, "\n".join(lignes))
+    assert (resultat["importes"], resultat["erreurs"]) == (3, 1)
+    assert resultat["details"][0] == {"ligne": 3, "erreur": "produit refusé"}
+    assert get_produit(client, ids[1]) is None
+    assert all(get_produit(client, pid) for pid in (ids[0], ids[2], ids[3]))
+
+
+def test_id_existant_mis_a_jour(client: TestClient, produit):
+    produit_id = produit(stock=5)
+    avant = client.get("/produits/categories/stats").json()
+
+    resultat = importer(client, "\n".join([ENTETE, f"{produit_id},Clavier v2,Nouveau modèle,55.0,9,Tests"]))
+    assert resultat["importes"] == 1
+
+    apres = get_produit(client, produit_id)
+    assert (apres["nom"], apres["prix"], apres["stock"]) == ("Clavier v2", 55.0, 9)
+    # Remplacé, pas dupliqué
+    assert client.get("/produits/categories/stats").json() == avant
@@ -0,0 +1,73 @@
+# test/test_categories.py
+
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db.categories import setup_category_stats
+from app.db.database import engine
+
+
+def stats(client: TestClient) -> dict:
+    response = client.get("/produits/categories/stats")
+    assert response.status_code == 200
+    return {c["categorie"]: (c["produits"], c["promos"]) for c in response.json()}
+
+
+def nouvelle_categorie() -> str:
+    return f"Cat-{uuid.uuid4().hex[:8]}"
+
+
+def test_compteurs_suivent_les_ecritures(client: TestClient, produit):
+    a, b = nouvelle_categorie(), nouvelle_categorie()
+    premier = produit(categorie=a)
+    second = produit(categorie=a)
+    assert stats(client)[a] == (2, 0)
+
+    client.post(f"/produits/{premier}/promo", params={"pourcentage": 10})
+    assert stats(client)[a] == (2, 1)
+
+    # Écriture hors categorie/promotion : compteurs inchangés
+    client.put(f"/produits/{second}", json={"stock": 40})
+    assert stats(client)[a] == (2, 1)
+
+    client.put(f"/produits/{premier}", json={"categorie": b})
+    assert stats(client)[a] == (1, 0)
+    assert stats(client)[b] == (1, 1)
+    assert b in client.get("/produits/categories/liste").json()
+
+    # Nouveau prix : la remise est retirée et n'est plus comptée
+    client.put(f"/produits/{premier}", json={"prix": 80.0})
+    assert stats(client)[b] == (1, 0)
+
+    # Dernier produit supprimé : la catégorie disparaît du menu
+    client.delete(f"/produits/{second}")
+    assert a not in stats(client)
+    assert a not in client.get("/produits/categories/liste").json()
+
+
+def test_compteurs_apres_import(client: TestClient, produit):
+    a, b = nouvelle_categorie(), nouvelle_categorie()
+    existant = produit(categorie=a)
+    lignes = [
+        {"nom": "Lampe", "description": "LED", "prix": 20.0, "stock": 3, "categorie": b},
+        {"nom": "Lampe 2", "description": "LED", "prix": 25.0, "stock": 3, "categorie": b},
+        # Produit existant déplacé de a vers b
+        {"id": existant, "nom": "Clavier test", "description": "d", "prix": 50.0, "stock": 5, "categorie": b},
+    ]
+    contenu = "\n".join(json.dumps(ligne) for ligne in lignes)
+    response = client.post("/produits/import", content=contenu, headers={"content-type": "application/x-ndjson"})
+    assert response.json()["importes"] == 3
+
+    compteurs = stats(client)
+    assert a not in compteurs
+    assert compteurs[b] == (3, 0)
+
+
+def test_recomptage_identique(client: TestClient, produit):
+    produit(categorie=nouvelle_categorie())
+    avant = stats(client)
+    # Recalcul complet (démarrage) : les triggers avaient déjà les bons compteurs
+    setup_category_stats(engine)
+    assert stats(client) == avant
@@ -0,0 +1,73 @@
+# test/test_lectures.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.db.database as database
+from app.db.database import ASYNC_DATABASE_URL, ReadSession, SessionLocal
+from app.models.produit import Produit
+
+# Moteur async optionnel (voir database.py)
+pytest.importorskip("aiosqlite")
+
+
+def lire(session, produit_id: str):
+    """Les trois formes de lecture de ReadSession, sur la session donnée."""
+    db = ReadSession(session)
+    stmt = select(Produit).filter(Produit.id == produit_id)
+
+    async def lectures():
+        return (
+            db.is_async,
+            [p.id for p in await db.scalars(stmt)],
+            (await db.first(stmt)).nom,
+            [tuple(row) for row in await db.all(select(Produit.id, Produit.stock).filter(Produit.id == produit_id))],
+        )
+    return lectures()
+
+
+def test_memes_resultats_sync_et_async(client: TestClient, produit):
+    produit_id = produit(nom="Tapis", stock=4)
+
+    session = SessionLocal()
+    try:
+        sync = asyncio.run(lire(session, produit_id))
+    finally:
+        session.close()
+
+    async def lire_async():
+        engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        try:
+            async with async_sessionmaker(engine)() as session:
+                return await lire(session, produit_id)
+        finally:
+            await engine.dispose()
+
+    resultats = asyncio.run(lire_async())
+    assert (sync[0], resultats[0]) == (False, True)
+    assert sync[1:] == resultats[1:] == ([produit_id], "Tapis", [(produit_id, 4)])
+
+
+def test_routes_sur_le_moteur_async(client: TestClient, produit, monkeypatch):
+    produit_id = produit(nom="Lampe de bureau")
+    # Équivalent de PRODUCT_ASYNC_READS=1 : get_read_db ouvre des sessions async
+    engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    ouvertes = []
+
+    def ouvrir():
+        ouvertes.append(1)
+        return sessions()
+    monkeypatch.setattr(database, "AsyncSessionLocal", ouvrir)
+
+    assert client.get(f"/produits/{produit_id}").json()["nom"] == "Lampe de bureau"
+    assert client.get("/produits/recherche", params={"q": "lampe bureau"}).status_code == 200
+    lot = client.get("/produits/lot", params={"ids": f"{produit_id},absent"}).json()
+    assert lot["manquants"] == ["absent"]
+    assert client.get("/produits/absent").status_code == 404
+    assert len(ouvertes) == 4
@@ -0,0 +1,34 @@
+# test/test_lot.py
+
+from fastapi.testclient import TestClient
+
+from app.api.routes import MAX_LOT_IDS
+
+
+def test_lot_indexe_par_id(client: TestClient, produit):
+    premier, second = produit(), produit(prix=12.5)
+
+    # Paramètre répété et valeurs séparées par des virgules, doublons ignorés
+    response = client.get("/produits/lot", params={"ids": [f"{premier},absent", second, premier]})
+    assert response.status_code == 200
+    lot = response.json()
+    assert list(lot["produits"]) == [premier, "absent", second]
+    assert lot["produits"]["absent"] is None
+    assert lot["manquants"] == ["absent"]
+    assert lot["produits"][second]["prix"] == 12.5
+
+
+def test_lot_projection(client: TestClient, produit):
+    produit_id = produit(stock=7)
+    response = client.get("/produits/lot", params={"ids": produit_id, "champs": "stock, prix"})
+    assert response.json()["produits"][produit_id] == {"id": produit_id, "stock": 7, "prix": 50.0}
+
+    response = client.get("/produits/lot", params={"ids": produit_id, "champs": "stock,mot_de_passe"})
+    assert response.status_code == 400
+    assert "mot_de_passe" in response.json()["detail"]
+
+
+def test_lot_taille_bornee(client: TestClient):
+    assert client.get("/produits/lot", params={"ids": ","}).status_code == 400
+    ids = ",".join(f"p{i}" for i in range(MAX_LOT_IDS + 1))
+    assert client.get("/produits/lot", params={"ids": ids}).status_code == 400
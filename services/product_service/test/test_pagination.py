@@ -0,0 +1,78 @@
+# test/test_pagination.py
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def pages(client: TestClient, url: str, **params):
+    """Parcourt toutes les pages en suivant X-Next-Cursor ; retourne la liste des pages."""
+    resultat = []
+    curseur = None
+    while True:
+        response = client.get(url, params={**params, **({"curseur": curseur} if curseur else {})})
+        assert response.status_code == 200
+        resultat.append(response.json())
+        curseur = response.headers.get("X-Next-Cursor")
+        if not curseur:
+            return resultat
+
+
+@pytest.fixture
+def categorie(produit):
+    """Catégorie propre au test, avec 7 produits de prix variés (deux ex aequo)."""
+    nom = f"Pagination {uuid.uuid4().hex[:8]}"
+    ids = [produit(categorie=nom, prix=prix) for prix in (30.0, 10.0, 20.0, 20.0, 50.0, 40.0, 60.0)]
+    return nom, ids
+
+
+@pytest.mark.parametrize("tri", ["id", "prix", "-prix"])
+def test_curseur_parcourt_tout_sans_doublon(client: TestClient, categorie, tri):
+    nom, ids = categorie
+    resultat = pages(client, f"/produits/categorie/{nom}", tri=tri, limit=3)
+
+    assert [len(page) for page in resultat] == [3, 3, 1]
+    vus = [p["id"] for page in resultat for p in page]
+    assert sorted(vus) == sorted(ids)
+    if tri != "id":
+        prix = [p["prix"] for page in resultat for p in page]
+        assert prix == sorted(prix, reverse=tri == "-prix")
+
+
+def test_curseur_stable_malgre_les_insertions(client: TestClient, categorie, produit):
+    nom, ids = categorie
+    response = client.get(f"/produits/categorie/{nom}", params={"tri": "prix", "limit": 3})
+    premiere = response.json()
+    curseur = response.headers["X-Next-Cursor"]
+
+    # Produits insérés avant la position du curseur : la suite n'est pas décalée
+    produit(categorie=nom, prix=5.0)
+    produit(categorie=nom, prix=15.0)
+
+    suite = pages(client, f"/produits/categorie/{nom}", tri="prix", limit=3, curseur=curseur)
+    vus = [p["id"] for p in premiere] + [p["id"] for page in suite for p in page]
+    assert sorted(vus) == sorted(ids)
+
+
+def test_categorie_resolue_sans_casse(client: TestClient, categorie):
+    nom, ids = categorie
+    response = client.get(f"/produits/categorie/{nom.upper()}", params={"limit": 100})
+    assert response.status_code == 200
+    assert sorted(p["id"] for p in response.json()) == sorted(ids)
+    assert client.get("/produits/categorie/inexistante-xyz").status_code == 404
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": -1}, {"limit": 1001}, {"offset": -1}])
+def test_bornes_de_pagination(client: TestClient, params):
+    assert client.get("/produits/", params=params).status_code == 422
+    assert client.get("/produits/categorie/Tests", params=params).status_code == 422
+
+
+def test_curseur_invalide(client: TestClient, categorie):
+    nom, _ = categorie
+    response = client.get(f"/produits/categorie/{nom}", params={"tri": "prix", "limit": 3})
+    curseur = response.headers["X-Next-Cursor"]
+    # Jeton d'un autre tri, ou illisible
+    assert client.get(f"/produits/categorie/{nom}", params={"tri": "id", "curseur": curseur}).status_code == 400
+    assert client.get(f"/produits/categorie/{nom}", params={"curseur": "pas-un-jeton"}).status_code == 400
@@ -0,0 +1,131 @@
+# test/test_promotions.py
+
+import datetime
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.api import promotions
+
+
+def get_produit(client: TestClient, produit_id: str) -> dict:
+    return client.get(f"/produits/{produit_id}").json()
+
+
+def creer_campagne(client: TestClient, pourcentage: int, produit_ids) -> dict:
+    response = client.post("/promotions/", json={"pourcentage": pourcentage, "produit_ids": produit_ids})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_nouveau_prix_par_put_survit_a_la_campagne(client: TestClient, produit):
+    produit_id = produit()
+    campagne = creer_campagne(client, 20, [produit_id])
+    assert get_produit(client, produit_id)["prix"] == 40.0
+
+    response = client.put(f"/produits/{produit_id}", json={"prix": 70.0})
+    assert response.status_code == 200
+    assert response.json()["prix_original"] is None
+    assert response.json()["promotion"] is None
+
+    client.post(f"/promotions/{campagne['id']}/annuler")
+    assert get_produit(client, produit_id)["prix"] == 70.0
+
+
+def test_nouveau_prix_par_import_survit_a_la_campagne(client: TestClient, produit):
+    produit_id = produit()
+    client.post(f"/produits/{produit_id}/promo", params={"pourcentage": 10})
+    campagne = creer_campagne(client, 20, [produit_id])
+
+    ligne = (
+        '{"id": "%s", "nom": "Clavier test", "description": "Produit de test", '
+        '"prix": 65.0, "stock": 5, "categorie": "Tests"}\n' % produit_id
+    )
+    response = client.post("/produits/import", content=ligne, headers={"content-type": "application/x-ndjson"})
+    assert response.json()["importes"] == 1
+
+    # Ni la campagne ni l'ancienne remise manuelle ne reviennent à l'annulation
+    client.post(f"/promotions/{campagne['id']}/annuler")
+    produit_apres = get_produit(client, produit_id)
+    assert produit_apres["prix"] == 65.0
+    assert produit_apres["promotion"] is None
+    assert produit_apres["prix_original"] is None
+
+
+def annuler(client: TestClient, campagne: dict) -> dict:
+    response = client.post(f"/promotions/{campagne['id']}/annuler")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_application_et_retrait(client: TestClient, produit):
+    produit_id = produit()
+    campagne = creer_campagne(client, 20, [produit_id])
+    assert (campagne["statut"], campagne["produits"]) == ("active", 1)
+
+    remise = get_produit(client, produit_id)
+    assert (remise["prix"], remise["prix_original"], remise["promotion"]) == (40.0, 50.0, 20)
+
+    assert annuler(client, campagne)["statut"] == "annulee"
+    retabli = get_produit(client, produit_id)
+    assert (retabli["prix"], retabli["prix_original"], retabli["promotion"]) == (50.0, None, None)
+
+
+def test_campagne_par_categorie(client: TestClient, produit):
+    categorie = f"Promo-{uuid.uuid4().hex[:8]}"
+    cibles = [produit(categorie=categorie), produit(categorie=categorie, prix=80.0)]
+    hors_cible = produit()
+
+    response = client.post("/promotions/", json={"pourcentage": 25, "categorie": categorie})
+    assert response.json()["produits"] == 2
+    assert [get_produit(client, i)["prix"] for i in cibles] == [37.5, 60.0]
+    assert get_produit(client, hors_cible)["prix"] == 50.0
+
+
+def test_campagnes_superposees(client: TestClient, produit):
+    produit_id = produit()
+    premiere = creer_campagne(client, 10, [produit_id])
+    seconde = creer_campagne(client, 30, [produit_id])
+    # La dernière campagne appliquée l'emporte, sans cumul
+    assert get_produit(client, produit_id)["prix"] == 35.0
+
+    # Fin de la seconde : la première, toujours active, reprend le produit
+    annuler(client, seconde)
+    apres = get_produit(client, produit_id)
+    assert (apres["prix"], apres["promotion"], apres["prix_original"]) == (45.0, 10, 50.0)
+
+    annuler(client, premiere)
+    assert get_produit(client, produit_id)["prix"] == 50.0
+
+
+def test_remise_manuelle_retablie(client: TestClient, produit):
+    produit_id = produit()
+    client.post(f"/produits/{produit_id}/promo", params={"pourcentage": 10})
+    campagne = creer_campagne(client, 20, [produit_id])
+    assert get_produit(client, produit_id)["prix"] == 40.0
+
+    annuler(client, campagne)
+    apres = get_produit(client, produit_id)
+    assert (apres["prix"], apres["promotion"], apres["prix_original"]) == (45.0, 10, 50.0)
+
+
+def test_campagne_planifiee(client: TestClient, produit, monkeypatch):
+    produit_id = produit()
+    debut = promotions.maintenant() + datetime.timedelta(hours=1)
+    response = client.post("/promotions/", json={
+        "pourcentage": 20, "produit_ids": [produit_id],
+        "debut": debut.isoformat(), "fin": (debut + datetime.timedelta(hours=1)).isoformat(),
+    })
+    campagne = response.json()
+    assert campagne["statut"] == "planifiee"
+    assert get_produit(client, produit_id)["prix"] == 50.0
+
+    monkeypatch.setattr(promotions, "maintenant", lambda: debut + datetime.timedelta(minutes=30))
+    promotions.planifier_session()
+    assert client.get(f"/promotions/{campagne['id']}").json()["statut"] == "active"
+    assert get_produit(client, produit_id)["prix"] == 40.0
+
+    monkeypatch.setattr(promotions, "maintenant", lambda: debut + datetime.timedelta(hours=2))
+    promotions.planifier_session()
+    assert client.get(f"/promotions/{campagne['id']}").json()["statut"] == "terminee"
+    assert get_produit(client, produit_id)["prix"] == 50.0
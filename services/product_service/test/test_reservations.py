@@ -0,0 +1,111 @@
+# test/test_reservations.py
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.api.reservations import balayer
+from app.db.database import SessionLocal
+from app.models.reservation import Reservation
+
+
+def stock(client: TestClient, produit_id: str) -> int:
+    return client.get(f"/produits/{produit_id}").json()["stock"]
+
+
+def reserver(client: TestClient, lignes, ttl: int = 900):
+    return client.post("/reservations/", json={
+        "lignes": [{"produit_id": p, "quantite": q} for p, q in lignes],
+        "ttl": ttl,
+    })
+
+
+def test_reservations_concurrentes_sans_survente(client: TestClient, produit):
+    produit_id = produit(stock=5)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        reponses = list(pool.map(lambda _: reserver(client, [(produit_id, 1)]), range(12)))
+
+    codes = sorted(r.status_code for r in reponses)
+    assert codes == [201] * 5 + [409] * 7
+    assert stock(client, produit_id) == 0
+
+
+def test_panier_insuffisant_rien_reserve(client: TestClient, produit):
+    disponible = produit(stock=5)
+    rare = produit(stock=1)
+
+    response = reserver(client, [(disponible, 2), (rare, 3)])
+    assert response.status_code == 409
+    assert rare in response.json()["detail"]
+    # Tout ou rien : le premier produit n'a pas été décompté
+    assert stock(client, disponible) == 5
+    assert stock(client, rare) == 1
+
+
+def test_confirmer_puis_liberer(client: TestClient, produit):
+    produit_id = produit(stock=5)
+    reservation = reserver(client, [(produit_id, 2), (produit_id, 1)]).json()
+    assert reservation["statut"] == "active"
+    assert stock(client, produit_id) == 2
+
+    response = client.post(f"/reservations/{reservation['id']}/confirmer")
+    assert response.status_code == 200
+    assert response.json()["statut"] == "confirmee"
+    # Confirmation idempotente, libération refusée : le stock reste décompté
+    assert client.post(f"/reservations/{reservation['id']}/confirmer").status_code == 200
+    assert client.post(f"/reservations/{reservation['id']}/liberer").status_code == 409
+    assert stock(client, produit_id) == 2
+
+
+def test_liberer_rend_le_stock_une_fois(client: TestClient, produit):
+    produit_id = produit(stock=5)
+    reservation = reserver(client, [(produit_id, 3)]).json()
+
+    for _ in range(2):
+        response = client.post(f"/reservations/{reservation['id']}/liberer")
+        assert response.status_code == 200
+        assert response.json()["statut"] == "liberee"
+    assert stock(client, produit_id) == 5
+    assert client.post(f"/reservations/{reservation['id']}/confirmer").status_code == 409
+
+
+def expirer(reservation_id: str):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Reservation)
+            .where(Reservation.id == reservation_id)
+            .values(expire_le=datetime.datetime.utcnow() - datetime.timedelta(seconds=1))
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_expiration_par_balayage(client: TestClient, produit):
+    produit_id = produit(stock=5)
+    reservation = reserver(client, [(produit_id, 4)], ttl=10).json()
+    expirer(reservation["id"])
+
+    balayer()
+    assert client.get(f"/reservations/{reservation['id']}").json()["statut"] == "expiree"
+    assert stock(client, produit_id) == 5
+    # Déjà balayée : ni confirmation ni second retour de stock
+    balayer()
+    assert client.post(f"/reservations/{reservation['id']}/confirmer").status_code == 409
+    assert stock(client, produit_id) == 5
+
+
+def test_confirmer_apres_echeance(client: TestClient, produit):
+    produit_id = produit(stock=5)
+    reservation = reserver(client, [(produit_id, 2)], ttl=10).json()
+    expirer(reservation["id"])
+
+    # Échue mais pas encore balayée : refusée, et le stock est rendu aussitôt
+    response = client.post(f"/reservations/{reservation['id']}/confirmer")
+    assert response.status_code == 409
+    assert stock(client, produit_id) == 5
+    assert client.get(f"/reservations/{reservation['id']}").json()["statut"] == "expiree"
@@ -0,0 +1,63 @@
+# test/test_search.py
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db.database import engine
+from app.db.search import index_coherent, setup_search
+
+
+def mot_unique() -> str:
+    return f"zq{uuid.uuid4().hex[:8]}"
+
+
+def rechercher(client: TestClient, q: str) -> list:
+    response = client.get("/produits/recherche", params={"q": q})
+    if response.status_code == 404:
+        return []
+    assert response.status_code == 200
+    return [p["id"] for p in response.json()]
+
+
+def test_index_suit_les_ecritures(client: TestClient, produit):
+    mot, nouveau = mot_unique(), mot_unique()
+    produit_id = produit(nom=f"Écran {mot}")
+
+    # Préfixe, sans accent
+    assert rechercher(client, f"ecran {mot[:5]}") == [produit_id]
+
+    response = client.put(f"/produits/{produit_id}", json={"nom": f"Moniteur {nouveau}"})
+    assert response.status_code == 200
+    assert rechercher(client, mot) == []
+    assert rechercher(client, nouveau) == [produit_id]
+
+    # Une écriture hors champs indexés ne fait pas sortir le produit de l'index
+    assert client.put(f"/produits/{produit_id}", json={"stock": 12}).status_code == 200
+    assert rechercher(client, nouveau) == [produit_id]
+
+    assert client.delete(f"/produits/{produit_id}").status_code == 200
+    assert rechercher(client, nouveau) == []
+
+
+def test_reconstruction_apres_renumerotation(client: TestClient, produit):
+    mot = mot_unique()
+    produit_id = produit(description=f"Référence {mot}")
+
+    # Renumérotation des rowid (comme VACUUM ou une copie de table) : les
+    # triggers ne voient aucun champ indexé changer, l'index pointe ailleurs
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE produits SET rowid = rowid + 100000")
+    with engine.connect() as conn:
+        assert not index_coherent(conn)
+
+    setup_search(engine)
+
+    with engine.connect() as conn:
+        assert index_coherent(conn)
+    assert rechercher(client, mot) == [produit_id]
+
+
+def test_saisie_sans_mot(client: TestClient):
+    response = client.get("/produits/recherche", params={"q": "'*\"-"})
+    assert response.status_code == 400
@@ -0,0 +1,108 @@
+# test/test_upload.py
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api.images import chemins_variantes
+from app.api.upload import UPLOAD_DIR
+
+
+def image_png(largeur: int, couleur=(200, 30, 30)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (largeur, largeur // 2), couleur).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def envoyer(client: TestClient, contenu: bytes):
+    return client.post("/upload", files={"file": ("photo.png", contenu, "image/png")})
+
+
+def test_url_publiee_avec_ses_variantes(client: TestClient):
+    response = envoyer(client, image_png(2000))
+    assert response.status_code == 200
+    filename = response.json()["filename"]
+    chemin = os.path.join(UPLOAD_DIR, filename)
+
+    # Dès la réponse : variante "full" (réduite) publiée, toutes les variantes prêtes
+    assert all(os.path.exists(p) for p in chemins_variantes(chemin))
+    with Image.open(chemin) as img:
+        assert max(img.size) == 1200
+    premiere = client.get(f"/static/uploads/{filename}").content
+
+    # Même contenu renvoyé : même URL, même contenu, aucun fichier temporaire laissé
+    assert envoyer(client, image_png(2000)).json()["filename"] == filename
+    assert client.get(f"/static/uploads/{filename}").content == premiere
+    assert not [nom for nom in os.listdir(UPLOAD_DIR) if nom.startswith(".")]
+
+
+def test_envois_simultanes_du_meme_contenu(client: TestClient):
+    contenu = image_png(1600, couleur=(10, 120, 40))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        reponses = list(pool.map(lambda _: envoyer(client, contenu), range(4)))
+
+    assert [r.status_code for r in reponses] == [200] * 4
+    filenames = {r.json()["filename"] for r in reponses}
+    assert len(filenames) == 1
+    chemin = os.path.join(UPLOAD_DIR, filenames.pop())
+    assert all(os.path.exists(p) for p in chemins_variantes(chemin))
+    assert not [nom for nom in os.listdir(UPLOAD_DIR) if nom.startswith(".")]
+
+
+def traitement_bloque(monkeypatch):
+    """Remplace traiter_image par une version qui attend `libere` ; retourne (demarre, libere, vus)."""
+    import asyncio
+    import threading
+
+    import app.api.images as images
+
+    demarre, libere = threading.Event(), threading.Event()
+    publie_au_demarrage = []
+    original = images.traiter_image
+
+    async def traiter_image(chemin, source=None):
+        publie_au_demarrage.append(os.path.exists(chemin))
+        demarre.set()
+        while not libere.is_set():
+            await asyncio.sleep(0.01)
+        await original(chemin, source)
+
+    monkeypatch.setattr(images, "traiter_image", traiter_image)
+    return demarre, libere, publie_au_demarrage
+
+
+def test_url_absente_pendant_le_traitement(client: TestClient, monkeypatch):
+    demarre, libere, publie_au_demarrage = traitement_bloque(monkeypatch)
+    contenu = image_png(1800, couleur=(90, 90, 200))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        premier = pool.submit(envoyer, client, contenu)
+        assert demarre.wait(5)
+        # Second envoi du même contenu pendant le traitement : il l'attend
+        second = pool.submit(envoyer, client, contenu)
+        time.sleep(0.3)
+        assert not second.done() and not premier.done()
+        libere.set()
+        filenames = {premier.result().json()["filename"], second.result().json()["filename"]}
+
+    # Un seul traitement, lancé avant que l'URL existe
+    assert publie_au_demarrage == [False]
+    assert len(filenames) == 1
+    chemin = os.path.join(UPLOAD_DIR, filenames.pop())
+    assert all(os.path.exists(p) for p in chemins_variantes(chemin))
+
+
+def test_fichiers_de_travail_jamais_servis(client: TestClient):
+    nom = envoyer(client, image_png(300, couleur=(1, 2, 3))).json()["filename"]
+    for cache in (f".{nom}.gc", f".{nom}.tmp"):
+        with open(os.path.join(UPLOAD_DIR, cache), "wb") as f:
+            f.write(b"copie")
+        try:
+            assert client.get(f"/static/uploads/{cache}").status_code == 404
+        finally:
+            os.remove(os.path.join(UPLOAD_DIR, cache))
+    assert client.get(f"/static/uploads/{nom}").status_code == 200
@@ -8,6 +8,10 @@ def run_service(service_name, port):
     """Lance un service FastAPI avec uvicorn sur un port spécifique"""
     service_path = Path(__file__).parent / service_name
     os.chdir(service_path)
+    # Code partagé entre services (services/common)
+    os.environ["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(Path(__file__).parent), os.environ.get("PYTHONPATH")])
+    )
     
     # Commande pour lancer le service avec uvicorn
     cmd = [
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db import schemas
 from app.models import user as models
 from app.db.database import SessionLocal
+from common.export import EXPORT_FORMAT_PATTERN, export_table
 from passlib.context import CryptContext
 
 import logging
@@ -121,6 +123,13 @@ def list_users(db: Session = Depends(get_db)):
         logger.error(f"Error listing users: {e}")
         raise HTTPException(status_code=500, detail="Une erreur est survenue lors de la récupération des utilisateurs")
 
+@router.get("/admin/users/export")
+def export_users(fmt: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN)):
+    """Export NDJSON ou CSV de tous les utilisateurs, sans les mots de passe, envoyé au fil de la lecture."""
+    User = models.User
+    stmt = select(User.id, User.nom, User.email, User.role, User.date_creation)
+    return export_table(SessionLocal, stmt, User.id, fmt, "utilisateurs")
+
 @router.delete("/admin/user/{user_id}")
 def delete_user(user_id: str, db: Session = Depends(get_db)):
     try:
@@ -1,10 +1,23 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = "sqlite:///./users.db"
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL : les lectures (exports compris) ne bloquent pas les écritures, et
+    # une écriture concurrente attend le verrou au lieu d'échouer aussitôt
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -11,3 +11,8 @@ Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
 app.include_router(routes.router)
+
+
+@app.get("/health", tags=["Health"])
+def health():
+    return {"status": "ok"}